@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from fastapi import HTTPException
+from sqlalchemy.orm.attributes import flag_modified
+from sqlmodel import Session, col, select
+from models import Activity, ActivityStatus, TodoItem, TodoStatus
+from todo_bitmap import answered_count, pack_statuses
+
+# Activities counted as done by the stats (all their todos are answered)
+COMPLETED_STATUSES = (ActivityStatus.done, ActivityStatus.in_review, ActivityStatus.finished)
+
+# Statuses whose todos can no longer be reopened
+LOCKED_STATUSES = (ActivityStatus.in_review, ActivityStatus.finished)
+
+ACTIVITY_TRANSITIONS: dict[ActivityStatus, set[ActivityStatus]] = {
+    # Activities without todos go straight to review or finished
+    ActivityStatus.pending: {
+        ActivityStatus.in_progress,
+        ActivityStatus.done,
+        ActivityStatus.in_review,
+        ActivityStatus.finished,
+    },
+    ActivityStatus.in_progress: {ActivityStatus.pending, ActivityStatus.done},
+    ActivityStatus.done: {
+        ActivityStatus.pending,
+        ActivityStatus.in_progress,
+        ActivityStatus.in_review,
+        ActivityStatus.finished,
+    },
+    # Sent back to the supervisor, or approved
+    ActivityStatus.in_review: {ActivityStatus.pending, ActivityStatus.done, ActivityStatus.finished},
+    # Reopened (activities without todos go back to pending)
+    ActivityStatus.finished: {ActivityStatus.pending, ActivityStatus.done, ActivityStatus.in_review},
+}
+
+
+def progress_status(total_todos: int, answered_todos: int) -> ActivityStatus:
+    if answered_todos == 0:
+        return ActivityStatus.pending
+    if answered_todos == total_todos:
+        return ActivityStatus.done
+    return ActivityStatus.in_progress
+
+
+def lifecycle_status(
+    in_review: bool, finished_date: Optional[datetime], total_todos: int, answered_todos: int
+) -> ActivityStatus:
+    if finished_date is not None:
+        return ActivityStatus.finished
+    if in_review:
+        return ActivityStatus.in_review
+    return progress_status(total_todos, answered_todos)
+
+
+def refresh_activity_statuses(
+    session: Session, changed: Iterable[Activity], created: bool = False
+) -> None:
+    """
+    Repack the todo statuses of activities after a write to them or their
+    todos (one query), and recompute their status from the packed counts.
+    Raises 400 if the write would leave an activity in review (or finished)
+    with pending todos, or is not a valid transition. New activities
+    (`created`) start in whatever status they compute to.
+    """
+    activities = list(changed)
+    session.flush()
+    statuses: dict[Optional[int], list[Optional[TodoStatus]]] = {
+        activity.id: [] for activity in activities
+    }
+    for activity_id, todo_status in session.exec(
+        select(TodoItem.activity_id, TodoItem.status)
+        .where(col(TodoItem.activity_id).in_(statuses))
+        .order_by(col(TodoItem.activity_id), col(TodoItem.id))
+    ).all():
+        statuses[activity_id].append(todo_status)
+
+    for activity in activities:
+        packed = pack_statuses(statuses[activity.id])
+        total, answered = len(statuses[activity.id]), answered_count(packed)
+        status = lifecycle_status(activity.in_review, activity.finished_date, total, answered)
+        if status in LOCKED_STATUSES and answered < total:
+            if activity.status == status:
+                detail = f"Cannot reopen todos while the activity is {status.value}."
+            else:
+                detail = f"Cannot set activity to {status.value} while there are pending todos."
+            raise HTTPException(status_code=400, detail=detail)
+        if (activity.todo_count, activity.todo_statuses) != (total, packed):
+            activity.todo_count, activity.todo_statuses = total, packed
+            session.add(activity)
+            if status == activity.status:
+                # Derived from the todos: for clients the activity did not change
+                flag_modified(activity, "updated_at")
+        if status == activity.status:
+            continue
+        if not created and status not in ACTIVITY_TRANSITIONS[activity.status]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot move activity from {activity.status.value} to {status.value}.",
+            )
+        activity.status = status
+        session.add(activity)
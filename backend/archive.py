@@ -0,0 +1,248 @@
+"""
+Archival of finished activities.
+
+Usage: uv run python archive.py [months]
+
+Activities finished and scheduled before the start of the month `months`
+months ago (ARCHIVE_AFTER_MONTHS by default) are moved, with their todos, to
+the activityarchive and todoitemarchive tables, so `activity`, `todoitem` and
+their indexes only hold recent work. Their counts are added to activityrollup
+first, so the monthly history keeps them, and /exports/activities still
+returns them with include_archived=true.
+"""
+import os
+import sys
+from datetime import datetime
+from typing import Any, Optional, Sequence
+from sqlalchemy import delete, insert, literal, or_
+from sqlmodel import Session, col, func, select
+from activity_lifecycle import COMPLETED_STATUSES
+from jobs import job_handler
+from models import (
+    Activity,
+    ActivityArchive,
+    ActivityRollup,
+    ActivityStatus,
+    DeadlineStatus,
+    SyncEntity,
+    TemplateTodoItem,
+    TodoItem,
+    TodoItemArchive,
+    Tombstone,
+)
+from todo_bitmap import answered_count
+
+# Never less than one: the stats compare the current month with the previous one
+ARCHIVE_AFTER_MONTHS = max(1, int(os.getenv("ARCHIVE_AFTER_MONTHS") or "12"))
+# Activities moved per transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+ROLLUP_COUNTERS = (
+    "activities",
+    "done",
+    "missed",
+    "completed_on_time",
+    "completed_late",
+    "todos",
+    "completed_todos",
+)
+
+ARCHIVED_ACTIVITY_COLUMNS = (
+    "id",
+    "tenant_id",
+    "name",
+    "scheduled_date",
+    "finished_date",
+    "created_by_id",
+    "assigned_to_id",
+    "in_review",
+    "status",
+    "deadline_status",
+    "updated_at",
+)
+ARCHIVED_TODO_COLUMNS = ("id", "tenant_id", "description", "status", "updated_at", "activity_id")
+# Archived todos keep their own copy of the text they read from their template todo
+ARCHIVED_TODO_VALUES = (
+    TodoItem.id,
+    TodoItem.tenant_id,
+    func.coalesce(TodoItem.description, TemplateTodoItem.description),
+    TodoItem.status,
+    TodoItem.updated_at,
+    TodoItem.activity_id,
+)
+
+
+def month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def months_before(value: datetime, months: int) -> datetime:
+    """First day of the month `months` months before the month of `value`"""
+    month_index = value.year * 12 + value.month - 1 - months
+    return datetime(month_index // 12, month_index % 12 + 1, 1)
+
+
+def activity_counts(
+    status: ActivityStatus,
+    deadline_status: DeadlineStatus,
+    scheduled_date: Optional[datetime],
+    finished_date: Optional[datetime],
+    todos: int,
+    completed_todos: int,
+) -> dict[str, int]:
+    """What one activity adds to its month: missed ones first, like the live stats"""
+    missed = deadline_status == DeadlineStatus.missed
+    completed = status in COMPLETED_STATUSES
+    timed = completed and finished_date is not None and scheduled_date is not None
+    return {
+        "activities": 1,
+        "done": int(completed and not missed),
+        "missed": int(missed),
+        "completed_on_time": int(timed and finished_date <= scheduled_date),  # type: ignore
+        "completed_late": int(timed and finished_date > scheduled_date),  # type: ignore
+        "todos": 0 if missed else todos,
+        "completed_todos": 0 if missed else completed_todos,
+    }
+
+
+def todo_counts(session: Session, conditions: list) -> dict[int, tuple[int, int]]:
+    """Todos and answered todos per activity matching the conditions"""
+    return {
+        activity_id: (total, answered_count(packed))
+        for activity_id, total, packed in session.exec(
+            select(Activity.id, Activity.todo_count, Activity.todo_statuses).where(*conditions)
+        ).all()
+    }
+
+
+def add_to_rollups(session: Session, activities: Sequence[Any], todos: dict) -> None:
+    totals: dict[tuple[int, int, datetime], dict[str, int]] = {}
+    for activity in activities:
+        # Finished activities without a scheduled date count in their finishing month
+        month = month_start(activity.scheduled_date or activity.finished_date)
+        key = (activity.tenant_id, activity.assigned_to_id, month)
+        counts = activity_counts(
+            activity.status,
+            activity.deadline_status,
+            activity.scheduled_date,
+            activity.finished_date,
+            *todos.get(activity.id, (0, 0)),
+        )
+        bucket = totals.setdefault(key, dict.fromkeys(ROLLUP_COUNTERS, 0))
+        for name, value in counts.items():
+            bucket[name] += value
+
+    existing = {
+        (rollup.tenant_id, rollup.assigned_to_id, rollup.month): rollup
+        for rollup in session.exec(
+            select(ActivityRollup).where(
+                col(ActivityRollup.assigned_to_id).in_({key[1] for key in totals}),
+                col(ActivityRollup.month).in_({key[2] for key in totals}),
+            )
+        ).all()
+    }
+    for (tenant_id, assigned_to_id, month), counts in totals.items():
+        rollup = existing.get((tenant_id, assigned_to_id, month))
+        if rollup is None:
+            rollup = ActivityRollup(tenant_id=tenant_id, assigned_to_id=assigned_to_id, month=month)
+        for name, value in counts.items():
+            setattr(rollup, name, (getattr(rollup, name) or 0) + value)
+        session.add(rollup)
+
+
+def archive_finished_activities(
+    session: Session, months: int = ARCHIVE_AFTER_MONTHS, now: Optional[datetime] = None
+) -> int:
+    """
+    Move the finished activities older than `months` months to the archive,
+    ARCHIVE_BATCH_SIZE per transaction. Returns how many were archived.
+    """
+    now = now or datetime.now()
+    cutoff = months_before(now, max(1, months))
+    archivable = [
+        Activity.status == ActivityStatus.finished,
+        col(Activity.finished_date) < cutoff,
+        or_(col(Activity.scheduled_date).is_(None), col(Activity.scheduled_date) < cutoff),
+    ]
+
+    archived = 0
+    while True:
+        # An ORM select, so a tenant-scoped session only archives its own tenant
+        activities = session.exec(
+            select(
+                Activity.id,
+                Activity.tenant_id,
+                Activity.assigned_to_id,
+                Activity.created_by_id,
+                Activity.scheduled_date,
+                Activity.finished_date,
+                Activity.status,
+                Activity.deadline_status,
+            )
+            .where(*archivable)
+            .order_by(col(Activity.id))
+            .limit(ARCHIVE_BATCH_SIZE)
+        ).all()
+        if not activities:
+            break
+        activity_ids = [activity.id for activity in activities]
+
+        add_to_rollups(
+            session, activities, todo_counts(session, [col(Activity.id).in_(activity_ids)])
+        )
+        session.exec(
+            insert(ActivityArchive).from_select(
+                [*ARCHIVED_ACTIVITY_COLUMNS, "archived_at"],
+                select(
+                    *(getattr(Activity, name) for name in ARCHIVED_ACTIVITY_COLUMNS),
+                    literal(now, ActivityArchive.__table__.c.archived_at.type),  # type: ignore
+                ).where(col(Activity.id).in_(activity_ids)),
+            )
+        )
+        session.exec(
+            insert(TodoItemArchive).from_select(
+                ARCHIVED_TODO_COLUMNS,
+                select(*ARCHIVED_TODO_VALUES)
+                .outerjoin(
+                    TemplateTodoItem, col(TodoItem.template_todo_id) == col(TemplateTodoItem.id)
+                )
+                .where(col(TodoItem.activity_id).in_(activity_ids)),
+            )
+        )
+        # Offline clients drop them on their next delta sync
+        session.add_all(
+            Tombstone(
+                entity=SyncEntity.activity,
+                entity_id=activity.id,
+                assigned_to_id=activity.assigned_to_id,
+                created_by_id=activity.created_by_id,
+            )
+            for activity in activities
+        )
+        # Their todos go with them (ON DELETE CASCADE)
+        session.exec(
+            delete(Activity)
+            .where(col(Activity.id).in_(activity_ids))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        archived += len(activity_ids)
+
+    return archived
+
+
+@job_handler("activities.archive")
+def run_archive(session: Session, payload: Optional[dict], user_id: Optional[int]) -> dict:
+    months = (payload or {}).get("months") or ARCHIVE_AFTER_MONTHS
+    return {"archived": archive_finished_activities(session, months)}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sys.exit(__doc__)
+    from database import engine
+
+    months = int(sys.argv[1]) if len(sys.argv) == 2 else ARCHIVE_AFTER_MONTHS
+    with Session(engine) as session:
+        archived = archive_finished_activities(session, months)
+    print(f"Archived {archived} activities finished before {months_before(datetime.now(), months):%Y-%m}")
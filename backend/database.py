@@ -1,15 +1,49 @@
 import os
 from dotenv import load_dotenv
+from fastapi import Request
+from sqlalchemy import event
 from sqlmodel import create_engine, Session
+from tenancy import scope_session, token_tenant
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///database.db")
 
+# Connections the app may hold open in total. Every server worker has its own
+# pool, so the budget is split between WEB_CONCURRENCY workers (set by
+# gunicorn.conf.py); a third of each share stays open, the rest is overflow.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS") or "15")
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY") or "1")
+connections_per_worker = max(2, DB_MAX_CONNECTIONS // WEB_CONCURRENCY)
+pool_size = int(os.getenv("DB_POOL_SIZE") or max(1, connections_per_worker // 3))
+
 # SQLite specific configuration
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+engine = create_engine(
+    DATABASE_URL,
+    connect_args=connect_args,
+    pool_size=pool_size,
+    max_overflow=max(0, connections_per_worker - pool_size),
+)
+
+if DATABASE_URL.startswith("sqlite"):
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Several worker processes share the file: WAL lets readers run
+        # alongside a writer instead of failing with "database is locked"
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Off by default; the ON DELETE CASCADE / SET NULL foreign keys rely on it
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
 
-def get_session():
+def get_session(request: Request):
+    """
+    Request session, scoped to the tenant of the bearer token. Without one it
+    fails closed: the session sees no tenant's rows (login opts out with
+    all_tenants).
+    """
     with Session(engine) as session:
+        scope_session(session, token_tenant(request.headers.get("authorization")))
         yield session
@@ -0,0 +1,104 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+from sqlalchemy import event
+from sqlmodel import Session, col, update
+from database import engine
+from models import Activity, DeadlineStatus
+
+logger = logging.getLogger(__name__)
+
+# An activity is overdue once its scheduled date passes, and missed this long after
+MISSED_AFTER = timedelta(hours=24)
+# Statuses lag the clock by at most this many seconds
+DEADLINE_SWEEP_INTERVAL = float(os.getenv("DEADLINE_SWEEP_INTERVAL", "60"))
+
+
+def deadline_status_at(scheduled_date: Optional[datetime], now: datetime) -> DeadlineStatus:
+    if scheduled_date is None or scheduled_date > now:
+        return DeadlineStatus.upcoming
+    if scheduled_date > now - MISSED_AFTER:
+        return DeadlineStatus.overdue
+    return DeadlineStatus.missed
+
+
+@event.listens_for(Activity, "before_insert")
+@event.listens_for(Activity, "before_update")
+def _set_deadline_status(mapper: Any, connection: Any, activity: Activity) -> None:
+    # Created or rescheduled activities get their status right away
+    activity.deadline_status = deadline_status_at(activity.scheduled_date, datetime.now())
+
+
+class DeadlineSweeper:
+    """
+    Background thread that moves activities to overdue/missed as the clock
+    passes their thresholds. After the first sweep of the process, only the
+    scheduled_date ranges that crossed a threshold since the previous sweep
+    are scanned.
+    """
+
+    def __init__(self, interval: float = DEADLINE_SWEEP_INTERVAL) -> None:
+        self.interval = interval
+        self._last_run: Optional[datetime] = None
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="deadline-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Deadline sweep failed")
+            self._stopping.wait(self.interval)
+
+    def sweep(self) -> int:
+        """Update the activities that crossed a threshold; returns how many changed."""
+        now = datetime.now()
+        last_run = self._last_run
+        scheduled_date = col(Activity.scheduled_date)
+
+        missed = [
+            scheduled_date <= now - MISSED_AFTER,
+            Activity.deadline_status != DeadlineStatus.missed,
+        ]
+        overdue = [
+            scheduled_date <= now,
+            scheduled_date > now - MISSED_AFTER,
+            Activity.deadline_status != DeadlineStatus.overdue,
+        ]
+        if last_run is not None:
+            missed.append(scheduled_date > last_run - MISSED_AFTER)
+            overdue.append(scheduled_date > last_run)
+
+        with Session(engine) as session:
+            changed = 0
+            for status, conditions in (
+                (DeadlineStatus.missed, missed),
+                (DeadlineStatus.overdue, overdue),
+            ):
+                changed += session.exec(
+                    update(Activity)
+                    .where(*conditions)
+                    .values(deadline_status=status)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+            session.commit()
+
+        self._last_run = now
+        return changed
+
+
+deadline_sweeper = DeadlineSweeper()
@@ -0,0 +1,45 @@
+"""
+Production server: gunicorn managing uvicorn workers.
+
+    gunicorn main:app
+
+Each worker is a separate process with its own GIL, database pool, job runner
+and deadline sweeper. With more than one worker, the state they must agree on
+goes through the database: change events (/events/stream) are relayed through
+the changeeventlog table, rate limit buckets live in ratelimitbucket, and
+changes to users or assignments bump cacheversion so every worker drops its
+cached supervisors. Load shedding stays per worker.
+"""
+import os
+
+# One worker per available CPU; bcrypt, the stats and serialization are CPU bound
+workers = int(os.getenv("WEB_CONCURRENCY") or os.process_cpu_count() or 1)
+# Read by database.py (and the modules choosing a shared backend) before the
+# app is preloaded
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+worker_class = "uvicorn_worker.UvicornWorker"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# Import the app once in the master and fork it, so workers start quickly and
+# share the imported modules' memory until they write to it
+preload_app = True
+
+# Restart each worker after this many requests (spread by the jitter so they
+# do not all restart at once), bounding slow leaks and fragmentation
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "500"))
+
+# Workers get this long to finish in-flight requests on restart or shutdown
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = 5
+
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with the workers
+    from database import engine
+
+    engine.dispose(close=False)
@@ -0,0 +1,227 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, delete, select
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from database import engine
+from models import IdempotencyKey
+from security import token_subject
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+
+# How long a stored response is replayed for
+IDEMPOTENCY_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")))
+# A key whose first request has not finished after this long is assumed
+# abandoned (e.g. the process stopped) and the next retry runs the handler
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(seconds=int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60")))
+# Expired keys are deleted at most this often, by whichever request comes first
+IDEMPOTENCY_PURGE_INTERVAL = 600
+
+
+@dataclass
+class Claim:
+    """Result of looking up a key: run the handler, replay a response, or refuse"""
+    record: Optional[IdempotencyKey] = None
+    error: Optional[tuple[int, str]] = None
+
+
+def key_owner(headers: Headers, scope: Scope) -> str:
+    """Keys are scoped per user, so clients cannot replay each other's responses."""
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = token_subject(token)
+        if subject is not None:
+            return "user:" + subject
+        return "token:" + hashlib.sha256(token.encode()).hexdigest()
+    client = scope.get("client")
+    return "client:" + (client[0] if client else "")
+
+
+def request_fingerprint(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+_next_purge = 0.0
+
+
+def purge_expired_keys(session: Session) -> None:
+    global _next_purge
+    if time.monotonic() < _next_purge:
+        return
+    _next_purge = time.monotonic() + IDEMPOTENCY_PURGE_INTERVAL
+    session.exec(delete(IdempotencyKey).where(col(IdempotencyKey.expires_at) <= datetime.now()))
+    session.commit()
+
+
+def claim_key(owner: str, key: str, request_hash: str) -> Claim:
+    now = datetime.now()
+    with Session(engine) as session:
+        purge_expired_keys(session)
+        record = session.exec(
+            select(IdempotencyKey).where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+        ).first()
+        if record is not None and record.expires_at <= now:
+            session.delete(record)
+            session.flush()
+            record = None
+
+        if record is None:
+            session.add(
+                IdempotencyKey(
+                    owner=owner,
+                    key=key,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + IDEMPOTENCY_TTL,
+                )
+            )
+            try:
+                session.commit()
+            except IntegrityError:
+                # A concurrent request with the same key got there first
+                return Claim(error=(409, "A request with this Idempotency-Key is in progress"))
+            return Claim()
+
+        if record.request_hash != request_hash:
+            return Claim(error=(422, "Idempotency-Key was already used for a different request"))
+        if record.status_code is None:
+            if record.created_at > now - IDEMPOTENCY_LOCK_TIMEOUT:
+                return Claim(error=(409, "A request with this Idempotency-Key is in progress"))
+            record.created_at = now
+            session.add(record)
+            session.commit()
+            return Claim()
+        session.expunge(record)
+        return Claim(record=record)
+
+
+def store_response(
+    owner: str, key: str, status_code: int, content_type: Optional[str], body: bytes
+) -> None:
+    with Session(engine) as session:
+        record = session.exec(
+            select(IdempotencyKey).where(IdempotencyKey.owner == owner, IdempotencyKey.key == key)
+        ).first()
+        if record is None:
+            return
+        if status_code >= 500:
+            # Server errors are not final, let the client retry them
+            session.delete(record)
+        else:
+            record.status_code = status_code
+            record.content_type = content_type
+            record.body = body
+            session.add(record)
+        session.commit()
+
+
+def release_key(owner: str, key: str) -> None:
+    with Session(engine) as session:
+        session.exec(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.owner == owner,
+                IdempotencyKey.key == key,
+                col(IdempotencyKey.status_code).is_(None),
+            )
+        )
+        session.commit()
+
+
+class IdempotencyMiddleware:
+    """
+    Honour the `Idempotency-Key` header on write requests. The first request
+    with a key runs normally and its response is stored; retries with the
+    same key and payload get the stored response back (with an
+    `Idempotent-Replayed` header) without running the handler again.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse({"detail": "Invalid Idempotency-Key"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        owner = key_owner(headers, scope)
+        claim = await run_in_threadpool(claim_key, owner, key, request_fingerprint(scope, body))
+        if claim.error is not None:
+            status_code, detail = claim.error
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=status_code,
+                headers={"Retry-After": "1"} if status_code == 409 else None,
+            )
+            await response(scope, receive, send)
+            return
+        if claim.record is not None:
+            response = Response(
+                content=claim.record.body or b"",
+                status_code=claim.record.status_code or 200,
+                headers={"Idempotent-Replayed": "true"},
+                media_type=claim.record.content_type,
+            )
+            await response(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def replay_body() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        status_code = 500
+        content_type: Optional[str] = None
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await run_in_threadpool(release_key, owner, key)
+            raise
+        await run_in_threadpool(
+            store_response, owner, key, status_code, content_type, b"".join(chunks)
+        )
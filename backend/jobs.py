@@ -0,0 +1,174 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlmodel import Session, col, func, select, update
+from database import engine
+from models import Job, JobStatus, User
+from tenancy import scope_session
+
+logger = logging.getLogger(__name__)
+
+# One worker by default: jobs are CPU heavy and we run on a single shared vCPU,
+# so they queue up behind each other instead of competing with requests.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+# How often idle workers look for jobs enqueued by other processes
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+# A running job not finished after this long is assumed lost (e.g. the
+# process was stopped) and is retried, up to JOB_MAX_ATTEMPTS times.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_MAX_ACTIVE_PER_USER = int(os.getenv("JOB_MAX_ACTIVE_PER_USER", "3"))
+
+# Handlers get their own session, the job payload and the id of the user who
+# enqueued it, and return a JSON-serializable result.
+JobHandler = Callable[[Session, Any, Optional[int]], Any]
+
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+
+    return register
+
+
+def enqueue_job(session: Session, kind: str, payload: Any, user: User) -> Job:
+    """Queue a job for the workers. Raises 429 if the user has too many active jobs."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    active = session.exec(
+        select(func.count()).select_from(Job).where(
+            Job.created_by_id == user.id,
+            col(Job.status).in_([JobStatus.queued, JobStatus.running]),
+        )
+    ).one()
+    if active >= JOB_MAX_ACTIVE_PER_USER:
+        raise HTTPException(status_code=429, detail="Too many jobs in progress")
+
+    job = Job(kind=kind, payload=payload, created_by_id=user.id)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    job_runner.notify()
+    return job
+
+
+class JobRunner:
+    """
+    Worker threads that claim queued jobs from the job table. Jobs survive
+    restarts: queued ones are picked up on the next boot and running ones once
+    their lease expires. Claims are conditional UPDATEs, so several processes
+    can share the table.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL) -> None:
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop after the jobs in progress finish (unfinished ones are retried later)."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = claim_next_job()
+            except Exception:
+                logger.exception("Could not claim a job")
+                job_id = None
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            run_job(job_id)
+
+
+def claim_next_job() -> Optional[int]:
+    now = datetime.now()
+    lease_expired = and_(
+        Job.status == JobStatus.running,
+        col(Job.started_at) < now - timedelta(seconds=JOB_LEASE_SECONDS),
+    )
+    claimable = or_(
+        Job.status == JobStatus.queued,
+        and_(lease_expired, col(Job.attempts) < JOB_MAX_ATTEMPTS),
+    )
+    with Session(engine) as session:
+        session.exec(
+            update(Job)
+            .where(lease_expired, col(Job.attempts) >= JOB_MAX_ATTEMPTS)
+            .values(
+                status=JobStatus.failed,
+                error="Job did not finish",
+                payload=None,
+                finished_at=now,
+            )
+        )
+        while True:
+            job_id = session.exec(
+                select(Job.id).where(claimable).order_by(col(Job.id)).limit(1)
+            ).first()
+            if job_id is None:
+                session.commit()
+                return None
+            claimed = session.exec(
+                update(Job)
+                .where(col(Job.id) == job_id, claimable)
+                .values(status=JobStatus.running, started_at=now, attempts=col(Job.attempts) + 1)
+            ).rowcount
+            session.commit()
+            if claimed:
+                return job_id
+            # Another worker got it first
+
+
+def run_job(job_id: int) -> None:
+    with Session(engine) as session:
+        job = session.get(Job, job_id)
+        if job is None:
+            return
+        handler = JOB_HANDLERS.get(job.kind)
+        # Jobs run with the same tenant scope as the request that queued them
+        scope_session(session, job.tenant_id)
+        try:
+            if handler is None:
+                raise LookupError(f"Unknown job kind: {job.kind}")
+            result = handler(session, job.payload, job.created_by_id)
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, job.kind)
+            session.rollback()
+            job.status = JobStatus.failed
+            job.error = str(e) or type(e).__name__
+        else:
+            job.status = JobStatus.succeeded
+            job.result = result
+        job.payload = None
+        job.finished_at = datetime.now()
+        session.add(job)
+        session.commit()
+
+
+job_runner = JobRunner()
@@ -0,0 +1,156 @@
+"""
+Activity listing benchmark on the seeded dataset.
+
+    alembic upgrade head && python populate_db.py
+    python listing_benchmark.py [--repeat N]
+
+Uses the listings of the first seeded preventionist (by-creator) and
+supervisor (by-assignee), served in-process through TestClient, and prints:
+- the uncompressed size and median time of each response shape,
+- the serialization cost per row of FastAPI's response_model path (validate,
+  dump to Python, json.dumps) against the precompiled TypeAdapter,
+- the size and median CPU time of each gzip level and brotli quality on the
+  largest listing, the NDJSON export and the general stats.
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import time
+from typing import Callable
+
+# The benchmark requests far more than a client may
+os.environ.setdefault("RATE_LIMIT_DEFAULT", "1000000/second")
+os.environ.setdefault("RATE_LIMIT_STATS", "1000000/second")
+
+import brotli  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session, col, select  # noqa: E402
+
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+from models import Activity, Role, User  # noqa: E402
+from routers.activities import ACTIVITY_READ_OPTIONS  # noqa: E402
+from security import create_access_token  # noqa: E402
+from serialization import activity_read_list_adapter  # noqa: E402
+
+SHAPES = {
+    "full": {},
+    "fields=name,scheduled_date": {"fields": ["name", "scheduled_date"]},
+    "include=users": {"include": ["users"]},
+    "include=users,todos": {"include": ["users", "todos"]},
+}
+GZIP_LEVELS = (1, 4, 9)
+BROTLI_QUALITIES = (1, 4, 9)
+# Measure the responses themselves, not the compression middleware
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+def median_ms(function: Callable[[], object], repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1000
+
+
+def seeded_user(session: Session, role: Role) -> User:
+    user = session.exec(select(User).where(User.role == role).order_by(col(User.id))).first()
+    if user is None:
+        raise SystemExit("No seeded users; run `python populate_db.py` first")
+    return user
+
+
+def auth_headers(user: User) -> dict[str, str]:
+    token = create_access_token(data={"sub": user.username, "tid": user.tenant_id})
+    return {"Authorization": f"Bearer {token}", **IDENTITY}
+
+
+def response_model_path(rows: list[Activity]) -> bytes:
+    # What FastAPI does with response_model=List[ActivityRead] and ORM rows
+    validated = activity_read_list_adapter.validate_python(rows, from_attributes=True)
+    content = activity_read_list_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def type_adapter_path(rows: list[Activity]) -> bytes:
+    validated = activity_read_list_adapter.validate_python(rows, from_attributes=True)
+    return activity_read_list_adapter.dump_json(validated)
+
+
+def print_shapes(client: TestClient, listings: dict[str, dict], repeat: int) -> None:
+    print("Response shapes (uncompressed, median per request):")
+    for path, headers in listings.items():
+        for shape, params in SHAPES.items():
+            response = client.get(path, params=params, headers=headers)
+            elapsed = median_ms(lambda: client.get(path, params=params, headers=headers), repeat)
+            print(f"  {path:<30} {shape:<28} {len(response.content) / 1000:7.1f} KB {elapsed:7.1f} ms")
+
+
+def print_serializers(session: Session, conditions: dict[str, object], repeat: int) -> None:
+    print("\nSerialization of the full ActivityRead list (median per row):")
+    for name, condition in conditions.items():
+        rows = list(
+            session.exec(
+                select(Activity).options(*ACTIVITY_READ_OPTIONS).where(condition).order_by(col(Activity.id))
+            ).all()
+        )
+        assert json.loads(response_model_path(rows)) == json.loads(type_adapter_path(rows))
+        for label, serialize in (("response_model", response_model_path), ("TypeAdapter", type_adapter_path)):
+            elapsed = median_ms(lambda: serialize(rows), repeat)
+            print(f"  {name:<30} {label:<15} {len(rows):4} rows {elapsed * 1000 / len(rows):7.1f} us/row")
+
+
+def print_compression(bodies: dict[str, bytes], repeat: int) -> None:
+    print("\nCompression (size, share of the original, median CPU time):")
+    codecs: dict[str, Callable[[bytes], bytes]] = {}
+    for level in GZIP_LEVELS:
+        codecs[f"gzip-{level}"] = lambda body, level=level: gzip.compress(body, compresslevel=level)
+    for quality in BROTLI_QUALITIES:
+        codecs[f"br-{quality}"] = lambda body, quality=quality: brotli.compress(body, quality=quality)
+    for name, body in bodies.items():
+        print(f"  {name} ({len(body) / 1000:.1f} KB)")
+        for codec, compress in codecs.items():
+            size = len(compress(body))
+            elapsed = median_ms(lambda: compress(body), repeat)
+            print(f"    {codec:<8} {size / 1000:7.1f} KB {size / len(body):6.1%} {elapsed:7.2f} ms")
+
+
+def main(repeat: int) -> None:
+    client = TestClient(app)
+    with Session(engine) as session:
+        preventionist = seeded_user(session, Role.preventionist)
+        supervisor = seeded_user(session, Role.supervisor)
+        listings = {
+            f"/activities/by-creator/{preventionist.id}": auth_headers(preventionist),
+            f"/activities/by-assignee/{supervisor.id}": auth_headers(supervisor),
+        }
+        print_shapes(client, listings, repeat)
+        print_serializers(
+            session,
+            {
+                "by-creator": Activity.created_by_id == preventionist.id,
+                "by-assignee": Activity.assigned_to_id == supervisor.id,
+            },
+            repeat,
+        )
+        headers = auth_headers(preventionist)
+        print_compression(
+            {
+                "by-creator listing": client.get(next(iter(listings)), headers=headers).content,
+                "NDJSON export": client.get(
+                    "/exports/activities", params={"format": "ndjson"}, headers=headers
+                ).content,
+                "general stats": client.get("/activity/statuses_stats/general/detailed", headers=headers).content,
+            },
+            repeat,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=30, help="runs per measurement")
+    args = parser.parse_args()
+    main(args.repeat)
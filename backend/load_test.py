@@ -0,0 +1,95 @@
+"""
+Load test against a running server, to compare worker counts.
+
+    gunicorn main:app                      # e.g. WEB_CONCURRENCY=1, then 4
+    python load_test.py --url http://localhost:8000 --concurrency 32 --duration 20
+
+Each scenario (activity listing, general stats, login) is run for the given
+duration with `concurrency` clients, and the requests per second and latency
+percentiles are printed. Raise the RATE_LIMIT_* settings on the server first,
+or most requests are answered with 429.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+SCENARIOS = ("listing", "stats", "login")
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, request: dict, concurrency: int, duration: float
+) -> tuple[int, Counter, list[float]]:
+    statuses: Counter = Counter()
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.request(**request)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(latencies), statuses, sorted(latencies)
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+async def main(args: argparse.Namespace) -> None:
+    credentials = {"username": args.username, "password": args.password}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        token = await client.post("/auth/token", data=credentials)
+        token.raise_for_status()
+        headers = {"Authorization": f"Bearer {token.json()['access_token']}"}
+        user = await client.get("/users/me", headers=headers)
+        user.raise_for_status()
+
+        requests = {
+            "listing": {
+                "method": "GET",
+                "url": f"/activities/by-creator/{user.json()['id']}",
+                "headers": headers,
+            },
+            "stats": {
+                "method": "GET",
+                "url": "/activity/statuses_stats/general/detailed",
+                "headers": headers,
+            },
+            "login": {"method": "POST", "url": "/auth/token", "data": credentials},
+        }
+
+        print(f"{args.url}, {args.concurrency} clients, {args.duration:g}s per scenario")
+        for name in args.scenario or SCENARIOS:
+            count, statuses, latencies = await run_scenario(
+                client, requests[name], args.concurrency, args.duration
+            )
+            print(
+                f"  {name:8} {count / args.duration:8.1f} req/s"
+                f"  p50 {percentile(latencies, 0.5) * 1000:7.1f} ms"
+                f"  p95 {percentile(latencies, 0.95) * 1000:7.1f} ms"
+                f"  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms"
+                f"  {dict(statuses)}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS)
+    parser.add_argument("--username", default="prevencionista_0@example.com")
+    parser.add_argument("--password", default="pass")
+    asyncio.run(main(parser.parse_args()))
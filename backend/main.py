@@ -1,8 +1,13 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel
+from compression import CompressionMiddleware
 from database import engine
+from deadline_sweeper import deadline_sweeper
+from idempotency import IdempotencyMiddleware
+from jobs import job_runner
+from ratelimit import RateLimitMiddleware
+from schema_check import check_schema
 from routers import (
     users,
     activities,
@@ -11,18 +16,34 @@ from routers import (
     activity_templates,
     todos_template,
     activity_stats,
+    exports,
+    events,
+    sync,
+    jobs,
+    search,
 )
 
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    SQLModel.metadata.create_all(engine)
+    # Alembic owns the schema; only make sure it is up to date
+    check_schema(engine)
+    job_runner.start()
+    deadline_sweeper.start()
     yield
+    deadline_sweeper.stop()
+    job_runner.stop()
 
 
 app = FastAPI(lifespan=lifespan)
 
+# Innermost, so stored responses are replayed through CORS and compression
+app.add_middleware(IdempotencyMiddleware)  # type: ignore
+
+# Inside CORS so browsers can read the 429/503 responses
+app.add_middleware(RateLimitMiddleware)  # type: ignore
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,  # type: ignore
@@ -37,6 +58,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON listings and exports; thresholds and levels come from env vars
+app.add_middleware(CompressionMiddleware)  # type: ignore
+
 
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -45,6 +69,11 @@ app.include_router(todos.router)
 app.include_router(activity_templates.router)
 app.include_router(todos_template.router)
 app.include_router(activity_stats.router)
+app.include_router(exports.router)
+app.include_router(events.router)
+app.include_router(sync.router)
+app.include_router(jobs.router)
+app.include_router(search.router)
 
 
 
@@ -0,0 +1,120 @@
+"""
+Triggers keeping the full-text search index (see 38bd19fbd343) in sync with
+its source tables, for the migrations that create or change them.
+
+A source is (table, kind, body, parent_id, columns, indexed): rows are
+indexed under id * 4 + kind, with `body` and `parent_id` SQL over the row
+(written with a `{row}` placeholder). Updates of `columns` reindex the row,
+and rows for which `indexed` is false are left out of the index.
+
+Migrations changing a definition call recreate_search_triggers. SQLite
+drops a table's triggers when a batch migration rebuilds it (and refuses to
+rebuild a table other triggers read), so batches run inside
+search_triggers_kept instead of repeating the current definitions.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _is_sqlite() -> bool:
+    return op.get_bind().dialect.name == 'sqlite'
+
+
+def drop_search_triggers(table: str) -> None:
+    if _is_sqlite():
+        for action in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{action}")
+    else:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_index ON {table}")
+
+
+def create_search_triggers(
+    table: str, kind: int, body: str, parent_id: str, columns: str, indexed: str = "TRUE"
+) -> None:
+    if _is_sqlite():
+        values = (
+            f"new.id * 4 + {kind}, {body.format(row='new')}, {parent_id.format(row='new')}, "
+            f"new.tenant_id WHERE {indexed.format(row='new')}"
+        )
+        op.execute(
+            f"""CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO searchindex (rowid, body, parent_id, tenant_id) SELECT {values};
+            END"""
+        )
+        op.execute(
+            f"""CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                DELETE FROM searchindex WHERE rowid = old.id * 4 + {kind};
+                INSERT INTO searchindex (rowid, body, parent_id, tenant_id) SELECT {values};
+            END"""
+        )
+        op.execute(
+            f"""CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM searchindex WHERE rowid = old.id * 4 + {kind};
+            END"""
+        )
+        return
+
+    op.execute(
+        f"""CREATE OR REPLACE FUNCTION {table}_search_index() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM searchindex WHERE id = OLD.id * 4 + {kind};
+                RETURN OLD;
+            END IF;
+            IF NOT ({indexed.format(row='NEW')}) THEN
+                DELETE FROM searchindex WHERE id = NEW.id * 4 + {kind};
+                RETURN NEW;
+            END IF;
+            INSERT INTO searchindex (id, tenant_id, parent_id, body, document)
+            VALUES (
+                NEW.id * 4 + {kind},
+                NEW.tenant_id,
+                {parent_id.format(row='NEW')},
+                {body.format(row='NEW')},
+                to_tsvector('es_unaccent', {body.format(row='NEW')})
+            )
+            ON CONFLICT (id) DO UPDATE SET
+                tenant_id = EXCLUDED.tenant_id,
+                parent_id = EXCLUDED.parent_id,
+                body = EXCLUDED.body,
+                document = EXCLUDED.document;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql"""
+    )
+    op.execute(
+        f"""CREATE TRIGGER {table}_search_index
+        AFTER INSERT OR DELETE OR UPDATE OF {columns} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {table}_search_index()"""
+    )
+
+
+def recreate_search_triggers(*sources: tuple) -> None:
+    """Replace the triggers of the sources' tables with the given definitions"""
+    for table, *_ in sources:
+        drop_search_triggers(table)
+    for source in sources:
+        create_search_triggers(*source)
+
+
+@contextmanager
+def search_triggers_kept(*tables: str) -> Iterator[None]:
+    """Put back the tables' triggers, as they were, after the batches inside"""
+    if not _is_sqlite():
+        yield
+        return
+    names = [f"{table}_search_{action}" for table in tables for action in ('insert', 'update', 'delete')]
+    triggers = op.get_bind().execute(
+        sa.text("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN :names").bindparams(
+            sa.bindparam('names', expanding=True)
+        ),
+        {'names': names},
+    ).all()
+    for name, _ in triggers:
+        op.execute(f"DROP TRIGGER {name}")
+    yield
+    for _, sql in triggers:
+        op.execute(sql)
@@ -0,0 +1,93 @@
+"""add template versions
+
+Revision ID: 31eefd6f7090
+Revises: cc4e59a54068
+Create Date: 2026-10-19 00:35:12.478759
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.search_triggers import recreate_search_triggers, search_triggers_kept
+
+
+# revision identifiers, used by Alembic.
+revision: str = '31eefd6f7090'
+down_revision: Union[str, Sequence[str], None] = 'cc4e59a54068'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Search index triggers of templatetodoitem (see 38bd19fbd343): retired
+# template todos leave the index
+TEMPLATE_TODO_SOURCE = (
+    'templatetodoitem',
+    2,
+    "{row}.description",
+    "{row}.template_id",
+    "description, template_id, retired_in_version",
+    "{row}.retired_in_version IS NULL",
+)
+OLD_TEMPLATE_TODO_SOURCE = (
+    'templatetodoitem', 2, "{row}.description", "{row}.template_id", "description, template_id"
+)
+# Tables the batches below rebuild on SQLite, and todoitem, whose triggers read templatetodoitem
+TABLES = ('activity', 'activitytemplate', 'templatetodoitem', 'todoitem')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with search_triggers_kept(*TABLES):
+        with op.batch_alter_table('activity', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('template_id', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('template_version', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key(
+                'fk_activity_template_id_activitytemplate', 'activitytemplate', ['template_id'], ['id']
+            )
+
+        with op.batch_alter_table('activitytemplate', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+        with op.batch_alter_table('templatetodoitem', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('position', sa.Integer(), nullable=False, server_default='0'))
+            batch_op.add_column(sa.Column('added_in_version', sa.Integer(), nullable=False, server_default='1'))
+            batch_op.add_column(sa.Column('retired_in_version', sa.Integer(), nullable=True))
+    recreate_search_triggers(TEMPLATE_TODO_SOURCE)
+
+    # Existing items keep their insertion order, and every activity created from
+    # a template used its (only) version 1
+    op.execute("UPDATE templatetodoitem SET position = id")
+    op.execute(
+        """
+        UPDATE activity SET template_id = (
+            SELECT t.template_id FROM todoitem
+            JOIN templatetodoitem t ON t.id = todoitem.template_todo_id
+            WHERE todoitem.activity_id = activity.id
+            ORDER BY todoitem.id
+            LIMIT 1
+        )
+        """
+    )
+    op.execute("UPDATE activity SET template_version = 1 WHERE template_id IS NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Retired items would be back in their template; keep them for their todos only
+    op.execute("UPDATE templatetodoitem SET template_id = NULL WHERE retired_in_version IS NOT NULL")
+    recreate_search_triggers(OLD_TEMPLATE_TODO_SOURCE)
+    with search_triggers_kept(*TABLES):
+        with op.batch_alter_table('templatetodoitem', schema=None) as batch_op:
+            batch_op.drop_column('retired_in_version')
+            batch_op.drop_column('added_in_version')
+            batch_op.drop_column('position')
+
+        with op.batch_alter_table('activitytemplate', schema=None) as batch_op:
+            batch_op.drop_column('version')
+
+        with op.batch_alter_table('activity', schema=None) as batch_op:
+            batch_op.drop_constraint('fk_activity_template_id_activitytemplate', type_='foreignkey')
+            batch_op.drop_column('template_version')
+            batch_op.drop_column('template_id')
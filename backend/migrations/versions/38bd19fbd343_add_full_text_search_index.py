@@ -0,0 +1,88 @@
+"""add full text search index
+
+Revision ID: 38bd19fbd343
+Revises: c87847c8ca0a
+Create Date: 2026-10-19 00:27:24.033130
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations.search_triggers import create_search_triggers, drop_search_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = '38bd19fbd343'
+down_revision: Union[str, Sequence[str], None] = 'c87847c8ca0a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Searched tables: kind (see search.SEARCH_SOURCES), indexed text and parent
+# id as SQL over a row, and the columns whose updates reindex the row (see
+# migrations/search_triggers.py)
+SOURCES = (
+    ('activity', 0, "{row}.name", "NULL", "name"),
+    (
+        'activitytemplate',
+        1,
+        "{row}.name || coalesce(' ' || {row}.description, '')",
+        "NULL",
+        "name, description",
+    ),
+    ('templatetodoitem', 2, "{row}.description", "{row}.template_id", "description, template_id"),
+    ('todoitem', 3, "{row}.description", "{row}.activity_id", "description, activity_id"),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE searchindex USING fts5("
+            "body, parent_id UNINDEXED, tenant_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        for table, kind, body, parent_id, columns in SOURCES:
+            op.execute(
+                f"INSERT INTO searchindex (rowid, body, parent_id, tenant_id) "
+                f"SELECT id * 4 + {kind}, {body.format(row=table)}, "
+                f"{parent_id.format(row=table)}, tenant_id FROM {table}"
+            )
+            create_search_triggers(table, kind, body, parent_id, columns)
+        return
+
+    # Spanish stemming on accent-folded words
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish)")
+    op.execute(
+        "ALTER TEXT SEARCH CONFIGURATION es_unaccent "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem"
+    )
+    op.execute(
+        "CREATE TABLE searchindex ("
+        "id bigint PRIMARY KEY, tenant_id integer NOT NULL, parent_id integer, "
+        "body text NOT NULL, document tsvector NOT NULL)"
+    )
+    op.execute("CREATE INDEX ix_searchindex_document ON searchindex USING gin (document)")
+    for table, kind, body, parent_id, columns in SOURCES:
+        op.execute(
+            f"INSERT INTO searchindex (id, tenant_id, parent_id, body, document) "
+            f"SELECT id * 4 + {kind}, tenant_id, {parent_id.format(row=table)}, "
+            f"{body.format(row=table)}, to_tsvector('es_unaccent', {body.format(row=table)}) "
+            f"FROM {table}"
+        )
+        create_search_triggers(table, kind, body, parent_id, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    sqlite = op.get_bind().dialect.name == 'sqlite'
+    for table, *_ in SOURCES:
+        drop_search_triggers(table)
+        if not sqlite:
+            op.execute(f"DROP FUNCTION {table}_search_index()")
+    op.execute("DROP TABLE searchindex")
+    if not sqlite:
+        op.execute("DROP TEXT SEARCH CONFIGURATION es_unaccent")
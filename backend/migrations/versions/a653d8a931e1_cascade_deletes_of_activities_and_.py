@@ -0,0 +1,61 @@
+"""cascade deletes of activities and templates
+
+Revision ID: a653d8a931e1
+Revises: b9b22b0c8691
+Create Date: 2026-10-19 00:41:47.967800
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations.search_triggers import search_triggers_kept
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a653d8a931e1'
+down_revision: Union[str, Sequence[str], None] = 'b9b22b0c8691'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Names the unnamed foreign keys of the initial migration get when SQLite
+# batches reflect them
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+# (table, column, referred table, ON DELETE)
+FOREIGN_KEYS = (
+    ('todoitem', 'activity_id', 'activity', 'CASCADE'),
+    ('templatetodoitem', 'template_id', 'activitytemplate', 'CASCADE'),
+    ('activity', 'template_id', 'activitytemplate', 'SET NULL'),
+)
+
+# The todoitem search triggers read templatetodoitem, so all three keep theirs
+TABLES = tuple(table for table, *_ in FOREIGN_KEYS)
+
+
+def original_name(table: str, column: str, referred: str) -> str:
+    if table == 'activity' or op.get_bind().dialect.name == 'sqlite':
+        return f"fk_{table}_{column}_{referred}"
+    # PostgreSQL's name for the unnamed constraints
+    return f"{table}_{column}_fkey"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with search_triggers_kept(*TABLES):
+        for table, column, referred, ondelete in FOREIGN_KEYS:
+            with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+                batch_op.drop_constraint(original_name(table, column, referred), type_='foreignkey')
+                batch_op.create_foreign_key(
+                    f"fk_{table}_{column}_{referred}", referred, [column], ['id'], ondelete=ondelete
+                )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with search_triggers_kept(*TABLES):
+        for table, column, referred, _ in reversed(FOREIGN_KEYS):
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.drop_constraint(f"fk_{table}_{column}_{referred}", type_='foreignkey')
+                batch_op.create_foreign_key(original_name(table, column, referred), referred, [column], ['id'])
@@ -0,0 +1,70 @@
+"""pack activity todo statuses
+
+Revision ID: b9b22b0c8691
+Revises: 31eefd6f7090
+Create Date: 2026-10-19 00:42:10.318204
+
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.search_triggers import search_triggers_kept
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9b22b0c8691'
+down_revision: Union[str, Sequence[str], None] = '31eefd6f7090'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Two bits per todo, as in todo_bitmap
+STATUS_CODES = {'pending': 0, 'yes': 1, 'no': 2, 'not_apply': 3}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    empty = sa.text("X''") if bind.dialect.name == 'sqlite' else sa.text("''::bytea")
+    with search_triggers_kept('activity'), op.batch_alter_table('activity', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('todo_count', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('todo_statuses', sa.LargeBinary(), nullable=False, server_default=empty))
+
+    todoitem = sa.table('todoitem', sa.column('id'), sa.column('activity_id'), sa.column('status'))
+    activity = sa.table(
+        'activity', sa.column('id'), sa.column('todo_count'), sa.column('todo_statuses', sa.LargeBinary())
+    )
+    statuses = defaultdict(list)
+    for activity_id, status in bind.execute(
+        sa.select(todoitem.c.activity_id, todoitem.c.status)
+        .where(todoitem.c.activity_id.is_not(None))
+        .order_by(todoitem.c.activity_id, todoitem.c.id)
+    ):
+        statuses[activity_id].append(STATUS_CODES.get(status, 0))
+    rows = [
+        {
+            'activity_id': activity_id,
+            'count': len(codes),
+            'packed': sum(code << (index * 2) for index, code in enumerate(codes)).to_bytes(
+                (len(codes) * 2 + 7) // 8, 'little'
+            ),
+        }
+        for activity_id, codes in statuses.items()
+    ]
+    if rows:
+        bind.execute(
+            activity.update()
+            .where(activity.c.id == sa.bindparam('activity_id'))
+            .values(todo_count=sa.bindparam('count'), todo_statuses=sa.bindparam('packed')),
+            rows,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with search_triggers_kept('activity'), op.batch_alter_table('activity', schema=None) as batch_op:
+        batch_op.drop_column('todo_statuses')
+        batch_op.drop_column('todo_count')
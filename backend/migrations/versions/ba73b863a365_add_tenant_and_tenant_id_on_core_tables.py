@@ -0,0 +1,69 @@
+"""add tenant and tenant_id on core tables
+
+Revision ID: ba73b863a365
+Revises: 3d008b364702
+Create Date: 2026-10-19 00:19:36.448698
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ba73b863a365'
+down_revision: Union[str, Sequence[str], None] = '3d008b364702'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ['user', 'activity', 'todoitem', 'activitytemplate', 'templatetodoitem', 'job']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tenant',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Existing data becomes the first tenant (tenancy.DEFAULT_TENANT_ID)
+    op.execute(sa.text("INSERT INTO tenant (id, name, created_at) VALUES (1, 'Default', CURRENT_TIMESTAMP)"))
+
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('tenant_id', sa.Integer(), nullable=True))
+        op.execute(sa.text(f'UPDATE "{table}" SET tenant_id = 1'))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('tenant_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(f'fk_{table}_tenant_id_tenant', 'tenant', ['tenant_id'], ['id'])
+            if table == 'activity':
+                batch_op.drop_index(batch_op.f('ix_activity_assigned_to_id_scheduled_date_status'))
+                batch_op.create_index('ix_activity_tenant_id_assigned_to_id_scheduled_date_status', ['tenant_id', 'assigned_to_id', 'scheduled_date', 'status', 'deadline_status'], unique=False)
+            else:
+                batch_op.create_index(batch_op.f(f'ix_{table}_tenant_id'), ['tenant_id'], unique=False)
+            if table == 'user':
+                # Logins look users up by username across tenants
+                batch_op.drop_index(batch_op.f('ix_user_username'))
+                batch_op.create_index(batch_op.f('ix_user_username'), ['username'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_tenant_id_tenant', type_='foreignkey')
+            if table == 'activity':
+                batch_op.drop_index('ix_activity_tenant_id_assigned_to_id_scheduled_date_status')
+                batch_op.create_index(batch_op.f('ix_activity_assigned_to_id_scheduled_date_status'), ['assigned_to_id', 'scheduled_date', 'status', 'deadline_status'], unique=False)
+            else:
+                batch_op.drop_index(batch_op.f(f'ix_{table}_tenant_id'))
+            if table == 'user':
+                batch_op.drop_index(batch_op.f('ix_user_username'))
+                batch_op.create_index(batch_op.f('ix_user_username'), ['username'], unique=False)
+            batch_op.drop_column('tenant_id')
+
+    op.drop_table('tenant')
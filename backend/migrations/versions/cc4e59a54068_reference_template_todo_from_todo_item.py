@@ -0,0 +1,82 @@
+"""reference template todo from todo item
+
+Revision ID: cc4e59a54068
+Revises: 38bd19fbd343
+Create Date: 2026-10-19 00:31:02.119650
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.search_triggers import recreate_search_triggers
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc4e59a54068'
+down_revision: Union[str, Sequence[str], None] = '38bd19fbd343'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Search index triggers of todoitem (see 38bd19fbd343): the text now falls
+# back to the template todo, and the SQLite batch rebuild drops them anyway
+TODO_SOURCE = (
+    'todoitem',
+    3,
+    "coalesce({row}.description, (SELECT description FROM templatetodoitem WHERE id = {row}.template_todo_id))",
+    "{row}.activity_id",
+    "description, activity_id, template_todo_id",
+)
+OLD_TODO_SOURCE = ('todoitem', 3, "{row}.description", "{row}.activity_id", "description, activity_id")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('todoitem', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('template_todo_id', sa.Integer(), nullable=True))
+        batch_op.alter_column('description',
+               existing_type=sa.VARCHAR(),
+               nullable=True)
+        batch_op.create_index(batch_op.f('ix_todoitem_template_todo_id'), ['template_todo_id'], unique=False)
+        batch_op.create_foreign_key(
+            'fk_todoitem_template_todo_id_templatetodoitem', 'templatetodoitem', ['template_todo_id'], ['id']
+        )
+    recreate_search_triggers(TODO_SOURCE)
+
+    # Todos whose text matches a template todo of their company read it from there
+    op.execute(
+        """
+        UPDATE todoitem SET
+            template_todo_id = (
+                SELECT min(t.id) FROM templatetodoitem t
+                WHERE t.description = todoitem.description AND t.tenant_id = todoitem.tenant_id
+            ),
+            description = NULL
+        WHERE EXISTS (
+            SELECT 1 FROM templatetodoitem t
+            WHERE t.description = todoitem.description AND t.tenant_id = todoitem.tenant_id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        UPDATE todoitem SET description = coalesce(
+            (SELECT description FROM templatetodoitem WHERE id = todoitem.template_todo_id), ''
+        )
+        WHERE description IS NULL
+        """
+    )
+    with op.batch_alter_table('todoitem', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_todoitem_template_todo_id_templatetodoitem', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_todoitem_template_todo_id'))
+        batch_op.alter_column('description',
+               existing_type=sa.VARCHAR(),
+               nullable=False)
+        batch_op.drop_column('template_todo_id')
+    recreate_search_triggers(OLD_TODO_SOURCE)
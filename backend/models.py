@@ -1,8 +1,8 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 from datetime import datetime
 from sqlmodel import Field, Relationship, SQLModel
 from enum import Enum
-from sqlalchemy import Column, Enum as SAEnum
+from sqlalchemy import JSON, Column, Enum as SAEnum, Index, LargeBinary, UniqueConstraint
 
 
 class Role(str, Enum):
@@ -18,11 +18,55 @@ class TodoStatus(str, Enum):
     not_apply = "not_apply"
 
 
+class SyncEntity(str, Enum):
+    activity = "activity"
+    todo = "todo"
 
 
-class User(SQLModel, table=True):
+class ActivityStatus(str, Enum):
+    """Activity lifecycle, maintained by activity_lifecycle on every write"""
+    pending = "pending"
+    in_progress = "in_progress"
+    done = "done"
+    in_review = "in_review"
+    finished = "finished"
+
+
+class DeadlineStatus(str, Enum):
+    """How far past its scheduled date an activity is, kept by deadline_sweeper"""
+    upcoming = "upcoming"
+    overdue = "overdue"
+    missed = "missed"
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Tenant(SQLModel, table=True):
+    """A company; users, activities and templates belong to exactly one"""
     id: Optional[int] = Field(default=None, primary_key=True)
-    username: str = Field(index=True)
+    name: str
+    created_at: datetime = Field(default_factory=datetime.now)
+
+
+class TenantScoped(SQLModel):
+    """
+    Rows owned by a tenant. Sessions scoped with tenancy.scope_session only
+    see (and update or delete) the rows of their tenant, and stamp new rows
+    with it.
+    """
+    tenant_id: Optional[int] = Field(
+        default=None, foreign_key="tenant.id", index=True, nullable=False
+    )
+
+
+class User(TenantScoped, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    username: str = Field(unique=True, index=True)
     email: str = Field(unique=True, index=True)
     role: Role = Field(sa_column=Column(SAEnum(Role)))
     password_hash: str
@@ -64,8 +108,26 @@ class SupervisorAssignment(SQLModel, table=True):
     )
 
 
-class Activity(SQLModel, table=True):
+class Activity(TenantScoped, table=True):
+    __table_args__ = (
+        # Calendar and stats queries filter by assignee and scheduled date range;
+        # the status columns let the stats GROUP BYs run from the index alone.
+        # Led by the tenant, so each company's scans stay within its own slice.
+        Index(
+            "ix_activity_tenant_id_assigned_to_id_scheduled_date_status",
+            "tenant_id",
+            "assigned_to_id",
+            "scheduled_date",
+            "status",
+            "deadline_status",
+        ),
+        # The deadline sweeper only scans activities not yet in their final status
+        Index("ix_activity_deadline_status_scheduled_date", "deadline_status", "scheduled_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Indexed through the composite index above
+    tenant_id: Optional[int] = Field(default=None, foreign_key="tenant.id", nullable=False)
     name: str
     scheduled_date: Optional[datetime] = None
     finished_date: Optional[datetime] = None
@@ -81,30 +143,225 @@ class Activity(SQLModel, table=True):
         sa_relationship_kwargs={"foreign_keys": "[Activity.assigned_to_id]"},
     )
     in_review: bool = Field(default=False)
+    status: ActivityStatus = Field(
+        default=ActivityStatus.pending,
+        sa_column=Column(SAEnum(ActivityStatus), nullable=False),
+    )
+    deadline_status: DeadlineStatus = Field(
+        default=DeadlineStatus.upcoming,
+        sa_column=Column(SAEnum(DeadlineStatus), nullable=False),
+    )
+    updated_at: datetime = Field(
+        default_factory=datetime.now,
+        index=True,
+        sa_column_kwargs={"onupdate": datetime.now},
+    )
+    # Template (and version of it) the activity was created from
+    template_id: Optional[int] = Field(
+        default=None, foreign_key="activitytemplate.id", ondelete="SET NULL"
+    )
+    template_version: Optional[int] = None
+    # Statuses of the todos, two bits each (see todo_bitmap)
+    todo_count: int = 0
+    todo_statuses: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
 
-    todos: List["TodoItem"] = Relationship(back_populates="activity")
+    # Deleted with the activity by the database (ON DELETE CASCADE), without
+    # loading them; no delete-orphan, todos are created from their activity_id
+    todos: List["TodoItem"] = Relationship(
+        back_populates="activity",
+        passive_deletes=True,
+        sa_relationship_kwargs={"cascade": "save-update, merge, delete"},
+    )
 
 
-class TodoItem(SQLModel, table=True):
+class TodoItem(TenantScoped, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    description: str
+    # Only stored for todos added by hand or edited; the others read the text
+    # of their template todo (see schemas.TodoItemRead)
+    description: Optional[str] = None
     status: TodoStatus = Field(default=TodoStatus.pending, sa_column=Column(SAEnum(TodoStatus)))
+    updated_at: datetime = Field(
+        default_factory=datetime.now,
+        index=True,
+        sa_column_kwargs={"onupdate": datetime.now},
+    )
 
-    activity_id: Optional[int] = Field(default=None, foreign_key="activity.id")
+    activity_id: Optional[int] = Field(default=None, foreign_key="activity.id", ondelete="CASCADE")
     activity: Optional[Activity] = Relationship(back_populates="todos")
 
+    template_todo_id: Optional[int] = Field(
+        default=None, foreign_key="templatetodoitem.id", index=True
+    )
+    # Loaded with the todo, since it usually holds the todo's text
+    template_todo: Optional["TemplateTodoItem"] = Relationship(
+        sa_relationship_kwargs={"lazy": "joined"}
+    )
+
+
+class Tombstone(SQLModel, table=True):
+    """Record of a deleted (or reassigned away) row, reported by the delta sync"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: SyncEntity = Field(sa_column=Column(SAEnum(SyncEntity), nullable=False))
+    entity_id: int
+    activity_id: Optional[int] = None
+    assigned_to_id: Optional[int] = Field(default=None, index=True)
+    created_by_id: Optional[int] = Field(default=None, index=True)
+    deleted_at: datetime = Field(default_factory=datetime.now, index=True)
+
+
+class Job(TenantScoped, table=True):
+    """Background job, claimed and run by the worker threads in jobs.py"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    status: JobStatus = Field(
+        default=JobStatus.queued,
+        sa_column=Column(SAEnum(JobStatus), nullable=False, index=True),
+    )
+    # Dropped once the job finishes (imports carry plain-text passwords)
+    payload: Optional[Any] = Field(default=None, sa_column=Column(JSON))
+    result: Optional[Any] = Field(default=None, sa_column=Column(JSON))
+    error: Optional[str] = None
+    attempts: int = 0
+    created_by_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    created_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """Response to a write request, replayed when the client retries it with the same key"""
+    __table_args__ = (UniqueConstraint("owner", "key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    owner: str
+    key: str
+    request_hash: str
+    # Unset while the first request is still being handled
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    created_at: datetime = Field(default_factory=datetime.now)
+    expires_at: datetime = Field(index=True)
+
+
+class ChangeEventLog(SQLModel, table=True):
+    """Change event relayed between server processes, see pubsub.DatabaseBroker"""
+    # Ids must not be reused once old events are deleted
+    __table_args__ = {"sqlite_autoincrement": True}
 
-class ActivityTemplate(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Space-separated
+    topics: str
+    event: str
+    created_at: datetime = Field(default_factory=datetime.now, index=True)
+
+
+class RateLimitBucket(SQLModel, table=True):
+    """Token bucket shared between server processes, see ratelimit.DatabaseBackend"""
+    key: str = Field(primary_key=True)
+    tokens: float
+    # Unix timestamps
+    updated: float
+    full_at: float = Field(index=True)
+
+
+class CacheVersion(SQLModel, table=True):
+    """Bumped by every change to a cached table, so each process knows when to drop its cache"""
+    name: str = Field(primary_key=True)
+    version: int = 0
+
+
+class ActivityTemplate(TenantScoped, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     description: Optional[str] = None
+    # Version new activities are created from; see template_versions
+    version: int = 1
+
+    # Items of the current version, in order (written through template_versions)
+    template_todos: List["TemplateTodoItem"] = Relationship(
+        sa_relationship_kwargs={
+            "primaryjoin": "and_(ActivityTemplate.id == TemplateTodoItem.template_id, "
+            "TemplateTodoItem.retired_in_version == None)",
+            "order_by": "[TemplateTodoItem.position, TemplateTodoItem.id]",
+            "viewonly": True,
+        }
+    )
+
+
+class TemplateTodoItem(TenantScoped, table=True):
+    """
+    Item of the template versions from added_in_version up to (excluding)
+    retired_in_version. Items used by activities are never changed: an edit
+    retires them and adds a copy.
+    """
+    id: Optional[int] = Field(default=None, primary_key=True)
+    description: str
+    position: int = 0
+    added_in_version: int = 1
+    retired_in_version: Optional[int] = None
 
-    template_todos: List["TemplateTodoItem"] = Relationship(back_populates="template")
+    template_id: Optional[int] = Field(
+        default=None, foreign_key="activitytemplate.id", ondelete="CASCADE"
+    )
+    template: Optional[ActivityTemplate] = Relationship()
 
 
-class TemplateTodoItem(SQLModel, table=True):
+class ActivityArchive(TenantScoped, table=True):
+    """Finished activity moved out of `activity` by archive.py, keeping its id"""
+    __table_args__ = (
+        Index(
+            "ix_activityarchive_tenant_id_assigned_to_id_scheduled_date",
+            "tenant_id",
+            "assigned_to_id",
+            "scheduled_date",
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Indexed through the composite index above
+    tenant_id: Optional[int] = Field(default=None, foreign_key="tenant.id", nullable=False)
+    name: str
+    scheduled_date: Optional[datetime] = None
+    finished_date: Optional[datetime] = None
+    created_by_id: Optional[int] = Field(default=None, foreign_key="user.id", index=True)
+    assigned_to_id: int = Field(foreign_key="user.id")
+    in_review: bool = False
+    status: ActivityStatus = Field(sa_column=Column(SAEnum(ActivityStatus), nullable=False))
+    deadline_status: DeadlineStatus = Field(
+        sa_column=Column(SAEnum(DeadlineStatus), nullable=False)
+    )
+    updated_at: datetime
+    archived_at: datetime = Field(default_factory=datetime.now)
+
+
+class TodoItemArchive(TenantScoped, table=True):
+    """Todo of an archived activity, keeping its id"""
     id: Optional[int] = Field(default=None, primary_key=True)
     description: str
+    status: TodoStatus = Field(sa_column=Column(SAEnum(TodoStatus)))
+    updated_at: datetime
+    activity_id: int = Field(foreign_key="activityarchive.id", index=True)
 
-    template_id: Optional[int] = Field(default=None, foreign_key="activitytemplate.id")
-    template: Optional[ActivityTemplate] = Relationship(back_populates="template_todos")
+
+class ActivityRollup(TenantScoped, table=True):
+    """
+    Monthly counts of a supervisor's archived activities, by scheduled month,
+    split the same way as the live stats. Written by archive.py before the
+    activities leave the hot tables.
+    """
+    __table_args__ = (UniqueConstraint("tenant_id", "assigned_to_id", "month"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # Indexed through the unique constraint above
+    tenant_id: Optional[int] = Field(default=None, foreign_key="tenant.id", nullable=False)
+    assigned_to_id: int = Field(foreign_key="user.id")
+    # First day of the month
+    month: datetime
+    activities: int = 0
+    done: int = 0
+    missed: int = 0
+    completed_on_time: int = 0
+    completed_late: int = 0
+    todos: int = 0
+    completed_todos: int = 0
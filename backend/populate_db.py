@@ -8,12 +8,22 @@ from models import (
     Role,
     SupervisorAssignment,
     Activity,
+    ActivityStatus,
     TodoItem,
     ActivityTemplate,
     TemplateTodoItem,
     TodoStatus,
+    Tombstone,
+    Job,
+    IdempotencyKey,
+    Tenant,
+    ActivityArchive,
+    TodoItemArchive,
+    ActivityRollup,
 )
 from security import get_password_hash
+from tenancy import DEFAULT_TENANT_ID
+from todo_bitmap import pack_statuses
 
 # Listas de nombres y apellidos en español
 NOMBRES = [
@@ -49,12 +59,21 @@ def generar_nombre_completo() -> str:
 
 def clear_db(session: Session):
     print("Clearing existing data...")
+    session.exec(delete(Tombstone))
+    session.exec(delete(Job))
+    session.exec(delete(IdempotencyKey))
+    session.exec(delete(TodoItemArchive))
+    session.exec(delete(ActivityArchive))
+    session.exec(delete(ActivityRollup))
     session.exec(delete(TodoItem))
     session.exec(delete(Activity))
     session.exec(delete(SupervisorAssignment))
     session.exec(delete(User))
     session.exec(delete(TemplateTodoItem))
     session.exec(delete(ActivityTemplate))
+    session.exec(delete(Tenant))
+    # Everything below is created in the default tenant
+    session.add(Tenant(id=DEFAULT_TENANT_ID, name="Default"))
     session.commit()
 
 
@@ -293,9 +312,9 @@ def populate_activity_templates(session: Session):
         session.commit()
         session.refresh(template)
 
-        for todo_desc in act_data["todos"]:
+        for position, todo_desc in enumerate(act_data["todos"], start=1):
             todo_template = TemplateTodoItem(
-                description=todo_desc, template_id=template.id
+                description=todo_desc, template_id=template.id, position=position
             )
             session.add(todo_template)
     session.commit()
@@ -395,13 +414,20 @@ def populate():
 
                 # Decide if activity is completed (in_review) or not
                 is_completed = random.random() < 0.8
+                status = TodoStatus.yes if is_completed else TodoStatus.pending
+                todo_statuses = [status] * len(template.template_todos)
 
                 activity = Activity(
                     name=template.name,
                     scheduled_date=scheduled_date,
                     assigned_to_id=supervisor.id,
                     created_by_id=prev.id,
+                    template_id=template.id,
+                    template_version=template.version,
                     in_review=is_completed,
+                    status=ActivityStatus.in_review if is_completed else ActivityStatus.pending,
+                    todo_count=len(todo_statuses),
+                    todo_statuses=pack_statuses(todo_statuses),
                 )
                 session.add(activity)
                 session.commit()
@@ -409,9 +435,8 @@ def populate():
 
                 # Create Todos for this Activity from the template
                 for todo_template in template.template_todos:
-                    status = TodoStatus.yes if is_completed else TodoStatus.pending
                     todo = TodoItem(
-                        description=todo_template.description,
+                        template_todo_id=todo_template.id,
                         status=status,
                         activity_id=activity.id,
                     )
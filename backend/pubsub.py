@@ -0,0 +1,216 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Iterable, Optional, Protocol
+from sqlalchemy import Engine, delete, func, text
+from sqlmodel import Session, col, select
+from database import WEB_CONCURRENCY, engine
+from models import Activity, ChangeEventLog
+from schemas import ChangeEvent, ChangeEventType
+
+# Events buffered per subscriber before it is considered too slow. A subscriber
+# that overflows gets a single `resync` event and should refetch everything.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# With several worker processes: seconds between polls of the shared event
+# log, and how long events stay in it
+CHANGE_EVENT_POLL_INTERVAL = float(os.getenv("CHANGE_EVENT_POLL_INTERVAL", "1"))
+CHANGE_EVENT_RETENTION = float(os.getenv("CHANGE_EVENT_RETENTION", "300"))
+
+
+def supervisor_topic(supervisor_id: int) -> str:
+    return f"supervisor:{supervisor_id}"
+
+
+def preventionist_topic(preventionist_id: int) -> str:
+    return f"preventionist:{preventionist_id}"
+
+
+class Broker(Protocol):
+    """
+    Fan-out of change events to subscribed dashboards.
+    `publish` must be safe to call from request handler threads.
+    """
+
+    def publish(self, topics: Iterable[str], event: ChangeEvent) -> None: ...
+
+    def subscribe(self, topics: Iterable[str]) -> AsyncIterator[ChangeEvent]: ...
+
+
+class _Subscriber:
+    def __init__(self, topics: set[str], loop: asyncio.AbstractEventLoop) -> None:
+        self.topics = topics
+        self.loop = loop
+        self.queue: asyncio.Queue[ChangeEvent] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event: ChangeEvent) -> None:
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        if self.queue.full():
+            self.overflowed = True
+            return
+        self.queue.put_nowait(event)
+
+    async def next_event(self) -> ChangeEvent:
+        if self.overflowed and self.queue.empty():
+            self.overflowed = False
+            return ChangeEvent(type=ChangeEventType.resync)
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """
+    Broker for a single process. Each subscriber gets its own bounded queue on
+    its event loop; publishers hand events over with call_soon_threadsafe.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[_Subscriber]] = {}
+
+    def publish(self, topics: Iterable[str], event: ChangeEvent) -> None:
+        with self._lock:
+            targets = {
+                subscriber
+                for topic in topics
+                for subscriber in self._subscribers.get(topic, ())
+            }
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Event loop already closed; the subscriber is going away
+                pass
+
+    async def subscribe(self, topics: Iterable[str]) -> AsyncIterator[ChangeEvent]:
+        subscriber = _Subscriber(set(topics), asyncio.get_running_loop())
+        with self._lock:
+            for topic in subscriber.topics:
+                self._subscribers.setdefault(topic, set()).add(subscriber)
+        try:
+            while True:
+                yield await subscriber.next_event()
+        finally:
+            with self._lock:
+                for topic in subscriber.topics:
+                    topic_subscribers = self._subscribers.get(topic)
+                    if topic_subscribers is not None:
+                        topic_subscribers.discard(subscriber)
+                        if not topic_subscribers:
+                            del self._subscribers[topic]
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+
+class DatabaseBroker:
+    """
+    Broker shared by several processes through the changeeventlog table.
+    Publishing inserts the event; while a process has subscribers it polls
+    the events added since its last poll and hands them to its own
+    InProcessBroker, so every dashboard sees the changes made by any process.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        poll_interval: float = CHANGE_EVENT_POLL_INTERVAL,
+        retention: float = CHANGE_EVENT_RETENTION,
+    ) -> None:
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.local = InProcessBroker()
+        self._poller: Optional[asyncio.Task] = None
+
+    def publish(self, topics: Iterable[str], event: ChangeEvent) -> None:
+        topics = sorted(set(topics))
+        if not topics:
+            return
+        with Session(self.engine) as session:
+            if self.engine.dialect.name == "postgresql":
+                # Publishers commit in id order, so pollers never skip a
+                # lower id that was still uncommitted
+                session.execute(text("SELECT pg_advisory_xact_lock(hashtext('changeeventlog'))"))
+            session.add(ChangeEventLog(topics=" ".join(topics), event=event.model_dump_json()))
+            # Publishing is the only write to the log, so it also expires it
+            session.execute(
+                delete(ChangeEventLog).where(
+                    col(ChangeEventLog.created_at) < datetime.now() - timedelta(seconds=self.retention)
+                )
+            )
+            session.commit()
+
+    async def subscribe(self, topics: Iterable[str]) -> AsyncIterator[ChangeEvent]:
+        events = self.local.subscribe(topics)
+        loop = asyncio.get_running_loop()
+        if self._poller is None or self._poller.done() or self._poller.get_loop() is not loop:
+            self._poller = loop.create_task(self._poll())
+        try:
+            async for event in events:
+                yield event
+        finally:
+            await events.aclose()
+
+    async def _poll(self) -> None:
+        last_id = await asyncio.to_thread(self._last_id)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            # The subscriptions and this check share the event loop, so no
+            # subscriber can be left without a poller
+            if not self.local.has_subscribers():
+                return
+            for record in await asyncio.to_thread(self._events_after, last_id):
+                last_id = record.id
+                self.local.publish(
+                    record.topics.split(), ChangeEvent.model_validate_json(record.event)
+                )
+
+    def _last_id(self) -> int:
+        with Session(self.engine) as session:
+            return session.exec(select(func.max(ChangeEventLog.id))).one() or 0
+
+    def _events_after(self, last_id: int) -> list[ChangeEventLog]:
+        with Session(self.engine, expire_on_commit=False) as session:
+            return list(
+                session.exec(
+                    select(ChangeEventLog)
+                    .where(col(ChangeEventLog.id) > last_id)
+                    .order_by(col(ChangeEventLog.id))
+                ).all()
+            )
+
+
+# Worker processes share their events through the database
+broker: Broker = DatabaseBroker(engine) if WEB_CONCURRENCY > 1 else InProcessBroker()
+
+
+def publish_change(
+    event: ChangeEvent, notify_supervisor_ids: Iterable[Optional[int]] = ()
+) -> None:
+    """
+    Publish a change to the supervisor and preventionist it concerns, plus any
+    extra supervisors (e.g. the previous assignee). Call it after commit.
+    """
+    topics = {supervisor_topic(i) for i in notify_supervisor_ids if i is not None}
+    if event.supervisor_id is not None:
+        topics.add(supervisor_topic(event.supervisor_id))
+    if event.preventionist_id is not None:
+        topics.add(preventionist_topic(event.preventionist_id))
+    broker.publish(topics, event)
+
+
+def activity_change(
+    event_type: ChangeEventType, activity: Activity, todo_id: Optional[int] = None
+) -> ChangeEvent:
+    return ChangeEvent(
+        type=event_type,
+        activity_id=activity.id,
+        todo_id=todo_id,
+        supervisor_id=activity.assigned_to_id,
+        preventionist_id=activity.created_by_id,
+    )
@@ -0,0 +1,222 @@
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Protocol
+from sqlalchemy import Engine, case, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from database import WEB_CONCURRENCY, engine
+from models import RateLimitBucket
+from security import token_subject
+
+# Requests a worker process handles at once before new ones are shed with a
+# 503. Past this point extra requests only queue for its threadpool and time
+# out anyway, so unlike the rate limits this is counted per process.
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "64"))
+LOAD_SHED_RETRY_AFTER = int(os.getenv("LOAD_SHED_RETRY_AFTER", "2"))
+
+# Header carrying the real client address when running behind a proxy
+# (Fly-Client-IP on fly.io); without it the socket peer address is used
+CLIENT_IP_HEADER = os.getenv("RATE_LIMIT_CLIENT_IP_HEADER", "")
+
+# Long-lived connections are neither rate limited nor counted as in flight
+EXEMPT_PATHS = {"/events/stream"}
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True)
+class Limit:
+    """Token bucket: `burst` requests at once, refilled at `rate` per second"""
+    rate: float
+    burst: int
+
+    @classmethod
+    def parse(cls, value: str) -> "Limit":
+        """Parse "<requests>/<second|minute|hour>[ burst <n>]", e.g. "30/minute burst 10"."""
+        spec, _, burst = value.partition(" burst ")
+        count, _, period = spec.strip().partition("/")
+        rate = int(count) / _PERIODS[period.strip()]
+        return cls(rate=rate, burst=int(burst) if burst else int(count))
+
+
+class RateLimitBackend(Protocol):
+    """
+    Token bucket storage. `take` removes a token from the bucket and returns 0,
+    or returns the seconds until a token is available. Backends doing I/O set
+    `blocking`, so the middleware calls them from the threadpool.
+    """
+
+    blocking: bool
+
+    def take(self, key: str, limit: Limit) -> float: ...
+
+
+class InMemoryBackend:
+    """Buckets for a single process, dropped once they refill completely."""
+
+    blocking = False
+
+    def __init__(self, max_buckets: int = 10_000) -> None:
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        # key -> (tokens, last update, time at which the bucket is full again)
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated, _ = self._buckets.get(key, (limit.burst, now, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0
+            if tokens < 1:
+                wait = (1 - tokens) / limit.rate
+            else:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + (limit.burst - tokens) / limit.rate)
+            if len(self._buckets) > self.max_buckets:
+                # Full buckets hold no information
+                self._buckets = {
+                    key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+                }
+            return wait
+
+
+class DatabaseBackend:
+    """
+    Buckets in the ratelimitbucket table, shared by every server process.
+    Each take is one INSERT ... ON CONFLICT DO UPDATE that only updates the
+    bucket (and returns it) when it has a token, so concurrent processes
+    cannot both spend the last one. Full buckets are deleted now and then.
+    """
+
+    blocking = True
+
+    def __init__(self, engine: Engine, prune_interval: float = 60) -> None:
+        self.engine = engine
+        self.prune_interval = prune_interval
+        self._next_prune = 0.0
+        self._insert = postgresql.insert if engine.dialect.name == "postgresql" else sqlite.insert
+
+    def take(self, key: str, limit: Limit) -> float:
+        now = time.time()
+        bucket = RateLimitBucket.__table__.c  # type: ignore
+        refilled = bucket.tokens + (now - bucket.updated) * limit.rate
+        refilled = case((refilled > limit.burst, limit.burst), else_=refilled)
+        statement = self._insert(RateLimitBucket).values(
+            key=key, tokens=limit.burst - 1, updated=now, full_at=now + 1 / limit.rate
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[bucket.key],
+            set_={
+                "tokens": refilled - 1,
+                "updated": now,
+                "full_at": now + (limit.burst - refilled + 1) / limit.rate,
+            },
+            where=refilled >= 1,
+        ).returning(bucket.key)
+        with self.engine.begin() as connection:
+            taken = connection.execute(statement).first() is not None
+            if not taken:
+                tokens, updated = connection.execute(
+                    select(bucket.tokens, bucket.updated).where(bucket.key == key)
+                ).one()
+            if now >= self._next_prune:
+                self._next_prune = now + self.prune_interval
+                connection.execute(delete(RateLimitBucket).where(bucket.full_at < now))
+        if taken:
+            return 0.0
+        return (1 - min(limit.burst, tokens + (now - updated) * limit.rate)) / limit.rate
+
+
+# Budgets per client; the first matching rule applies
+LOGIN_LIMIT = Limit.parse(os.getenv("RATE_LIMIT_LOGIN", "10/minute burst 5"))
+STATS_LIMIT = Limit.parse(os.getenv("RATE_LIMIT_STATS", "30/minute burst 10"))
+DEFAULT_LIMIT = Limit.parse(os.getenv("RATE_LIMIT_DEFAULT", "600/minute burst 100"))
+
+
+def limit_for(method: str, path: str) -> tuple[str, Limit]:
+    if method == "POST" and path == "/auth/token":
+        return "login", LOGIN_LIMIT
+    if path.startswith("/activity/statuses_stats"):
+        return "stats", STATS_LIMIT
+    return "default", DEFAULT_LIMIT
+
+
+def client_key(headers: Headers, scope: Scope) -> str:
+    """Authenticated users by username, everyone else by address"""
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        subject = token_subject(token)
+        if subject is not None:
+            return "user:" + subject
+    address = headers.get(CLIENT_IP_HEADER) if CLIENT_IP_HEADER else None
+    if not address:
+        client = scope.get("client")
+        address = client[0] if client else ""
+    return "ip:" + address
+
+
+class RateLimitMiddleware:
+    """
+    Token-bucket rate limiting per client with separate budgets for login and
+    stats (429 + Retry-After), and load shedding once too many requests are
+    in flight (503 + Retry-After).
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: Optional[RateLimitBackend] = None,
+        max_in_flight: int = MAX_IN_FLIGHT_REQUESTS,
+    ) -> None:
+        self.app = app
+        # Worker processes share their buckets through the database
+        self.backend = backend or (DatabaseBackend(engine) if WEB_CONCURRENCY > 1 else InMemoryBackend())
+        self.max_in_flight = max_in_flight
+        # Only touched from the event loop, so no lock is needed
+        self.in_flight = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if self.in_flight >= self.max_in_flight:
+            response = JSONResponse(
+                {"detail": "Server is busy, try again shortly"},
+                status_code=503,
+                headers={"Retry-After": str(LOAD_SHED_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        name, limit = limit_for(scope["method"], scope["path"])
+        key = f"{name}:{client_key(Headers(scope=scope), scope)}"
+        if self.backend.blocking:
+            wait = await run_in_threadpool(self.backend.take, key, limit)
+        else:
+            wait = self.backend.take(key, limit)
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
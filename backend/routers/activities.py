@@ -1,18 +1,66 @@
-from typing import List, Annotated
+from datetime import date, datetime
+from typing import List, Annotated, Optional, Union, cast
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, select
+from archive import ARCHIVE_AFTER_MONTHS
 from database import get_session
-from models import Activity, User, ActivityTemplate, TodoItem, TodoStatus
+from jobs import enqueue_job
+from models import (
+    Activity,
+    ActivityStatus,
+    User,
+    ActivityTemplate,
+    DeadlineStatus,
+    Role,
+    SyncEntity,
+    TodoItem,
+    Tombstone,
+)
+from activity_lifecycle import refresh_activity_statuses
+from pubsub import activity_change, publish_change
 from schemas import (
+    ActivityBulkDelete,
+    ActivityCalendarDay,
+    ActivityCalendarRow,
+    ActivityCollection,
+    ActivityCompact,
     ActivityCreate,
+    ActivityField,
+    ActivityInclude,
+    ActivityIncluded,
     ActivityRead,
     ActivityUpdate,
     ActivityWithSupervisors,
+    ChangeEventType,
+    JobRead,
+    TodoItemRead,
     UserRead,
 )
-from routers.auth import get_current_user
+from routers.auth import get_current_preventionist, get_current_user
+from template_versions import instantiate_template
+from todo_bitmap import answered_count
+from serialization import (
+    activity_collection_adapter,
+    activity_read_list_adapter,
+    json_response,
+)
 
-router = APIRouter(prefix="/activities", tags=["activities"])
+# Anonymous requests see no tenant's rows anyway; refuse them outright
+router = APIRouter(
+    prefix="/activities",
+    tags=["activities"],
+    dependencies=[Depends(get_current_user)],
+)
+
+# Eager-load everything ActivityRead serializes, so listing N activities costs
+# a few queries instead of 3 lazy loads per activity.
+ACTIVITY_READ_OPTIONS = (
+    selectinload(Activity.created_by),  # type: ignore
+    selectinload(Activity.assigned_to),  # type: ignore
+    selectinload(Activity.todos),  # type: ignore
+)
 
 
 @router.post("/", response_model=ActivityRead, status_code=201)
@@ -36,58 +84,242 @@ def create_activity(
             raise HTTPException(status_code=404, detail="Activity Template not found")
 
         db_activity.name = template.name
-
-        for template_todo in template.template_todos:
-            todo_item = TodoItem(
-                description=template_todo.description,
-                status=TodoStatus.pending,
-                activity=db_activity,
-            )
-            session.add(todo_item)
+        instantiate_template(session, db_activity, template)
 
     session.add(db_activity)
+    refresh_activity_statuses(session, [db_activity], created=True)
     session.commit()
     session.refresh(db_activity)
 
     # Refresh relationships to ensure they are loaded in the response
     session.refresh(db_activity, attribute_names=["created_by", "assigned_to", "todos"])
 
+    publish_change(activity_change(ChangeEventType.activity_created, db_activity))
     return db_activity
 
 
-@router.get("/", response_model=List[ActivityRead])
+ActivityListing = Union[List[ActivityRead], ActivityCollection]
+
+
+def status_conditions(
+    status: Optional[ActivityStatus], deadline_status: Optional[DeadlineStatus]
+) -> list:
+    conditions = []
+    if status is not None:
+        conditions.append(Activity.status == status)
+    if deadline_status is not None:
+        conditions.append(Activity.deadline_status == deadline_status)
+    return conditions
+
+
+def read_activity_collection(
+    session: Session,
+    conditions: list,
+    fields: Optional[List[ActivityField]],
+    include: Optional[List[ActivityInclude]],
+    offset: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> ActivityCollection:
+    """
+    Build a normalized activity listing.
+    Only the requested columns are selected. Users are fetched with a single
+    query and sideloaded in `included.users`, and todos are fetched with a
+    single query for all the listed activities instead of one per activity.
+    """
+    selected = fields or list(ActivityField)
+    includes = set(include or [])
+
+    ids_query = (
+        select(Activity.id)
+        .where(*conditions)
+        .order_by(col(Activity.id))
+        .offset(offset)
+        .limit(limit)
+    )
+    rows = session.exec(
+        select(
+            Activity.id,
+            Activity.created_by_id,
+            Activity.assigned_to_id,
+            *(getattr(Activity, field.value) for field in selected),
+        )
+        .where(col(Activity.id).in_(ids_query))
+        .order_by(col(Activity.id))
+    ).all()
+
+    todos_by_activity: dict[int, list[TodoItemRead]] = {}
+    if ActivityInclude.todos in includes:
+        todos = session.exec(
+            select(TodoItem)
+            .where(col(TodoItem.activity_id).in_(ids_query))
+            .order_by(col(TodoItem.id))
+        ).all()
+        for todo in todos:
+            todos_by_activity.setdefault(cast(int, todo.activity_id), []).append(
+                TodoItemRead.model_validate(todo)
+            )
+
+    data: list[ActivityCompact] = []
+    user_ids: set[int] = set()
+    for row in rows:
+        activity_id, created_by_id, assigned_to_id, *values = row
+        activity_data = {field.value: value for field, value in zip(selected, values)}
+        if ActivityInclude.todos in includes:
+            activity_data["todos"] = todos_by_activity.get(activity_id, [])
+        data.append(ActivityCompact(id=activity_id, **activity_data))
+        user_ids.update(i for i in (created_by_id, assigned_to_id) if i is not None)
+
+    included = ActivityIncluded()
+    if ActivityInclude.users in includes and user_ids:
+        users = session.exec(select(User).where(col(User.id).in_(user_ids))).all()
+        included.users = {cast(int, user.id): UserRead.model_validate(user) for user in users}
+
+    return ActivityCollection(data=data, included=included)
+
+
+@router.get("/", response_model=ActivityListing, response_model_exclude_unset=True)
 def read_activities(
     *,
     session: Session = Depends(get_session),
     offset: int = 0,
     limit: int = Query(default=100, le=100),
+    fields: Annotated[Optional[List[ActivityField]], Query()] = None,
+    include: Annotated[Optional[List[ActivityInclude]], Query()] = None,
+    status: Optional[ActivityStatus] = None,
+    deadline_status: Optional[DeadlineStatus] = None,
 ):
-    activities = session.exec(select(Activity).offset(offset).limit(limit)).all()
-    return activities
+    """
+    List activities. When `fields` or `include` is given the response uses
+    the normalized `ActivityCollection` shape, otherwise the full
+    `ActivityRead` list is returned.
+    """
+    conditions = status_conditions(status, deadline_status)
+    if fields is not None or include is not None:
+        return json_response(
+            activity_collection_adapter,
+            read_activity_collection(session, conditions, fields, include, offset, limit),
+            exclude_unset=True,
+        )
 
+    activities = session.exec(
+        select(Activity)
+        .options(*ACTIVITY_READ_OPTIONS)
+        .where(*conditions)
+        .order_by(col(Activity.id))
+        .offset(offset)
+        .limit(limit)
+    ).all()
+    return json_response(activity_read_list_adapter, activities)
 
-@router.get("/by-creator/{creator_id}", response_model=List[ActivityRead])
+
+@router.get(
+    "/by-creator/{creator_id}", response_model=ActivityListing, response_model_exclude_unset=True
+)
 def read_activities_by_creator(
     *,
     session: Session = Depends(get_session),
     creator_id: int,
+    fields: Annotated[Optional[List[ActivityField]], Query()] = None,
+    include: Annotated[Optional[List[ActivityInclude]], Query()] = None,
+    status: Optional[ActivityStatus] = None,
+    deadline_status: Optional[DeadlineStatus] = None,
 ):
+    conditions = [Activity.created_by_id == creator_id, *status_conditions(status, deadline_status)]
+    if fields is not None or include is not None:
+        return json_response(
+            activity_collection_adapter,
+            read_activity_collection(session, conditions, fields, include),
+            exclude_unset=True,
+        )
+
     activities = session.exec(
-        select(Activity).where(Activity.created_by_id == creator_id)
+        select(Activity)
+        .options(*ACTIVITY_READ_OPTIONS)
+        .where(*conditions)
+        .order_by(col(Activity.id))
     ).all()
-    return activities
+    return json_response(activity_read_list_adapter, activities)
 
 
-@router.get("/by-assignee/{assignee_id}", response_model=List[ActivityRead])
+@router.get(
+    "/by-assignee/{assignee_id}", response_model=ActivityListing, response_model_exclude_unset=True
+)
 def read_activities_by_assignee(
     *,
     session: Session = Depends(get_session),
     assignee_id: int,
+    fields: Annotated[Optional[List[ActivityField]], Query()] = None,
+    include: Annotated[Optional[List[ActivityInclude]], Query()] = None,
+    status: Optional[ActivityStatus] = None,
+    deadline_status: Optional[DeadlineStatus] = None,
 ):
+    conditions = [Activity.assigned_to_id == assignee_id, *status_conditions(status, deadline_status)]
+    if fields is not None or include is not None:
+        return json_response(
+            activity_collection_adapter,
+            read_activity_collection(session, conditions, fields, include),
+            exclude_unset=True,
+        )
+
     activities = session.exec(
-        select(Activity).where(Activity.assigned_to_id == assignee_id)
+        select(Activity)
+        .options(*ACTIVITY_READ_OPTIONS)
+        .where(*conditions)
+        .order_by(col(Activity.id))
     ).all()
-    return activities
+    return json_response(activity_read_list_adapter, activities)
+
+
+@router.get("/calendar", response_model=List[ActivityCalendarDay])
+def read_activities_calendar(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Annotated[User, Depends(get_current_user)],
+    start: datetime,
+    end: datetime,
+    assignee_ids: Annotated[List[int], Query(min_length=1)],
+):
+    """
+    Get compact activity rows for the given assignees scheduled within
+    [start, end], grouped by day. Each row carries todo progress counts
+    instead of the full todo list.
+    """
+    rows = session.exec(
+        select(
+            Activity.id,
+            Activity.name,
+            Activity.scheduled_date,
+            Activity.assigned_to_id,
+            Activity.in_review,
+            Activity.todo_count,
+            Activity.todo_statuses,
+        )
+        .where(
+            col(Activity.assigned_to_id).in_(assignee_ids),
+            cast(datetime, Activity.scheduled_date) >= start,
+            cast(datetime, Activity.scheduled_date) <= end,
+        )
+        .order_by(col(Activity.scheduled_date), col(Activity.id))
+    ).all()
+
+    days: dict[date, list[ActivityCalendarRow]] = {}
+    for activity_id, name, scheduled_date, assigned_to_id, in_review, total, packed in rows:
+        days.setdefault(scheduled_date.date(), []).append(
+            ActivityCalendarRow(
+                id=activity_id,
+                name=name,
+                scheduled_date=scheduled_date,
+                assigned_to_id=assigned_to_id,
+                in_review=in_review,
+                total_todos=total,
+                done_todos=answered_count(packed),
+            )
+        )
+
+    return [
+        ActivityCalendarDay(day=day, activities=activities)
+        for day, activities in days.items()
+    ]
 
 
 @router.get("/{activity_id}", response_model=ActivityRead)
@@ -110,32 +342,39 @@ def update_activity(
         raise HTTPException(status_code=404, detail="Activity not found")
 
     activity_data = activity_update.model_dump(exclude_unset=True)
-    
-    # Check if setting in_review=True, ensure all todos are completed
-    if activity_data.get("in_review"):
-        # We need to check the current todos status
-        # Since db_activity.todos might not be fully loaded or updated in this session if we rely on lazy loading without refresh?
-        # But we fetched db_activity with session.get, so relationships might be lazy.
-        # Let's verify via a query to be safe and efficient.
-        pending_todos = session.exec(
-            select(TodoItem).where(
-                TodoItem.activity_id == activity_id,
-                TodoItem.status == TodoStatus.pending
-            )
-        ).all()
-        
-        if pending_todos:
-             raise HTTPException(
-                status_code=400, 
-                detail="Cannot set activity to in_review while there are pending todos."
-            )
+
+    previous_assignee_id = db_activity.assigned_to_id
+    was_in_review = db_activity.in_review
 
     for key, value in activity_data.items():
         setattr(db_activity, key, value)
 
+    if db_activity.assigned_to_id != previous_assignee_id:
+        # The previous assignee's offline copy has to drop the activity
+        session.add(
+            Tombstone(
+                entity=SyncEntity.activity,
+                entity_id=activity_id,
+                assigned_to_id=previous_assignee_id,
+            )
+        )
+
     session.add(db_activity)
+    # Rejects e.g. in_review while there are pending todos
+    refresh_activity_statuses(session, [db_activity])
     session.commit()
     session.refresh(db_activity)
+
+    if db_activity.in_review and not was_in_review:
+        event_type = ChangeEventType.activity_in_review
+    elif db_activity.assigned_to_id != previous_assignee_id:
+        event_type = ChangeEventType.activity_assigned
+    else:
+        event_type = ChangeEventType.activity_updated
+    publish_change(
+        activity_change(event_type, db_activity),
+        notify_supervisor_ids=[previous_assignee_id],
+    )
     return db_activity
 
 
@@ -144,8 +383,86 @@ def delete_activity(*, session: Session = Depends(get_session), activity_id: int
     activity = session.get(Activity, activity_id)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
+    event = activity_change(ChangeEventType.activity_deleted, activity)
+    session.add(
+        Tombstone(
+            entity=SyncEntity.activity,
+            entity_id=activity_id,
+            assigned_to_id=activity.assigned_to_id,
+            created_by_id=activity.created_by_id,
+        )
+    )
+    # Its todos are deleted by the database (ON DELETE CASCADE)
     session.delete(activity)
     session.commit()
+    publish_change(event)
+
+
+@router.delete("/", response_model=ActivityBulkDelete)
+def delete_activities(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Annotated[User, Depends(get_current_preventionist)],
+    ids: Annotated[Optional[List[int]], Query()] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+):
+    """
+    Delete the given activities, or those scheduled within [start, end], with
+    a single DELETE; the database deletes their todos (ON DELETE CASCADE).
+    Only the caller's own activities are deleted; other ids are left alone.
+    """
+    conditions = [Activity.created_by_id == current_user.id]
+    if ids:
+        conditions.append(col(Activity.id).in_(ids))
+    if start is not None:
+        conditions.append(cast(datetime, Activity.scheduled_date) >= start)
+    if end is not None:
+        conditions.append(cast(datetime, Activity.scheduled_date) <= end)
+    if len(conditions) == 1:
+        raise HTTPException(status_code=400, detail="Give activity ids or a scheduled date range")
+
+    deleted = session.exec(
+        delete(Activity)
+        .where(*conditions)
+        .returning(Activity.id, Activity.assigned_to_id, Activity.created_by_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if deleted:
+        now = datetime.now()
+        session.exec(
+            insert(Tombstone),
+            params=[
+                {
+                    "entity": SyncEntity.activity,
+                    "entity_id": activity.id,
+                    "assigned_to_id": activity.assigned_to_id,
+                    "created_by_id": activity.created_by_id,
+                    "deleted_at": now,
+                }
+                for activity in deleted
+            ],
+        )
+    session.commit()
+    for activity in deleted:
+        publish_change(activity_change(ChangeEventType.activity_deleted, activity))  # type: ignore
+    return ActivityBulkDelete(deleted=len(deleted))
+
+
+@router.post("/archive", response_model=JobRead, status_code=202)
+def archive_activities(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Annotated[User, Depends(get_current_user)],
+    months: int = Query(default=ARCHIVE_AFTER_MONTHS, ge=1),
+):
+    """
+    Move the activities finished more than `months` months ago, with their
+    todos, to the archive tables in the background; poll /jobs/{id} for the count
+    """
+    if current_user.role != Role.admin:
+        raise HTTPException(status_code=403, detail="Only admins can archive activities")
+    return enqueue_job(session, "activities.archive", {"months": months}, current_user)
 
 
 @router.get("/grouped-by-name/{creator_id}", response_model=List[ActivityWithSupervisors])
@@ -165,7 +482,9 @@ def get_activities_grouped_by_name(
     """
     # Get all activities created by this user
     activities = session.exec(
-        select(Activity).where(Activity.created_by_id == creator_id)
+        select(Activity)
+        .where(Activity.created_by_id == creator_id)
+        .order_by(col(Activity.id))
     ).all()
 
     # Group activities by name
@@ -1,141 +1,104 @@
-from typing import cast
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, col
+from typing import Optional, cast
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, case
+from sqlmodel import Session, func, select, col
+from activity_lifecycle import COMPLETED_STATUSES
+from archive import ROLLUP_COUNTERS, activity_counts, month_start, months_before, todo_counts
 from database import get_session
-from models import Activity, User, Role, SupervisorAssignment, TodoStatus
+from jobs import enqueue_job, job_handler
+from models import Activity, ActivityRollup, ActivityStatus, DeadlineStatus, User, Role
 from datetime import datetime, timedelta
 from routers.auth import get_current_user
+from schemas import JobRead
+from supervisor_cache import supervisor_directory
+from todo_bitmap import answered_count
 
-router = APIRouter(prefix="/activity/statuses_stats", tags=["activity-stats"])
+router = APIRouter(
+    prefix="/activity/statuses_stats",
+    tags=["activity-stats"],
+    dependencies=[Depends(get_current_user)],
+)
 
 
-@router.get("/{user_id}")
-def get_activity_stats(
-    user_id: int,
-    session: Session = Depends(get_session),
-):
-    now = datetime.now()
+def month_ranges(now: datetime) -> tuple[datetime, datetime, datetime, datetime]:
+    """Start and end of the current month, then of the previous month"""
     start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    end_of_month = (start_of_month + timedelta(days=32)).replace(
-        day=1
-    ) - timedelta(seconds=1)
-
-    activities = session.exec(
-        select(Activity).where(
-            Activity.assigned_to_id == user_id,
-            Activity.scheduled_date is not None,  # Ensure scheduled_date is not None
-            cast(datetime, Activity.scheduled_date) >= start_of_month,
-            cast(datetime, Activity.scheduled_date) <= end_of_month,
-        )
-    ).all()
+    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
+    start_of_prev_month = (start_of_month - timedelta(days=1)).replace(day=1)
+    end_of_prev_month = start_of_month - timedelta(seconds=1)
+    return start_of_month, end_of_month, start_of_prev_month, end_of_prev_month
 
-    stats = {"pending": 0, "done": 0, "in_progress": 0, "missed": 0}
 
-    for activity in activities:
-        if activity.scheduled_date and activity.scheduled_date < now - timedelta(
-            hours=24
-        ):
-            stats["missed"] += 1
-            continue
+def scheduled_between(start: datetime, end: datetime) -> list:
+    return [
+        cast(datetime, Activity.scheduled_date) >= start,
+        cast(datetime, Activity.scheduled_date) <= end,
+    ]
 
-        total_todos = len(activity.todos)
-        if total_todos == 0:
-            stats["pending"] += 1
-            continue
 
-        done_todos = sum(1 for todo in activity.todos if todo.status != TodoStatus.pending)
+def is_completed():
+    return col(Activity.status).in_(COMPLETED_STATUSES)
 
-        if done_todos == 0:
-            stats["pending"] += 1
-        elif done_todos == total_todos:
-            stats["done"] += 1
-        else:
-            stats["in_progress"] += 1
 
-    return stats
+def count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
 
 
-@router.get("/detailed/{user_id}")
-def get_detailed_activity_stats(
-    user_id: int,
-    session: Session = Depends(get_session),
-):
-    """Get detailed statistics for a supervisor"""
-    now = datetime.now()
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-    
-    # Previous month for comparison
-    start_of_prev_month = (start_of_month - timedelta(days=1)).replace(day=1)
-    end_of_prev_month = start_of_month - timedelta(seconds=1)
+def status_distribution(session: Session, conditions: list) -> dict[str, int]:
+    """Missed activities first, then the rest by lifecycle status"""
+    stats = {"pending": 0, "done": 0, "in_progress": 0, "missed": 0}
+    for deadline_status, status, count in session.exec(
+        select(Activity.deadline_status, Activity.status, func.count())
+        .where(*conditions)
+        .group_by(col(Activity.deadline_status), col(Activity.status))
+    ).all():
+        if deadline_status == DeadlineStatus.missed:
+            stats["missed"] += count
+        elif status in COMPLETED_STATUSES:
+            stats["done"] += count
+        elif status == ActivityStatus.in_progress:
+            stats["in_progress"] += count
+        else:
+            stats["pending"] += count
+    return stats
+
 
-    # Current month activities
-    current_activities = session.exec(
-        select(Activity).where(
-            Activity.assigned_to_id == user_id,
-            Activity.scheduled_date is not None,
-            cast(datetime, Activity.scheduled_date) >= start_of_month,
-            cast(datetime, Activity.scheduled_date) <= end_of_month,
+def task_totals(session: Session, conditions: list) -> tuple[int, int]:
+    """Todos and answered todos of the activities that are not missed"""
+    rows = session.exec(
+        select(Activity.todo_count, Activity.todo_statuses).where(
+            *conditions, Activity.deadline_status != DeadlineStatus.missed
         )
     ).all()
+    return sum(total for total, _ in rows), sum(answered_count(packed) for _, packed in rows)
 
-    # Previous month activities
-    prev_activities = session.exec(
-        select(Activity).where(
-            Activity.assigned_to_id == user_id,
-            Activity.scheduled_date is not None,
-            cast(datetime, Activity.scheduled_date) >= start_of_prev_month,
-            cast(datetime, Activity.scheduled_date) <= end_of_prev_month,
+
+def detailed_stats(session: Session, assignee_condition, now: datetime) -> dict:
+    start_of_month, end_of_month, start_of_prev_month, end_of_prev_month = month_ranges(now)
+    current_month = [assignee_condition, *scheduled_between(start_of_month, end_of_month)]
+
+    stats = status_distribution(session, current_month)
+    current_total = sum(stats.values())
+    total_todos, completed_todos = task_totals(session, current_month)
+
+    # Previous month for comparison
+    prev_total, prev_done = session.exec(
+        select(func.count(), count_if(is_completed())).where(
+            assignee_condition, *scheduled_between(start_of_prev_month, end_of_prev_month)
         )
-    ).all()
+    ).one()
+    prev_done = prev_done or 0
 
     # Upcoming activities (next 7 days)
     upcoming_activities = session.exec(
-        select(Activity).where(
-            Activity.assigned_to_id == user_id,
-            Activity.scheduled_date is not None,
-            cast(datetime, Activity.scheduled_date) >= now,
-            cast(datetime, Activity.scheduled_date) <= now + timedelta(days=7),
+        select(func.count()).where(
+            assignee_condition, *scheduled_between(now, now + timedelta(days=7))
         )
-    ).all()
-
-    # Calculate stats for current month
-    stats = {"pending": 0, "done": 0, "in_progress": 0, "missed": 0}
-    total_todos = 0
-    completed_todos = 0
-    
-    for activity in current_activities:
-        if activity.scheduled_date and activity.scheduled_date < now - timedelta(hours=24):
-            stats["missed"] += 1
-            continue
-
-        activity_total = len(activity.todos)
-        activity_done = sum(1 for todo in activity.todos if todo.status != TodoStatus.pending)
-        
-        total_todos += activity_total
-        completed_todos += activity_done
-
-        if activity_total == 0:
-            stats["pending"] += 1
-        elif activity_done == 0:
-            stats["pending"] += 1
-        elif activity_done == activity_total:
-            stats["done"] += 1
-        else:
-            stats["in_progress"] += 1
-
-    # Calculate previous month stats for comparison
-    prev_stats = {"done": 0, "total": len(prev_activities)}
-    for activity in prev_activities:
-        activity_total = len(activity.todos)
-        activity_done = sum(1 for todo in activity.todos if todo.status != TodoStatus.pending)
-        if activity_total > 0 and activity_done == activity_total:
-            prev_stats["done"] += 1
+    ).one()
 
     # Calculate completion rates
-    current_total = len(current_activities)
     completion_rate = (stats["done"] / current_total * 100) if current_total > 0 else 0
-    prev_completion_rate = (prev_stats["done"] / prev_stats["total"] * 100) if prev_stats["total"] > 0 else 0
+    prev_completion_rate = (prev_done / prev_total * 100) if prev_total > 0 else 0
     
     # Calculate average task completion
     avg_task_completion = (completed_todos / total_todos * 100) if total_todos > 0 else 0
@@ -143,7 +106,7 @@ def get_detailed_activity_stats(
     return {
         "status_distribution": stats,
         "total_activities": current_total,
-        "upcoming_activities": len(upcoming_activities),
+        "upcoming_activities": upcoming_activities,
         "completion_rate": round(completion_rate, 1),
         "prev_completion_rate": round(prev_completion_rate, 1),
         "completion_trend": round(completion_rate - prev_completion_rate, 1),
@@ -153,20 +116,83 @@ def get_detailed_activity_stats(
     }
 
 
-@router.get("/general/detailed")
-def get_general_activity_stats(
+@router.get("/{user_id}")
+def get_activity_stats(
+    user_id: int,
     session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
 ):
-    """Get detailed statistics for all supervisors assigned to the preventionist"""
-    if current_user.role != Role.preventionist:
-        raise HTTPException(status_code=403, detail="Only preventionists can access this endpoint")
-
-    # Get all supervisors assigned to this preventionist
-    supervisors_query = select(SupervisorAssignment.supervisor_id).where(
-        SupervisorAssignment.preventionist_id == current_user.id
+    start_of_month, end_of_month, _, _ = month_ranges(datetime.now())
+    return status_distribution(
+        session,
+        [Activity.assigned_to_id == user_id, *scheduled_between(start_of_month, end_of_month)],
     )
-    supervisor_ids = session.exec(supervisors_query).all()
+
+
+@router.get("/detailed/{user_id}")
+def get_detailed_activity_stats(
+    user_id: int,
+    session: Session = Depends(get_session),
+):
+    """Get detailed statistics for a supervisor"""
+    return detailed_stats(session, Activity.assigned_to_id == user_id, datetime.now())
+
+
+@router.get("/history/{user_id}")
+def get_monthly_history(
+    user_id: int,
+    months: int = Query(default=12, ge=1, le=120),
+    session: Session = Depends(get_session),
+):
+    """
+    Month by month counts for a supervisor, oldest first, including the
+    activities already moved to the archive (through their rollups)
+    """
+    now = datetime.now()
+    since = months_before(now, months - 1)
+    history = {
+        months_before(now, offset): dict.fromkeys(ROLLUP_COUNTERS, 0)
+        for offset in reversed(range(months))
+    }
+    end_of_month = months_before(now, -1) - timedelta(seconds=1)
+    current = [Activity.assigned_to_id == user_id, *scheduled_between(since, end_of_month)]
+    todos = todo_counts(session, current)
+    for activity in session.exec(
+        select(
+            Activity.id,
+            Activity.status,
+            Activity.deadline_status,
+            Activity.scheduled_date,
+            Activity.finished_date,
+        ).where(*current)
+    ).all():
+        bucket = history[month_start(cast(datetime, activity.scheduled_date))]
+        counts = activity_counts(
+            activity.status,
+            activity.deadline_status,
+            activity.scheduled_date,
+            activity.finished_date,
+            *todos.get(cast(int, activity.id), (0, 0)),
+        )
+        for name, value in counts.items():
+            bucket[name] += value
+
+    for rollup in session.exec(
+        select(ActivityRollup).where(
+            ActivityRollup.assigned_to_id == user_id, col(ActivityRollup.month) >= since
+        )
+    ).all():
+        bucket = history[rollup.month]
+        for name in ROLLUP_COUNTERS:
+            bucket[name] += getattr(rollup, name)
+
+    return [{"month": f"{month:%Y-%m}", **counts} for month, counts in history.items()]
+
+
+def build_general_activity_stats(session: Session, preventionist_id: int) -> dict:
+    """Detailed statistics for all supervisors assigned to the preventionist"""
+    # Get all supervisors assigned to this preventionist (cached)
+    supervisors = supervisor_directory.get_supervisors(session, preventionist_id)
+    supervisor_ids = [s.id for s in supervisors]
     
     if not supervisor_ids:
         return {
@@ -182,143 +208,72 @@ def get_general_activity_stats(
         }
 
     now = datetime.now()
-    start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) - timedelta(seconds=1)
-    
-    # Previous month for comparison
-    start_of_prev_month = (start_of_month - timedelta(days=1)).replace(day=1)
-    end_of_prev_month = start_of_month - timedelta(seconds=1)
+    assignee_condition = col(Activity.assigned_to_id).in_(supervisor_ids)
+    stats = detailed_stats(session, assignee_condition, now)
+
+    # Per supervisor stats, one row per supervisor
+    start_of_month, end_of_month, _, _ = month_ranges(now)
+    finished_date = cast(datetime, Activity.finished_date)
+    scheduled_date = cast(datetime, Activity.scheduled_date)
+    buckets = {
+        s_id: (assigned, completed or 0, on_time or 0, late or 0, overdue or 0)
+        for s_id, assigned, completed, on_time, late, overdue in session.exec(
+            select(
+                Activity.assigned_to_id,
+                func.count(),
+                count_if(is_completed()),
+                count_if(and_(is_completed(), finished_date <= scheduled_date)),
+                count_if(and_(is_completed(), finished_date > scheduled_date)),
+                count_if(
+                    and_(~is_completed(), Activity.deadline_status != DeadlineStatus.upcoming)
+                ),
+            )
+            .where(assignee_condition, *scheduled_between(start_of_month, end_of_month))
+            .group_by(col(Activity.assigned_to_id))
+        ).all()
+    }
 
-    # Current month activities for ALL supervisors
-    current_activities = session.exec(
-        select(Activity).where(
-            col(Activity.assigned_to_id).in_(supervisor_ids),
-            Activity.scheduled_date is not None,
-            cast(datetime, Activity.scheduled_date) >= start_of_month,
-            cast(datetime, Activity.scheduled_date) <= end_of_month,
-        )
-    ).all()
+    supervisors_stats = []
+    for supervisor in supervisors:
+        assigned, completed, on_time, late, overdue = buckets.get(supervisor.id, (0, 0, 0, 0, 0))
+        supervisors_stats.append({
+            "id": supervisor.id,
+            "name": supervisor.username,
+            "assigned": assigned,
+            "completed": completed,
+            "completed_on_time": on_time,
+            "completed_late": late,
+            "overdue": overdue
+        })
+
+    stats["supervisors_stats"] = supervisors_stats
+    return stats
 
-    # Previous month activities for ALL supervisors
-    prev_activities = session.exec(
-        select(Activity).where(
-            col(Activity.assigned_to_id).in_(supervisor_ids),
-            Activity.scheduled_date is not None,
-            cast(datetime, Activity.scheduled_date) >= start_of_prev_month,
-            cast(datetime, Activity.scheduled_date) <= end_of_prev_month,
-        )
-    ).all()
 
-    # Upcoming activities (next 7 days) for ALL supervisors
-    upcoming_activities = session.exec(
-        select(Activity).where(
-            col(Activity.assigned_to_id).in_(supervisor_ids),
-            Activity.scheduled_date is not None,
-            cast(datetime, Activity.scheduled_date) >= now,
-            cast(datetime, Activity.scheduled_date) <= now + timedelta(days=7),
-        )
-    ).all()
+@router.get("/general/detailed")
+def get_general_activity_stats(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Get detailed statistics for all supervisors assigned to the preventionist"""
+    if current_user.role != Role.preventionist:
+        raise HTTPException(status_code=403, detail="Only preventionists can access this endpoint")
 
-    # Fetch supervisors info for detailed breakdown
-    supervisors = session.exec(select(User).where(col(User.id).in_(supervisor_ids))).all()
-    supervisors_map = {s.id: s for s in supervisors}
+    return build_general_activity_stats(session, cast(int, current_user.id))
 
-    # Calculate stats for current month
-    stats = {"pending": 0, "done": 0, "in_progress": 0, "missed": 0}
-    total_todos = 0
-    completed_todos = 0
-    
-    # Per supervisor stats bucket
-    supervisor_buckets = {s_id: {"assigned": 0, "completed": 0, "completed_on_time": 0, "completed_late": 0, "overdue": 0} for s_id in supervisor_ids}
-
-    for activity in current_activities:
-        # --- General Stats Logic (Preserved) ---
-        is_missed_general = False
-        if activity.scheduled_date and activity.scheduled_date < now - timedelta(hours=24):
-            is_missed_general = True
-            
-        if is_missed_general:
-             stats["missed"] += 1
-        else:
-            activity_total = len(activity.todos)
-            activity_done = sum(1 for todo in activity.todos if todo.status != TodoStatus.pending)
-            
-            total_todos += activity_total
-            completed_todos += activity_done
-
-            if activity_total == 0:
-                stats["pending"] += 1
-            elif activity_done == 0:
-                stats["pending"] += 1
-            elif activity_done == activity_total:
-                stats["done"] += 1
-            else:
-                stats["in_progress"] += 1
-        
-        # --- Supervisor Detailed Stats Logic ---
-        s_id = activity.assigned_to_id
-        if s_id in supervisor_buckets:
-            bucket = supervisor_buckets[s_id]
-            bucket["assigned"] += 1
-            
-            is_done = False
-            if activity.todos:
-                done_todos = sum(1 for todo in activity.todos if todo.status != TodoStatus.pending)
-                if done_todos == len(activity.todos) and len(activity.todos) > 0:
-                    is_done = True
-            
-            if is_done:
-                bucket["completed"] += 1
-                if activity.finished_date and activity.scheduled_date:
-                    if activity.finished_date <= activity.scheduled_date:
-                        bucket["completed_on_time"] += 1
-                    else:
-                        bucket["completed_late"] += 1
-            else:
-                # Not done. Check if overdue
-                if activity.scheduled_date and activity.scheduled_date < now:
-                    bucket["overdue"] += 1
-
-    # Calculate previous month stats for comparison
-    prev_stats = {"done": 0, "total": len(prev_activities)}
-    for activity in prev_activities:
-        activity_total = len(activity.todos)
-        activity_done = sum(1 for todo in activity.todos if todo.status != TodoStatus.pending)
-        if activity_total > 0 and activity_done == activity_total:
-            prev_stats["done"] += 1
-
-    # Format supervisor stats for response
-    supervisors_stats = []
-    for s_id, bucket in supervisor_buckets.items():
-        supervisor = supervisors_map.get(s_id)
-        if supervisor:
-             supervisors_stats.append({
-                 "id": s_id,
-                 "name": supervisor.username,
-                 "assigned": bucket["assigned"],
-                 "completed": bucket["completed"],
-                 "completed_on_time": bucket["completed_on_time"],
-                 "completed_late": bucket["completed_late"],
-                 "overdue": bucket["overdue"]
-             })
 
-    # Calculate completion rates
-    current_total = len(current_activities)
-    completion_rate = (stats["done"] / current_total * 100) if current_total > 0 else 0
-    prev_completion_rate = (prev_stats["done"] / prev_stats["total"] * 100) if prev_stats["total"] > 0 else 0
-    
-    # Calculate average task completion
-    avg_task_completion = (completed_todos / total_todos * 100) if total_todos > 0 else 0
+@job_handler("stats.general")
+def run_general_activity_stats(session: Session, payload: None, user_id: Optional[int]) -> dict:
+    return build_general_activity_stats(session, cast(int, user_id))
 
-    return {
-        "status_distribution": stats,
-        "total_activities": current_total,
-        "upcoming_activities": len(upcoming_activities),
-        "completion_rate": round(completion_rate, 1),
-        "prev_completion_rate": round(prev_completion_rate, 1),
-        "completion_trend": round(completion_rate - prev_completion_rate, 1),
-        "avg_task_completion": round(avg_task_completion, 1),
-        "total_tasks": total_todos,
-        "completed_tasks": completed_todos,
-        "supervisors_stats": supervisors_stats
-    }
+
+@router.post("/general/detailed/jobs", response_model=JobRead, status_code=202)
+def enqueue_general_activity_stats(
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Compute the general statistics in the background; poll /jobs/{id} for the result"""
+    if current_user.role != Role.preventionist:
+        raise HTTPException(status_code=403, detail="Only preventionists can access this endpoint")
+
+    return enqueue_job(session, "stats.general", None, current_user)
@@ -1,8 +1,9 @@
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select, func
+from sqlalchemy import update
+from sqlmodel import Session, col, select, func
 from database import get_session
-from models import ActivityTemplate, TemplateTodoItem, User
+from models import ActivityTemplate, TemplateTodoItem, TodoItem, User
 from schemas import (
     ActivityTemplateCreate,
     ActivityTemplateRead,
@@ -11,6 +12,8 @@ from schemas import (
     TemplateTodoItemRead,
 )
 from routers.auth import get_current_preventionist
+from serialization import json_response, template_todo_item_read_list_adapter
+from template_versions import add_items, items_of_version
 
 router = APIRouter(prefix="/activity-templates", tags=["activity-templates"])
 
@@ -102,6 +105,22 @@ def delete_activity_template(
     activity_template = session.get(ActivityTemplate, activity_template_id)
     if not activity_template:
         raise HTTPException(status_code=404, detail="Activity Template not found")
+    # Items used by todos outlive the template, retired so no listing shows
+    # them; the database deletes the others (ON DELETE CASCADE) and unlinks
+    # its activities (SET NULL)
+    session.exec(
+        update(TemplateTodoItem)
+        .where(
+            col(TemplateTodoItem.template_id) == activity_template_id,
+            select(TodoItem.id).where(TodoItem.template_todo_id == TemplateTodoItem.id).exists(),
+        )
+        .values(
+            template_id=None,
+            retired_in_version=func.coalesce(
+                TemplateTodoItem.retired_in_version, activity_template.version + 1
+            ),
+        )
+    )
     session.delete(activity_template)
     session.commit()
 
@@ -120,19 +139,11 @@ def create_template_todo_items(
     if not activity_template:
         raise HTTPException(status_code=404, detail="Activity Template not found")
 
-    created_items = []
-    for item_data in items.items:
-        db_item = TemplateTodoItem.model_validate(item_data)
-        db_item.template_id = activity_template_id
-        session.add(db_item)
-        created_items.append(db_item)
-
+    created_items = add_items(session, activity_template, [item.description for item in items.items])
+    # Built before the commit expires the items, instead of refreshing each one
+    response = json_response(template_todo_item_read_list_adapter, created_items, status_code=201)
     session.commit()
-
-    for item in created_items:
-        session.refresh(item)
-
-    return created_items
+    return response
 
 
 @router.get("/{activity_template_id}/items", response_model=List[TemplateTodoItemRead])
@@ -141,8 +152,18 @@ def read_template_todo_items(
     session: Session = Depends(get_session),
     current_user: Annotated[User, Depends(get_current_preventionist)],
     activity_template_id: int,
+    version: Optional[int] = Query(default=None, ge=1),
 ):
+    """Items of the current version, or of an earlier one"""
     activity_template = session.get(ActivityTemplate, activity_template_id)
     if not activity_template:
         raise HTTPException(status_code=404, detail="Activity Template not found")
-    return activity_template.template_todos
+    if version is None:
+        return activity_template.template_todos
+    if version > activity_template.version:
+        raise HTTPException(status_code=404, detail="Activity Template version not found")
+    return session.exec(
+        select(TemplateTodoItem)
+        .where(*items_of_version(activity_template_id, version))
+        .order_by(col(TemplateTodoItem.position), col(TemplateTodoItem.id))
+    ).all()
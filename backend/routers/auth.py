@@ -8,6 +8,7 @@ from sqlmodel import Session, select
 from database import get_session
 from models import User
 from schemas import Token, TokenData
+from tenancy import scope_session
 from security import (
     ALGORITHM,
     SECRET_KEY,
@@ -20,7 +21,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-async def get_current_user(
+def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     session: Annotated[Session, Depends(get_session)],
 ) -> User:
@@ -41,6 +42,8 @@ async def get_current_user(
     user = session.exec(select(User).where(User.username == token_data.username)).first()
     if user is None:
         raise credentials_exception
+    # Everything else the request reads or writes is limited to the user's company
+    scope_session(session, user.tenant_id)
     return user
 
 
@@ -56,14 +59,22 @@ async def get_current_preventionist(
 
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(
+def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: Annotated[Session, Depends(get_session)],
 ) -> Token:
-    # Try to find user by email first, then by username
-    user = session.exec(select(User).where(User.email == form_data.username)).first()
+    # Try to find user by email first, then by username, in any company. No
+    # username or email is another user's username or email (see
+    # user_import.taken_logins), so at most one user matches.
+    user = session.exec(
+        select(User).where(User.email == form_data.username).execution_options(all_tenants=True)
+    ).first()
     if not user:
-        user = session.exec(select(User).where(User.username == form_data.username)).first()
+        user = session.exec(
+            select(User)
+            .where(User.username == form_data.username)
+            .execution_options(all_tenants=True)
+        ).first()
 
     if not user or not verify_password(form_data.password, user.password_hash):
         raise HTTPException(
@@ -73,7 +84,7 @@ async def login_for_access_token(
         )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "tid": user.tenant_id}, expires_delta=access_token_expires
     )
     return Token(access_token=access_token, token_type="bearer", role=user.role)
 
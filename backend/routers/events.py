@@ -0,0 +1,75 @@
+import asyncio
+from contextlib import suppress
+from typing import Annotated, AsyncIterator, cast
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from database import engine
+from models import Role, User
+from pubsub import broker, preventionist_topic, supervisor_topic
+from routers.auth import get_current_user, oauth2_scheme
+from supervisor_cache import supervisor_directory
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Seconds between keep-alive comments, so proxies don't close idle streams
+HEARTBEAT_INTERVAL = 15
+
+
+def topics_for_user(session: Session, user: User) -> list[str]:
+    """Supervisors see their own activities; preventionists see their supervisors'."""
+    if user.role == Role.supervisor:
+        return [supervisor_topic(user.id)]  # type: ignore
+    if user.role == Role.preventionist:
+        supervisor_ids = supervisor_directory.get_supervisor_ids(session, cast(int, user.id))
+        return [preventionist_topic(user.id)] + [  # type: ignore
+            supervisor_topic(supervisor_id) for supervisor_id in supervisor_ids
+        ]
+    return []
+
+
+def stream_topics(token: str) -> list[str]:
+    # A short-lived session: the stream can stay open for hours and must not
+    # hold a pooled connection while it does.
+    with Session(engine) as session:
+        return topics_for_user(session, get_current_user(token, session))
+
+
+async def event_stream(request: Request, topics: list[str]) -> AsyncIterator[str]:
+    events = broker.subscribe(topics)
+    next_event = None
+    try:
+        while not await request.is_disconnected():
+            if next_event is None:
+                next_event = asyncio.ensure_future(anext(events))
+            done, _ = await asyncio.wait({next_event}, timeout=HEARTBEAT_INTERVAL)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            event = next_event.result()
+            next_event = None
+            yield f"event: {event.type.value}\ndata: {event.model_dump_json()}\n\n"
+    finally:
+        if next_event is not None:
+            next_event.cancel()
+            with suppress(asyncio.CancelledError):
+                await next_event
+        await events.aclose()
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    token: Annotated[str, Depends(oauth2_scheme)],
+):
+    """
+    Server-sent events for activity, todo and assignment changes visible to
+    the current user. Events only identify what changed; clients refetch it.
+    """
+    topics = await run_in_threadpool(stream_topics, token)
+    return StreamingResponse(
+        event_stream(request, topics),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,221 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import groupby
+from typing import Annotated, Iterator, Optional, Sequence, cast
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlmodel import Session, col, func, select
+from database import engine
+from models import (
+    Activity,
+    ActivityArchive,
+    Role,
+    TemplateTodoItem,
+    TodoItem,
+    TodoItemArchive,
+    User,
+)
+from schemas import ExportFormat
+from tenancy import scope_session
+from routers.auth import get_current_user
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+# Rows fetched from the database cursor per round-trip. Only this many rows
+# are held in memory at once, whatever the size of the export.
+EXPORT_BATCH_SIZE = 500
+
+# Number of serialized records buffered before a chunk is sent to the client.
+EXPORT_FLUSH_EVERY = 100
+
+CSV_HEADER = [
+    "activity_id",
+    "activity_name",
+    "scheduled_date",
+    "finished_date",
+    "in_review",
+    "created_by_id",
+    "assigned_to_id",
+    "todo_id",
+    "todo_description",
+    "todo_status",
+]
+
+MEDIA_TYPES: dict[ExportFormat, str] = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def build_export_statement(
+    preventionist_id: Optional[int],
+    supervisor_id: Optional[int],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    archived: bool = False,
+) -> Select:
+    """Flat activity/todo rows ordered so each activity's todos are contiguous.
+
+    With `archived`, the rows are read from the archive tables instead.
+    """
+    activity, todo = (ActivityArchive, TodoItemArchive) if archived else (Activity, TodoItem)
+    # Archived todos keep their text; current ones may read their template todo's
+    description = (
+        todo.description
+        if archived
+        else func.coalesce(TodoItem.description, TemplateTodoItem.description)
+    )
+    statement = (
+        select(
+            activity.id,
+            activity.name,
+            activity.scheduled_date,
+            activity.finished_date,
+            activity.in_review,
+            activity.created_by_id,
+            activity.assigned_to_id,
+            todo.id.label("todo_id"),  # type: ignore
+            description.label("todo_description"),  # type: ignore
+            todo.status.label("todo_status"),  # type: ignore
+        )
+        .outerjoin(todo, col(todo.activity_id) == col(activity.id))
+        .order_by(col(activity.id), col(todo.id))
+    )
+    if not archived:
+        statement = statement.outerjoin(
+            TemplateTodoItem, col(TodoItem.template_todo_id) == col(TemplateTodoItem.id)
+        )
+    if preventionist_id is not None:
+        statement = statement.where(activity.created_by_id == preventionist_id)
+    if supervisor_id is not None:
+        statement = statement.where(activity.assigned_to_id == supervisor_id)
+    if start is not None:
+        statement = statement.where(cast(datetime, activity.scheduled_date) >= start)
+    if end is not None:
+        statement = statement.where(cast(datetime, activity.scheduled_date) <= end)
+    return statement
+
+
+def iter_export_rows(statements: Sequence[Select], tenant_id: Optional[int]) -> Iterator:
+    """Yield the rows of each statement in turn through a server-side cursor,
+    fetching EXPORT_BATCH_SIZE at a time.
+
+    The session is owned by the generator so it stays open for as long as the
+    response is being streamed.
+    """
+    with Session(engine) as session:
+        scope_session(session, tenant_id)
+        for statement in statements:
+            result = session.exec(
+                statement.execution_options(yield_per=EXPORT_BATCH_SIZE)  # type: ignore
+            )
+            yield from result
+
+
+def _ndjson_records(rows: Iterator) -> Iterator[str]:
+    for activity_id, activity_rows in groupby(rows, key=lambda row: row.id):
+        first = next(activity_rows)
+        todos = [
+            {
+                "id": row.todo_id,
+                "description": row.todo_description,
+                "status": row.todo_status,
+            }
+            for row in (first, *activity_rows)
+            if row.todo_id is not None
+        ]
+        record = {
+            "id": activity_id,
+            "name": first.name,
+            "scheduled_date": _isoformat(first.scheduled_date),
+            "finished_date": _isoformat(first.finished_date),
+            "in_review": first.in_review,
+            "created_by_id": first.created_by_id,
+            "assigned_to_id": first.assigned_to_id,
+            "todos": todos,
+        }
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _csv_records(rows: Iterator) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    for row in rows:
+        writer.writerow(
+            [
+                row.id,
+                row.name,
+                _isoformat(row.scheduled_date),
+                _isoformat(row.finished_date),
+                row.in_review,
+                row.created_by_id,
+                row.assigned_to_id,
+                row.todo_id,
+                row.todo_description,
+                row.todo_status.value if row.todo_status else None,
+            ]
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+
+def stream_export(rows: Iterator, export_format: ExportFormat) -> Iterator[str]:
+    """Serialize rows lazily and group them into chunks of EXPORT_FLUSH_EVERY records."""
+    records = _ndjson_records(rows) if export_format == ExportFormat.ndjson else _csv_records(rows)
+    chunk: list[str] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= EXPORT_FLUSH_EVERY:
+            yield "".join(chunk)
+            chunk.clear()
+    if chunk:
+        yield "".join(chunk)
+
+
+@router.get("/activities")
+def export_activities(
+    *,
+    current_user: Annotated[User, Depends(get_current_user)],
+    format: ExportFormat = ExportFormat.ndjson,
+    preventionist_id: Optional[int] = None,
+    supervisor_id: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_archived: bool = False,
+):
+    """
+    Stream every activity with its todos for the given filters.
+    - ndjson: one activity per line, with its todos nested.
+    - csv: one row per todo, activity columns repeated. Activities without
+      todos produce a single row with empty todo columns.
+
+    With `include_archived`, activities moved to the archive by archive.py
+    follow the current ones. Only admins export the whole company:
+    preventionists get the activities they created and supervisors the ones
+    assigned to them, whatever the filters say.
+    """
+    if current_user.role == Role.preventionist:
+        preventionist_id = current_user.id
+    elif current_user.role == Role.supervisor:
+        supervisor_id = current_user.id
+    statements = [build_export_statement(preventionist_id, supervisor_id, start, end)]
+    if include_archived:
+        statements.append(
+            build_export_statement(preventionist_id, supervisor_id, start, end, archived=True)
+        )
+    return StreamingResponse(
+        stream_export(iter_export_rows(statements, current_user.tenant_id), format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="activities.{format.value}"'
+        },
+    )
@@ -0,0 +1,36 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, col, select
+from database import get_session
+from models import Job, Role, User
+from schemas import JobRead
+from routers.auth import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/", response_model=List[JobRead])
+def read_my_jobs(
+    limit: int = Query(default=20, ge=1, le=100),
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    """Most recent jobs started by the current user"""
+    return session.exec(
+        select(Job)
+        .where(Job.created_by_id == current_user.id)
+        .order_by(col(Job.id).desc())
+        .limit(limit)
+    ).all()
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def read_job(
+    job_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    job = session.get(Job, job_id)
+    if not job or (job.created_by_id != current_user.id and current_user.role != Role.admin):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
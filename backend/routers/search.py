@@ -0,0 +1,27 @@
+from typing import Annotated, List, Optional, cast
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from database import get_session
+from models import User
+from schemas import SearchEntity, SearchHit
+from search import search
+from routers.auth import get_current_user
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/", response_model=List[SearchHit])
+def search_everything(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Annotated[User, Depends(get_current_user)],
+    q: str = Query(min_length=1, max_length=200),
+    entity: Annotated[Optional[List[SearchEntity]], Query()] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+):
+    """
+    Activities, templates, template todos and todos of the current company
+    matching `q`, best matches first. Accents and case are ignored.
+    """
+    return search(session, q, cast(int, current_user.tenant_id), entity, offset, limit)
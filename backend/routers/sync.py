@@ -0,0 +1,181 @@
+from datetime import datetime, timedelta
+from typing import Annotated, Optional, Sequence, cast
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session, col, or_, select, true
+from database import get_session
+from models import Activity, Role, TodoItem, TodoStatus, Tombstone, User
+from activity_lifecycle import LOCKED_STATUSES, refresh_activity_statuses
+from pubsub import activity_change, publish_change
+from schemas import (
+    ActivitySyncRead,
+    ChangeEvent,
+    ChangeEventType,
+    SyncChanges,
+    TodoItemSyncRead,
+    TodoSyncBatch,
+    TodoSyncOutcome,
+    TodoSyncResult,
+    TombstoneRead,
+    naive_server_time,
+)
+from routers.auth import get_current_user
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+# The next token is moved back by this much so that rows stamped just before
+# the snapshot but committed just after it are not skipped. Clients may see
+# a row twice and must apply changes idempotently (upsert by id).
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def parse_sync_token(token: Optional[str]) -> Optional[datetime]:
+    if token is None:
+        return None
+    try:
+        return naive_server_time(datetime.fromisoformat(token))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def activity_scope(user: User):
+    """Activities a user syncs: assigned ones for supervisors, created ones for preventionists"""
+    if user.role == Role.supervisor:
+        return Activity.assigned_to_id == user.id
+    if user.role == Role.preventionist:
+        return Activity.created_by_id == user.id
+    return true()
+
+
+def tombstone_scope(user: User):
+    if user.role == Role.supervisor:
+        return Tombstone.assigned_to_id == user.id
+    if user.role == Role.preventionist:
+        return Tombstone.created_by_id == user.id
+    return true()
+
+
+def can_sync(user: User, activity: Activity) -> bool:
+    if user.role == Role.supervisor:
+        return activity.assigned_to_id == user.id
+    if user.role == Role.preventionist:
+        return activity.created_by_id == user.id
+    return True
+
+
+@router.get("/changes", response_model=SyncChanges)
+def read_changes(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Annotated[User, Depends(get_current_user)],
+    since: Optional[str] = None,
+):
+    """
+    Get every activity and todo changed since the sync token (with all the
+    todos of changed activities), plus tombstones for rows deleted or
+    reassigned away. Without a token everything in the
+    user's scope is returned. Pass `next_token` on the following call.
+    """
+    since_time = parse_sync_token(since)
+    snapshot = datetime.now()
+
+    activities_query = select(Activity).where(activity_scope(current_user))
+    todos_query = (
+        select(TodoItem)
+        .join(Activity, col(TodoItem.activity_id) == col(Activity.id))
+        .where(activity_scope(current_user))
+    )
+    tombstones: Sequence[Tombstone] = []
+    if since_time is not None:
+        activities_query = activities_query.where(col(Activity.updated_at) > since_time)
+        # Todos of changed activities come along even if they did not change
+        # themselves: an activity reassigned to the user brings todos the
+        # client has never seen
+        todos_query = todos_query.where(
+            or_(col(TodoItem.updated_at) > since_time, col(Activity.updated_at) > since_time)
+        )
+        # A full sync already reflects every deletion, so tombstones are only
+        # needed for incremental ones
+        tombstones = session.exec(
+            select(Tombstone)
+            .where(tombstone_scope(current_user), col(Tombstone.deleted_at) > since_time)
+            .order_by(col(Tombstone.id))
+        ).all()
+
+    activities = session.exec(activities_query.order_by(col(Activity.id))).all()
+    todos = session.exec(todos_query.order_by(col(TodoItem.id))).all()
+
+    return SyncChanges(
+        activities=[ActivitySyncRead.model_validate(a) for a in activities],
+        todos=[TodoItemSyncRead.model_validate(t) for t in todos],
+        tombstones=[TombstoneRead.model_validate(t) for t in tombstones],
+        next_token=(snapshot - SYNC_OVERLAP).isoformat(),
+    )
+
+
+@router.post("/todos", response_model=list[TodoSyncResult])
+def apply_todo_changes(
+    *,
+    session: Session = Depends(get_session),
+    current_user: Annotated[User, Depends(get_current_user)],
+    batch: TodoSyncBatch,
+):
+    """
+    Apply todo changes queued while offline, all in one transaction.
+    Each change reports its own outcome; a change whose `updated_at` is older
+    than the server row, or that reopens a todo of an activity in review, is
+    not applied and reported as a conflict.
+    """
+    todo_ids = [change.id for change in batch.changes]
+    rows = session.exec(
+        select(TodoItem, Activity)
+        .join(Activity, col(TodoItem.activity_id) == col(Activity.id))
+        .where(col(TodoItem.id).in_(todo_ids))
+    ).all()
+    found = {cast(int, todo.id): (todo, activity) for todo, activity in rows}
+
+    results: list[TodoSyncResult] = []
+    applied: list[tuple[int, TodoItem]] = []
+    touched: dict[int, Activity] = {}
+    events: list[ChangeEvent] = []
+    for change in batch.changes:
+        if change.id not in found:
+            results.append(TodoSyncResult(id=change.id, outcome=TodoSyncOutcome.not_found))
+            continue
+        todo, activity = found[change.id]
+        if not can_sync(current_user, activity):
+            results.append(TodoSyncResult(id=change.id, outcome=TodoSyncOutcome.forbidden))
+            continue
+        reopens_locked = (
+            change.status == TodoStatus.pending and activity.status in LOCKED_STATUSES
+        )
+        if reopens_locked or (change.updated_at is not None and todo.updated_at > change.updated_at):
+            results.append(
+                TodoSyncResult(
+                    id=change.id,
+                    outcome=TodoSyncOutcome.conflict,
+                    todo=TodoItemSyncRead.model_validate(todo),
+                )
+            )
+            continue
+
+        for key, value in change.model_dump(
+            exclude_unset=True, exclude={"id", "updated_at"}
+        ).items():
+            setattr(todo, key, value)
+        session.add(todo)
+        touched[cast(int, activity.id)] = activity
+        applied.append((len(results), todo))
+        results.append(TodoSyncResult(id=change.id, outcome=TodoSyncOutcome.applied))
+        events.append(
+            activity_change(ChangeEventType.todo_updated, activity, todo_id=change.id)
+        )
+
+    # Flushes the whole batch once, which stamps updated_at on every applied todo
+    refresh_activity_statuses(session, touched.values())
+    for index, todo in applied:
+        results[index].todo = TodoItemSyncRead.model_validate(todo)
+    session.commit()
+
+    for event in events:
+        publish_change(event)
+    return results
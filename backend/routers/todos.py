@@ -1,20 +1,93 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from sqlalchemy import insert
+from sqlmodel import Session, col, select
 from database import get_session
-from models import TodoItem
-from schemas import TodoItemCreate, TodoItemRead, TodoItemUpdate
+from models import Activity, SyncEntity, TodoItem, Tombstone
+from activity_lifecycle import refresh_activity_statuses
+from pubsub import activity_change, publish_change
+from routers.auth import get_current_user
+from schemas import ChangeEventType, TodoItemCreate, TodoItemCreateList, TodoItemRead, TodoItemUpdate
+from serialization import json_response, todo_item_read_list_adapter
 
-router = APIRouter(prefix="/todos", tags=["todos"])
+router = APIRouter(prefix="/todos", tags=["todos"], dependencies=[Depends(get_current_user)])
+
+def refresh_parent_statuses(session: Session, *activity_ids: Optional[int]):
+    activities = [
+        activity
+        for activity_id in set(activity_ids)
+        if activity_id is not None and (activity := session.get(Activity, activity_id))
+    ]
+    refresh_activity_statuses(session, activities)
+
+def get_parent_activity(session: Session, activity_id: int) -> Activity:
+    # The session is tenant-scoped, so other tenants' activities are not found
+    activity = session.get(Activity, activity_id)
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    return activity
+
+def publish_todo_change(event_type: ChangeEventType, todo_item: TodoItem):
+    activity: Optional[Activity] = todo_item.activity
+    if activity:
+        publish_change(activity_change(event_type, activity, todo_id=todo_item.id))
 
 @router.post("/", response_model=TodoItemRead, status_code=201)
 def create_todo_item(*, session: Session = Depends(get_session), todo_item: TodoItemCreate):
+    get_parent_activity(session, todo_item.activity_id)
     db_todo_item = TodoItem.model_validate(todo_item)
     session.add(db_todo_item)
+    refresh_parent_statuses(session, db_todo_item.activity_id)
     session.commit()
     session.refresh(db_todo_item)
+    publish_todo_change(ChangeEventType.todo_created, db_todo_item)
     return db_todo_item
 
+@router.post("/batch", response_model=List[TodoItemRead], status_code=201)
+def create_todo_items(*, session: Session = Depends(get_session), todo_items: TodoItemCreateList):
+    """
+    Create todos of any activities with one multi-row INSERT ... RETURNING,
+    after checking their activities with one query.
+    """
+    activity_ids = {item.activity_id for item in todo_items.items}
+    activities = {
+        activity.id: activity
+        for activity in session.exec(
+            select(Activity).where(col(Activity.id).in_(activity_ids))
+        ).all()
+    }
+    missing = activity_ids - activities.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Activities not found: {sorted(missing)}")
+    if not todo_items.items:
+        return []
+
+    # Bulk INSERTs skip the model defaults and the tenant stamping
+    now = datetime.now()
+    todos = session.scalars(
+        insert(TodoItem).returning(TodoItem),
+        [
+            {
+                **item.model_dump(),
+                "tenant_id": activities[item.activity_id].tenant_id,
+                "updated_at": now,
+            }
+            for item in todo_items.items
+        ],
+    ).all()
+    refresh_activity_statuses(session, activities.values())
+    # Built before the commit expires the todos and activities
+    response = json_response(todo_item_read_list_adapter, todos, status_code=201)
+    events = [
+        activity_change(ChangeEventType.todo_created, activities[todo.activity_id], todo_id=todo.id)
+        for todo in todos
+    ]
+    session.commit()
+    for event in events:
+        publish_change(event)
+    return response
+
 @router.get("/", response_model=List[TodoItemRead])
 def read_todo_items(
     *,
@@ -43,13 +116,18 @@ def update_todo_item(
     if not db_todo_item:
         raise HTTPException(status_code=404, detail="TodoItem not found")
     
+    previous_activity_id = db_todo_item.activity_id
     todo_item_data = todo_item_update.model_dump(exclude_unset=True)
+    if todo_item_data.get("activity_id") is not None:
+        get_parent_activity(session, todo_item_data["activity_id"])
     for key, value in todo_item_data.items():
         setattr(db_todo_item, key, value)
         
     session.add(db_todo_item)
+    refresh_parent_statuses(session, previous_activity_id, db_todo_item.activity_id)
     session.commit()
     session.refresh(db_todo_item)
+    publish_todo_change(ChangeEventType.todo_updated, db_todo_item)
     return db_todo_item
 
 @router.delete("/{todo_item_id}", status_code=204)
@@ -57,5 +135,21 @@ def delete_todo_item(*, session: Session = Depends(get_session), todo_item_id: i
     todo_item = session.get(TodoItem, todo_item_id)
     if not todo_item:
         raise HTTPException(status_code=404, detail="TodoItem not found")
+    activity = todo_item.activity
+    if activity:
+        session.add(
+            Tombstone(
+                entity=SyncEntity.todo,
+                entity_id=todo_item_id,
+                activity_id=activity.id,
+                assigned_to_id=activity.assigned_to_id,
+                created_by_id=activity.created_by_id,
+            )
+        )
     session.delete(todo_item)
+    refresh_parent_statuses(session, todo_item.activity_id)
     session.commit()
+    if activity:
+        publish_change(
+            activity_change(ChangeEventType.todo_deleted, activity, todo_id=todo_item_id)
+        )
@@ -1,6 +1,6 @@
 from typing import List, Annotated
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from sqlmodel import Session, col, select
 from database import get_session
 from models import TemplateTodoItem, User
 from schemas import (
@@ -9,6 +9,7 @@ from schemas import (
     TemplateTodoItemUpdate,
 )
 from routers.auth import get_current_preventionist
+from template_versions import edit_item, remove_item
 
 router = APIRouter(prefix="/todos-template", tags=["todos-template"])
 
@@ -35,7 +36,13 @@ def read_template_todo_items(
     offset: int = 0,
     limit: int = Query(default=100, le=100),
 ):
-    items = session.exec(select(TemplateTodoItem).offset(offset).limit(limit)).all()
+    # Items retired by a template edit are only kept for existing activities
+    items = session.exec(
+        select(TemplateTodoItem)
+        .where(col(TemplateTodoItem.retired_in_version).is_(None))
+        .offset(offset)
+        .limit(limit)
+    ).all()
     return items
 
 
@@ -47,7 +54,8 @@ def read_template_todo_item(
     item_id: int,
 ):
     item = session.get(TemplateTodoItem, item_id)
-    if not item:
+    # Items of a deleted template are only kept for the todos reading them
+    if not item or item.template_id is None:
         raise HTTPException(status_code=404, detail="Template Todo Item not found")
     return item
 
@@ -61,14 +69,14 @@ def update_template_todo_item(
     item_update: TemplateTodoItemUpdate,
 ):
     db_item = session.get(TemplateTodoItem, item_id)
-    if not db_item:
+    if not db_item or db_item.retired_in_version is not None:
         raise HTTPException(status_code=404, detail="Template Todo Item not found")
 
     item_data = item_update.model_dump(exclude_unset=True)
-    for key, value in item_data.items():
-        setattr(db_item, key, value)
+    if item_data.get("description", db_item.description) != db_item.description:
+        # May return a new item: the old one stays with the activities using it
+        db_item = edit_item(session, db_item, item_data["description"])
 
-    session.add(db_item)
     session.commit()
     session.refresh(db_item)
     return db_item
@@ -82,7 +90,7 @@ def delete_template_todo_item(
     item_id: int,
 ):
     item = session.get(TemplateTodoItem, item_id)
-    if not item:
+    if not item or item.retired_in_version is not None:
         raise HTTPException(status_code=404, detail="Template Todo Item not found")
-    session.delete(item)
+    remove_item(session, item)
     session.commit()
@@ -1,11 +1,27 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from datetime import datetime
+from typing import Any, List, Union, cast
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile
+from sqlalchemy import insert, literal
+from sqlmodel import Session, col, delete, select, update
 from database import get_session
-from models import User, SupervisorAssignment, Role
-from schemas import UserCreate, UserRead, SupervisorAssignmentCreate
+from jobs import enqueue_job
+from models import Activity, User, SupervisorAssignment, Role, SyncEntity, Tombstone
+from pubsub import publish_change
+from schemas import (
+    ChangeEvent,
+    ChangeEventType,
+    JobRead,
+    UserCreate,
+    UserImportReport,
+    UserRead,
+    SupervisorAssignmentCreate,
+    SupervisorReassignment,
+    SupervisorReassignmentResult,
+)
 from security import get_password_hash
 from routers.auth import get_current_user
+from supervisor_cache import supervisor_directory
+from user_import import csv_records, import_users, json_records, parse_rows, taken_logins
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -23,19 +39,7 @@ def get_my_supervisors(
     if current_user.role != Role.preventionist:
         raise HTTPException(status_code=403, detail="Only preventionists can access this endpoint")
 
-    from sqlmodel import col
-
-    statement = (
-        select(User)
-        .join(
-            SupervisorAssignment,
-            col(User.id) == SupervisorAssignment.supervisor_id,
-        )
-        .where(SupervisorAssignment.preventionist_id == current_user.id)
-    )
-
-    supervisors = session.exec(statement).all()
-    return supervisors
+    return supervisor_directory.get_supervisors(session, cast(int, current_user.id))
 
 
 @router.get("/{user_id}", response_model=UserRead)
@@ -50,45 +54,205 @@ def read_user_by_id(
     return user
 
 
+def reassign_supervisors(
+    session: Session, reassignment: SupervisorReassignment
+) -> SupervisorReassignmentResult:
+    """
+    Assign every supervisor to the preventionist, replacing their previous
+    assignment, with set-based statements. Roles are validated with a single
+    query. Commits, then invalidates the supervisor cache and notifies
+    dashboards.
+    """
+    supervisor_ids = sorted(set(reassignment.supervisor_ids))
+    target_id = reassignment.preventionist_id
+
+    roles = dict(
+        session.exec(
+            select(User.id, User.role).where(col(User.id).in_([target_id, *supervisor_ids]))
+        ).all()
+    )
+    missing = [i for i in [target_id, *supervisor_ids] if i not in roles]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Users not found: {missing}")
+    if roles[target_id] != Role.preventionist:
+        raise HTTPException(status_code=400, detail="User is not a preventionist")
+    not_supervisors = [i for i in supervisor_ids if roles[i] != Role.supervisor]
+    if not_supervisors:
+        raise HTTPException(
+            status_code=400, detail=f"Users are not supervisors: {not_supervisors}"
+        )
+
+    previous = session.exec(
+        select(SupervisorAssignment.supervisor_id, SupervisorAssignment.preventionist_id)
+        .where(col(SupervisorAssignment.supervisor_id).in_(supervisor_ids))
+    ).all()
+    already_assigned = {s_id for s_id, p_id in previous if p_id == target_id}
+    previous_preventionists = {p_id for _, p_id in previous if p_id != target_id}
+
+    removed = session.exec(
+        delete(SupervisorAssignment).where(
+            col(SupervisorAssignment.supervisor_id).in_(supervisor_ids),
+            SupervisorAssignment.preventionist_id != target_id,
+        )
+    ).rowcount
+    new_assignments = [
+        {"supervisor_id": s_id, "preventionist_id": target_id}
+        for s_id in supervisor_ids
+        if s_id not in already_assigned
+    ]
+    if new_assignments:
+        session.exec(insert(SupervisorAssignment).values(new_assignments))
+
+    activities_moved = 0
+    if reassignment.move_open_activities:
+        open_activities = (
+            col(Activity.assigned_to_id).in_(supervisor_ids),
+            col(Activity.in_review).is_(False),
+            col(Activity.finished_date).is_(None),
+            col(Activity.created_by_id) != target_id,
+        )
+        # The previous creators' offline copies have to drop these activities
+        session.exec(
+            insert(Tombstone).from_select(
+                ["entity", "entity_id", "created_by_id", "deleted_at"],
+                select(
+                    literal(SyncEntity.activity.name),
+                    Activity.id,
+                    Activity.created_by_id,
+                    literal(datetime.now()),
+                ).where(*open_activities),
+            )
+        )
+        # Bumps updated_at, so the new creator's delta sync brings the
+        # activities along with all their todos
+        activities_moved = session.exec(
+            update(Activity)
+            .where(*open_activities)
+            .values(created_by_id=target_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    session.commit()
+    # Bulk statements are not seen by the cache's flush tracking
+    supervisor_directory.invalidate()
+
+    for supervisor_id in supervisor_ids:
+        publish_change(
+            ChangeEvent(
+                type=ChangeEventType.assignment_changed,
+                supervisor_id=supervisor_id,
+                preventionist_id=target_id,
+            )
+        )
+    for preventionist_id in previous_preventionists:
+        publish_change(
+            ChangeEvent(
+                type=ChangeEventType.assignment_changed,
+                preventionist_id=preventionist_id,
+            )
+        )
+
+    return SupervisorReassignmentResult(
+        preventionist_id=target_id,
+        supervisor_ids=supervisor_ids,
+        assignments_created=len(new_assignments),
+        assignments_removed=removed,
+        activities_moved=activities_moved,
+    )
+
+
 @router.post("/assign-supervisor")
 def assign_supervisor_to_preventionist(
     assignment: SupervisorAssignmentCreate,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
+    reassign_supervisors(
+        session,
+        SupervisorReassignment(
+            preventionist_id=assignment.preventionist_id,
+            supervisor_ids=[assignment.supervisor_id],
+        ),
+    )
+    return {"message": "Supervisor assigned successfully"}
 
-    supervisor = session.get(User, assignment.supervisor_id)
-    preventionist = session.get(User, assignment.preventionist_id)
 
-    if not supervisor or not preventionist:
-        raise HTTPException(status_code=404, detail="User not found")
+@router.post("/reassign-supervisors", response_model=SupervisorReassignmentResult)
+def bulk_reassign_supervisors(
+    reassignment: SupervisorReassignment,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Assign many supervisors to a preventionist at once, e.g. when a
+    preventionist leaves. With `move_open_activities` their open activities
+    are re-pointed to the new preventionist in the same transaction.
+    """
+    return reassign_supervisors(session, reassignment)
 
-    if supervisor.role != Role.supervisor:
-        raise HTTPException(status_code=400, detail="User is not a supervisor")
 
-    if preventionist.role != Role.preventionist:
-        raise HTTPException(status_code=400, detail="User is not a preventionist")
+def require_user_admin(current_user: User = Depends(get_current_user)) -> User:
+    if current_user.role not in (Role.preventionist, Role.admin):
+        raise HTTPException(status_code=403, detail="Only preventionists and admins can import users")
+    return current_user
 
-    existing_assignment = session.get(SupervisorAssignment, assignment.supervisor_id)
-    if existing_assignment:
-        existing_assignment.preventionist_id = assignment.preventionist_id
-        session.add(existing_assignment)
-    else:
-        new_assignment = SupervisorAssignment(
-            supervisor_id=assignment.supervisor_id,
-            preventionist_id=assignment.preventionist_id
-        )
-        session.add(new_assignment)
 
-    session.commit()
-    return {"message": "Supervisor assigned successfully"}
+def run_import(
+    session: Session,
+    records: List[dict[str, Any]],
+    background: bool,
+    current_user: User,
+    response: Response,
+):
+    if background:
+        response.status_code = 202
+        return enqueue_job(session, "users.import", records, current_user)
+    return import_users(session, parse_rows(records))
+
+
+@router.post("/import", response_model=Union[UserImportReport, JobRead])
+def import_users_json(
+    users: List[UserCreate],
+    response: Response,
+    background: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_user_admin)
+):
+    """
+    Create many users at once; existing usernames/emails are reported as
+    duplicates. With `background` the import runs as a job (202 + job).
+    """
+    records = [user.model_dump(mode="json") for user in users]
+    return run_import(session, records, background, current_user, response)
+
+
+@router.post("/import/file", response_model=Union[UserImportReport, JobRead])
+def import_users_file(
+    file: UploadFile,
+    response: Response,
+    background: bool = False,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(require_user_admin)
+):
+    """Import users from a CSV (username,email,password,role) or JSON file"""
+    try:
+        content = file.file.read().decode("utf-8-sig")
+        if file.content_type == "application/json" or (file.filename or "").endswith(".json"):
+            records = json_records(content)
+        else:
+            records = csv_records(content)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read file: {e}")
+    return run_import(session, records, background, current_user, response)
 
 
 @router.post("/", response_model=UserRead)
 def create_user(user: UserCreate, session: Session = Depends(get_session)):
-    db_user = session.exec(select(User).where(User.username == user.username)).first()
-    if db_user:
+    taken = taken_logins(session, (user.username, user.email))
+    if user.username in taken:
         raise HTTPException(status_code=400, detail="Username already registered")
+    if user.email in taken:
+        raise HTTPException(status_code=400, detail="Email already registered")
 
     user_data = user.model_dump()
     password = user_data.pop("password")
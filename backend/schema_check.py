@@ -0,0 +1,70 @@
+import ast
+import logging
+import os
+from pathlib import Path
+from sqlalchemy import Engine, inspect, text
+
+logger = logging.getLogger(__name__)
+
+# What to do on startup when the database is not at the migrations head:
+# "error" refuses to start, "warn" logs and starts anyway, "off" skips the check
+SCHEMA_CHECK = (os.getenv("SCHEMA_CHECK") or "warn").lower()
+
+VERSIONS_DIR = Path(__file__).parent / "migrations" / "versions"
+
+
+def _revision_ids(value: object) -> set[str]:
+    if value is None:
+        return set()
+    if isinstance(value, str):
+        return {value}
+    return set(value)  # type: ignore[arg-type]
+
+
+def migration_heads(versions_dir: Path = VERSIONS_DIR) -> set[str]:
+    """
+    Head revisions of the migration scripts. The identifiers are read from the
+    module headers instead of loading the scripts, since importing Alembic
+    alone takes longer than the rest of the startup.
+    """
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in versions_dir.glob("*.py"):
+        for node in ast.parse(path.read_text(encoding="utf-8")).body:
+            if isinstance(node, ast.AnnAssign) and node.value is not None:
+                target, value = node.target, node.value
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+                target, value = node.targets[0], node.value
+            else:
+                continue
+            if not isinstance(target, ast.Name):
+                continue
+            if target.id == "revision":
+                revisions |= _revision_ids(ast.literal_eval(value))
+            elif target.id == "down_revision":
+                parents |= _revision_ids(ast.literal_eval(value))
+    return revisions - parents
+
+
+def database_revisions(engine: Engine) -> set[str]:
+    with engine.connect() as connection:
+        if not inspect(connection).has_table("alembic_version"):
+            return set()
+        return set(connection.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+def check_schema(engine: Engine) -> None:
+    """Compare the database revision with the migrations head (one query, no DDL)"""
+    if SCHEMA_CHECK == "off":
+        return
+    heads = migration_heads()
+    current = database_revisions(engine)
+    if current == heads:
+        return
+    message = (
+        f"Database schema is at {', '.join(sorted(current)) or 'no revision'} but the "
+        f"migrations head is {', '.join(sorted(heads))}; run `alembic upgrade head`"
+    )
+    if SCHEMA_CHECK == "error":
+        raise RuntimeError(message)
+    logger.warning(message)
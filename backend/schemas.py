@@ -1,8 +1,22 @@
 from __future__ import annotations
-from typing import Optional
-from datetime import datetime
+from typing import Any, Optional
+from datetime import date, datetime
+from enum import Enum
+from pydantic import field_validator, model_validator
 from sqlmodel import SQLModel
-from models import Role, TodoStatus
+from models import ActivityStatus, DeadlineStatus, JobStatus, Role, SyncEntity, TodoItem, TodoStatus
+
+
+def naive_server_time(value: datetime) -> datetime:
+    """
+    Timestamps are stored naive, in the server's local time (datetime.now()),
+    so client times with an offset (e.g. "...Z") are converted before being
+    compared with them.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone().replace(tzinfo=None)
+
 
 # Shared properties
 class UserBase(SQLModel):
@@ -28,11 +42,48 @@ class UserRead(UserBase):
     email: str
 
 
+class UserImportStatus(str, Enum):
+    created = "created"
+    duplicate = "duplicate"
+    invalid = "invalid"
+
+
+class UserImportRowResult(SQLModel):
+    row: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    status: UserImportStatus
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class UserImportReport(SQLModel):
+    created: int
+    skipped: int
+    results: list[UserImportRowResult]
+
+
 class SupervisorAssignmentCreate(SQLModel):
     supervisor_id: int
     preventionist_id: int
 
 
+class SupervisorReassignment(SQLModel):
+    """Move a set of supervisors to a preventionist in one transaction"""
+    preventionist_id: int
+    supervisor_ids: list[int]
+    # Also hand over the supervisors' open activities (not in review, not finished)
+    move_open_activities: bool = False
+
+
+class SupervisorReassignmentResult(SQLModel):
+    preventionist_id: int
+    supervisor_ids: list[int]
+    assignments_created: int
+    assignments_removed: int
+    activities_moved: int
+
+
 # Shared properties
 class ActivityBase(SQLModel):
     name: str
@@ -55,11 +106,77 @@ class ActivityUpdate(SQLModel):
 
 class ActivityRead(ActivityBase):
     id: int
+    status: ActivityStatus = ActivityStatus.pending
+    deadline_status: DeadlineStatus = DeadlineStatus.upcoming
     created_by: UserRead
     assigned_to: UserRead
+    template_id: Optional[int] = None
+    template_version: Optional[int] = None
     todos: list["TodoItemRead"] = []
 
 
+class ActivityField(str, Enum):
+    """Activity columns selectable through the `fields` query parameter"""
+    name = "name"
+    scheduled_date = "scheduled_date"
+    finished_date = "finished_date"
+    in_review = "in_review"
+    created_by_id = "created_by_id"
+    assigned_to_id = "assigned_to_id"
+    status = "status"
+    deadline_status = "deadline_status"
+
+
+class ActivityInclude(str, Enum):
+    """Related data that can be requested through the `include` query parameter"""
+    users = "users"
+    todos = "todos"
+
+
+class ActivityCompact(SQLModel):
+    """Activity row with only the requested fields set; users are referenced by id"""
+    id: int
+    name: Optional[str] = None
+    scheduled_date: Optional[datetime] = None
+    finished_date: Optional[datetime] = None
+    in_review: Optional[bool] = None
+    created_by_id: Optional[int] = None
+    assigned_to_id: Optional[int] = None
+    status: Optional[ActivityStatus] = None
+    deadline_status: Optional[DeadlineStatus] = None
+    todos: Optional[list[TodoItemRead]] = None
+
+
+class ActivityIncluded(SQLModel):
+    users: dict[int, UserRead] = {}
+
+
+class ActivityCollection(SQLModel):
+    """Normalized activity listing: related users are sideloaded once in `included`"""
+    data: list[ActivityCompact]
+    included: ActivityIncluded = ActivityIncluded()
+
+
+class ActivityCalendarRow(SQLModel):
+    """Compact activity row for calendar views, without nested users or todos"""
+    id: int
+    name: str
+    scheduled_date: datetime
+    assigned_to_id: int
+    in_review: bool
+    total_todos: int
+    done_todos: int
+
+
+class ActivityCalendarDay(SQLModel):
+    day: date
+    activities: list[ActivityCalendarRow]
+
+
+class ActivityBulkDelete(SQLModel):
+    deleted: int
+
+
 class TodoItemBase(SQLModel):
     description: str
     status: TodoStatus = TodoStatus.pending
@@ -68,6 +185,9 @@ class TodoItemBase(SQLModel):
 class TodoItemCreate(TodoItemBase):
     pass
 
+class TodoItemCreateList(SQLModel):
+    items: list[TodoItemCreate]
+
 class TodoItemUpdate(SQLModel):
     description: Optional[str] = None
     status: Optional[TodoStatus] = None
@@ -76,6 +196,16 @@ class TodoItemUpdate(SQLModel):
 class TodoItemRead(TodoItemBase):
     id: int
 
+    @model_validator(mode="before")
+    @classmethod
+    def template_description(cls, data: Any) -> Any:
+        # Todos created from a template store no text until they are edited
+        if isinstance(data, TodoItem) and data.description is None and data.template_todo:
+            return {name: getattr(data, name) for name in cls.model_fields} | {
+                "description": data.template_todo.description
+            }
+        return data
+
 
 class ActivityTemplateBase(SQLModel):
     name: str
@@ -93,6 +223,7 @@ class ActivityTemplateUpdate(SQLModel):
 
 class ActivityTemplateRead(ActivityTemplateBase):
     id: int
+    version: int = 1
     template_todos: list["TemplateTodoItemRead"] = []
 
 
@@ -134,3 +265,115 @@ class ActivityWithSupervisors(SQLModel):
     scheduled_dates: list[datetime]
     supervisor_count: int
     supervisors: list[UserRead]
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+class ChangeEventType(str, Enum):
+    activity_created = "activity_created"
+    activity_updated = "activity_updated"
+    activity_in_review = "activity_in_review"
+    activity_assigned = "activity_assigned"
+    activity_deleted = "activity_deleted"
+    todo_created = "todo_created"
+    todo_updated = "todo_updated"
+    todo_deleted = "todo_deleted"
+    assignment_changed = "assignment_changed"
+    resync = "resync"
+
+
+class ChangeEvent(SQLModel):
+    """Notification pushed to dashboards; clients refetch only what it points to"""
+    type: ChangeEventType
+    activity_id: Optional[int] = None
+    todo_id: Optional[int] = None
+    supervisor_id: Optional[int] = None
+    preventionist_id: Optional[int] = None
+
+
+class ActivitySyncRead(ActivityBase):
+    id: int
+    created_by_id: Optional[int] = None
+    status: ActivityStatus = ActivityStatus.pending
+    deadline_status: DeadlineStatus = DeadlineStatus.upcoming
+    updated_at: datetime
+
+
+class TodoItemSyncRead(TodoItemRead):
+    updated_at: datetime
+
+
+class TombstoneRead(SQLModel):
+    entity: SyncEntity
+    entity_id: int
+    activity_id: Optional[int] = None
+    deleted_at: datetime
+
+
+class SyncChanges(SQLModel):
+    """Rows changed and deleted since a sync token, and the token for the next call"""
+    activities: list[ActivitySyncRead]
+    todos: list[TodoItemSyncRead]
+    tombstones: list[TombstoneRead]
+    next_token: str
+
+
+class TodoSyncChange(SQLModel):
+    id: int
+    status: Optional[TodoStatus] = None
+    description: Optional[str] = None
+    # Version the client last saw; the change is rejected if the server row is newer
+    updated_at: Optional[datetime] = None
+
+    @field_validator("updated_at")
+    @classmethod
+    def server_time(cls, value: Optional[datetime]) -> Optional[datetime]:
+        return naive_server_time(value) if value is not None else None
+
+
+class TodoSyncBatch(SQLModel):
+    changes: list[TodoSyncChange]
+
+
+class TodoSyncOutcome(str, Enum):
+    applied = "applied"
+    conflict = "conflict"
+    not_found = "not_found"
+    forbidden = "forbidden"
+
+
+class TodoSyncResult(SQLModel):
+    id: int
+    outcome: TodoSyncOutcome
+    todo: Optional[TodoItemSyncRead] = None
+
+
+class JobRead(SQLModel):
+    id: int
+    kind: str
+    status: JobStatus
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class SearchEntity(str, Enum):
+    activity = "activity"
+    template = "template"
+    template_todo = "template_todo"
+    todo = "todo"
+
+
+class SearchHit(SQLModel):
+    entity: SearchEntity
+    id: int
+    # Activity of a todo, template of a template todo
+    parent_id: Optional[int] = None
+    text: str
+    score: float
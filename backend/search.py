@@ -0,0 +1,92 @@
+"""
+Full-text search over activity names, templates and todo descriptions.
+
+The searchindex table holds one row per searchable record and is kept up to
+date by triggers on the source tables (see the migration that creates it),
+so every write, including bulk statements, reindexes just the rows it
+touched. Row ids encode the source: `<source id> * 4 + <kind>`, the kind
+being the position of the source in SEARCH_SOURCES.
+
+- SQLite: FTS5 table with the `unicode61 remove_diacritics 2` tokenizer
+  (case and accent folding), ranked by bm25. FTS5 has no Spanish stemmer, so
+  every term is matched as a prefix ("andamio" finds "Andamios").
+- PostgreSQL: GIN-indexed tsvector built with the es_unaccent configuration
+  (unaccent, then the Spanish stemmer), ranked by ts_rank.
+
+Batch migrations recreate SQLite tables and drop their triggers; they have
+to create the search triggers of those tables again.
+"""
+import re
+from typing import Optional, Sequence
+from sqlalchemy import bindparam, text
+from sqlmodel import Session
+from schemas import SearchEntity, SearchHit
+
+# Kind of each source, by position; the index ids leave room for four
+SEARCH_SOURCES = (
+    SearchEntity.activity,
+    SearchEntity.template,
+    SearchEntity.template_todo,
+    SearchEntity.todo,
+)
+SEARCH_KINDS = 4
+
+SQLITE_SEARCH = text(
+    """
+    SELECT rowid AS id, parent_id, body, -bm25(searchindex) AS score
+    FROM searchindex
+    WHERE searchindex MATCH :query AND tenant_id = :tenant_id AND rowid % 4 IN :kinds
+    ORDER BY score DESC, rowid
+    LIMIT :limit OFFSET :offset
+    """
+).bindparams(bindparam("kinds", expanding=True))
+
+POSTGRES_SEARCH = text(
+    """
+    SELECT id, parent_id, body, ts_rank(document, query) AS score
+    FROM searchindex, websearch_to_tsquery('es_unaccent', :query) AS query
+    WHERE document @@ query AND tenant_id = :tenant_id AND id % 4 IN :kinds
+    ORDER BY score DESC, id
+    LIMIT :limit OFFSET :offset
+    """
+).bindparams(bindparam("kinds", expanding=True))
+
+
+def fts5_query(query: str) -> str:
+    """Every word as a quoted prefix term, so input is never parsed as FTS5 syntax"""
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", query))
+
+
+def search(
+    session: Session,
+    query: str,
+    tenant_id: int,
+    entities: Optional[Sequence[SearchEntity]] = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> list[SearchHit]:
+    """Best matches first within the tenant, optionally restricted to some entities"""
+    kinds = [
+        kind for kind, entity in enumerate(SEARCH_SOURCES) if not entities or entity in entities
+    ]
+    if session.get_bind().dialect.name == "sqlite":
+        statement, query = SQLITE_SEARCH, fts5_query(query)
+    else:
+        statement = POSTGRES_SEARCH
+    if not query.strip():
+        return []
+
+    rows = session.connection().execute(
+        statement,
+        {"query": query, "tenant_id": tenant_id, "kinds": kinds, "offset": offset, "limit": limit},
+    )
+    return [
+        SearchHit(
+            entity=SEARCH_SOURCES[row.id % SEARCH_KINDS],
+            id=row.id // SEARCH_KINDS,
+            parent_id=row.parent_id,
+            text=row.body,
+            score=row.score,
+        )
+        for row in rows
+    ]
@@ -1,8 +1,8 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import os
+from functools import cache
 from dotenv import load_dotenv
-from passlib.context import CryptContext
 import jwt
 
 load_dotenv()
@@ -14,15 +14,35 @@ if not SECRET_KEY:
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@cache
+def get_pwd_context():
+    """Built on first use, so the bcrypt backend is not loaded at startup"""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+def token_claims(token: str) -> Optional[dict]:
+    """Claims of a valid access token, None if the token is invalid."""
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+
+
+def token_subject(token: str) -> Optional[str]:
+    """Subject (username) of a valid access token, None if the token is invalid."""
+    claims = token_claims(token)
+    return claims.get("sub") if claims else None
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,36 @@
+from typing import Any, TypeVar
+from fastapi import Response
+from pydantic import TypeAdapter
+from schemas import ActivityCollection, ActivityRead, TemplateTodoItemRead, TodoItemRead
+
+T = TypeVar("T")
+
+# Adapters are built once at import time so the validators/serializers for
+# the response types are compiled a single time instead of per request.
+activity_read_list_adapter = TypeAdapter(list[ActivityRead])
+activity_collection_adapter = TypeAdapter(ActivityCollection)
+todo_item_read_list_adapter = TypeAdapter(list[TodoItemRead])
+template_todo_item_read_list_adapter = TypeAdapter(list[TemplateTodoItemRead])
+
+
+def json_response(
+    adapter: TypeAdapter[T],
+    value: Any,
+    *,
+    status_code: int = 200,
+    exclude_unset: bool = False,
+) -> Response:
+    """
+    Validate `value` (ORM objects are read through their attributes) and dump
+    it straight to JSON bytes with the adapter's compiled serializer.
+
+    Returning a Response makes FastAPI skip its own response_model validation
+    and encoding, so `response_model` is kept on the route only for the
+    OpenAPI schema.
+    """
+    validated = adapter.validate_python(value, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(validated, exclude_unset=exclude_unset),
+        status_code=status_code,
+        media_type="application/json",
+    )
@@ -0,0 +1,84 @@
+"""
+Startup profile report: where the time to first response goes.
+
+    python startup_profile.py [--top N]
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter and lists
+the slowest imports, then times the lifespan startup and the first request.
+Run it twice to compare a cold bytecode cache with a warm one.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+APP_MODULES = {path.stem for path in BACKEND_DIR.glob("*.py")} | {"routers"}
+
+TIMING_SCRIPT = """
+import time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client_imported = time.perf_counter()
+with TestClient(main.app) as client:
+    ready = time.perf_counter()
+    client.get("/")
+    served = time.perf_counter()
+print(imported - started, ready - client_imported, served - ready)
+"""
+
+
+def import_times() -> list[tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for every module imported by main"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def print_report(top: int) -> None:
+    rows = import_times()
+    main_total = next(cumulative for name, _, cumulative in rows if name == "main")
+
+    print(f"import main: {main_total / 1000:.0f} ms\n")
+    print(f"Slowest imports by self time (top {top}):")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}")
+
+    print("\nApplication modules by total time:")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2]):
+        if name.split(".")[0] in APP_MODULES:
+            print(f"  {self_us / 1000:8.1f} ms self {cumulative_us / 1000:8.1f} ms total  {name}")
+
+    result = subprocess.run(
+        [sys.executable, "-c", TIMING_SCRIPT],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported, ready, served = (float(value) for value in result.stdout.split()[-3:])
+    print(
+        f"\nimport {imported * 1000:.0f} ms, lifespan {ready * 1000:.0f} ms, "
+        f"first request {served * 1000:.0f} ms, "
+        f"total {(imported + ready + served) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    print_report(args.top)
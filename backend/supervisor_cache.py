@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from typing import Any, Optional
+from sqlalchemy import event, update
+from sqlmodel import Session, col, select
+from database import WEB_CONCURRENCY
+from models import CacheVersion, SupervisorAssignment, User
+from schemas import UserRead
+
+# Upper bound on staleness for changes made without the ORM
+SUPERVISOR_CACHE_TTL = float(os.getenv("SUPERVISOR_CACHE_TTL", "300"))
+
+# Row of the cacheversion table bumped by changes to users or assignments
+CACHE_NAME = "supervisors"
+
+
+class SupervisorDirectory:
+    """
+    Cached preventionist -> supervisors mapping.
+    Entries are dropped whenever a transaction that touched users or
+    supervisor assignments commits, and expire after SUPERVISOR_CACHE_TTL.
+    A `shared` directory also drops them when such a transaction committed
+    in another process: those transactions bump the cacheversion row, which
+    every read compares with the version its entries were loaded under.
+    """
+
+    def __init__(self, ttl: float = SUPERVISOR_CACHE_TTL, shared: bool = False) -> None:
+        self.ttl = ttl
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries: dict[int, tuple[float, tuple[UserRead, ...]]] = {}
+        # Bumped on every invalidation, so a load that raced with one is not stored
+        self._generation = 0
+        self._shared_version: Optional[int] = None
+
+    def get_supervisors(self, session: Session, preventionist_id: int) -> list[UserRead]:
+        if self.shared:
+            self._check_version(session)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(preventionist_id)
+            if entry is not None and entry[0] > now:
+                return list(entry[1])
+            generation = self._generation
+
+        supervisors = tuple(
+            UserRead.model_validate(user)
+            for user in session.exec(
+                select(User)
+                .join(
+                    SupervisorAssignment,
+                    col(User.id) == SupervisorAssignment.supervisor_id,
+                )
+                .where(SupervisorAssignment.preventionist_id == preventionist_id)
+                .order_by(col(User.id))
+            ).all()
+        )
+
+        with self._lock:
+            if generation == self._generation:
+                self._entries[preventionist_id] = (now + self.ttl, supervisors)
+        return list(supervisors)
+
+    def get_supervisor_ids(self, session: Session, preventionist_id: int) -> list[int]:
+        return [supervisor.id for supervisor in self.get_supervisors(session, preventionist_id)]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def _check_version(self, session: Session) -> None:
+        version = session.exec(
+            select(CacheVersion.version).where(CacheVersion.name == CACHE_NAME)
+        ).one()
+        with self._lock:
+            if version == self._shared_version:
+                return
+            self._shared_version = version
+            self._generation += 1
+            self._entries.clear()
+
+
+# Worker processes tell each other about changes through the database
+supervisor_directory = SupervisorDirectory(shared=WEB_CONCURRENCY > 1)
+
+_DIRTY_KEY = "supervisor_directory_dirty"
+
+
+@event.listens_for(Session, "after_flush")
+def _track_directory_changes(session: Session, flush_context: Any) -> None:
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if session.info.get(_DIRTY_KEY):
+        return
+    if any(isinstance(obj, (User, SupervisorAssignment)) for obj in changed):
+        session.info[_DIRTY_KEY] = True
+        if supervisor_directory.shared:
+            # In the same transaction, so other processes see both at once
+            versions = CacheVersion.__table__.c  # type: ignore
+            session.connection().execute(
+                update(CacheVersion.__table__)  # type: ignore
+                .where(versions.name == CACHE_NAME)
+                .values(version=versions.version + 1)
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    # Invalidate only once the change is visible to other sessions
+    if session.info.pop(_DIRTY_KEY, False):
+        supervisor_directory.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,149 @@
+"""
+Immutable template versions.
+
+Activities record the (template, version) they were created from, and their
+todos point at the template items of that version. Once an activity uses the
+current version, the next edit of the template's items opens a new version;
+items referenced by todos are never modified, an edit retires them and adds
+a copy, so existing activities keep what they were created with. Only the
+changed items are written: the others stay in the new version through their
+added_in_version/retired_in_version range.
+"""
+from datetime import datetime
+from typing import Optional, Sequence
+from sqlalchemy import insert, literal, or_
+from sqlmodel import Session, col, func, select
+from models import Activity, ActivityTemplate, TemplateTodoItem, TodoItem, TodoStatus
+
+
+def items_of_version(template_id: int, version: int) -> list:
+    """Conditions selecting the items of a template version"""
+    return [
+        TemplateTodoItem.template_id == template_id,
+        col(TemplateTodoItem.added_in_version) <= version,
+        or_(
+            col(TemplateTodoItem.retired_in_version).is_(None),
+            col(TemplateTodoItem.retired_in_version) > version,
+        ),
+    ]
+
+
+def writable_version(session: Session, template: ActivityTemplate) -> int:
+    """Version item edits go to: the current one until an activity uses it"""
+    used = session.exec(
+        select(Activity.id)
+        .where(Activity.template_id == template.id, Activity.template_version == template.version)
+        .limit(1)
+    ).first()
+    if used is not None:
+        template.version += 1
+        session.add(template)
+    return template.version
+
+
+def is_referenced(session: Session, item: TemplateTodoItem) -> bool:
+    return (
+        session.exec(
+            select(TodoItem.id).where(TodoItem.template_todo_id == item.id).limit(1)
+        ).first()
+        is not None
+    )
+
+
+def add_items(
+    session: Session, template: ActivityTemplate, descriptions: Sequence[str]
+) -> Sequence[TemplateTodoItem]:
+    """Append items to the template's writable version, with one INSERT ... RETURNING"""
+    if not descriptions:
+        return []
+    version = writable_version(session, template)
+    last_position = session.exec(
+        select(func.max(TemplateTodoItem.position)).where(
+            TemplateTodoItem.template_id == template.id
+        )
+    ).one()
+    # Bulk INSERTs skip the tenant stamping
+    return session.scalars(
+        insert(TemplateTodoItem).returning(TemplateTodoItem),
+        [
+            {
+                "description": description,
+                "template_id": template.id,
+                "tenant_id": template.tenant_id,
+                "position": (last_position or 0) + offset,
+                "added_in_version": version,
+            }
+            for offset, description in enumerate(descriptions, start=1)
+        ],
+    ).all()
+
+
+def edit_item(session: Session, item: TemplateTodoItem, description: str) -> TemplateTodoItem:
+    """
+    Change an item's text. Returns the item itself, or the copy replacing it
+    when the old text has to be kept for existing activities.
+    """
+    template = session.get(ActivityTemplate, item.template_id) if item.template_id else None
+    version = writable_version(session, template) if template else item.added_in_version
+    if item.added_in_version == version and not is_referenced(session, item):
+        item.description = description
+        session.add(item)
+        return item
+
+    item.retired_in_version = version
+    session.add(item)
+    replacement = TemplateTodoItem(
+        description=description,
+        template_id=item.template_id,
+        position=item.position,
+        added_in_version=version,
+    )
+    session.add(replacement)
+    return replacement
+
+
+def remove_item(session: Session, item: TemplateTodoItem) -> None:
+    """Drop an item from the template's writable version (and from the
+    database if nothing uses it)"""
+    template = session.get(ActivityTemplate, item.template_id) if item.template_id else None
+    version = writable_version(session, template) if template else item.added_in_version
+    if item.added_in_version == version and not is_referenced(session, item):
+        session.delete(item)
+        return
+    item.retired_in_version = version
+    session.add(item)
+
+
+def instantiate_template(
+    session: Session, activity: Activity, template: ActivityTemplate, now: Optional[datetime] = None
+) -> None:
+    """
+    Link a new activity to the template's current version and create its
+    todos with a single INSERT ... SELECT over the version's items.
+
+    The todos stay rows rather than being derived from the version: clients
+    address them by id (PATCH /todos, the search index), sync compares their
+    updated_at and tombstones per todo, and an activity can add, edit or
+    delete todos of its own. Each row only holds its status and a reference
+    to the template item, whose text is not copied.
+    """
+    activity.template_id = template.id
+    activity.template_version = template.version
+    session.add(activity)
+    session.flush()
+    # Core INSERTs skip the ORM defaults and the tenant stamping
+    columns = TodoItem.__table__.c  # type: ignore
+    session.exec(
+        insert(TodoItem).from_select(
+            ["activity_id", "template_todo_id", "status", "tenant_id", "updated_at"],
+            select(
+                literal(activity.id),
+                TemplateTodoItem.id,
+                literal(TodoStatus.pending, columns.status.type),
+                literal(activity.tenant_id),
+                literal(now or datetime.now(), columns.updated_at.type),
+            )
+            .where(*items_of_version(template.id, template.version))  # type: ignore
+            .order_by(col(TemplateTodoItem.position), col(TemplateTodoItem.id)),
+        )
+    )
@@ -0,0 +1,106 @@
+"""
+Tenant (company) scoping of sessions.
+
+A session scoped to a tenant gets `tenant_id = <tenant>` added to every ORM
+select, update and delete on TenantScoped models (including relationship
+loads), and stamps that tenant on the rows it inserts. Queries that must see
+every tenant (e.g. username uniqueness) opt out with
+`.execution_options(all_tenants=True)`.
+
+Create a tenant and its first admin:
+
+    python tenancy.py "<company name>" <admin email> <password>
+"""
+import sys
+from typing import Any, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, with_loader_criteria
+from sqlmodel import Session
+from models import Role, Tenant, TenantScoped, User
+from security import get_password_hash, token_claims
+
+TENANT_ID = "tenant_id"
+
+# Tenant of the rows written by unscoped sessions (seed data, public sign-up)
+DEFAULT_TENANT_ID = 1
+
+# Scope of requests without a valid token: no tenant has this id, so they see
+# no tenant's rows, while the rows they write (public sign-up) still go to
+# the default tenant
+ANONYMOUS_TENANT_ID = 0
+
+# The criteria are added per table model: SQLModel mixins have no mapped columns
+TENANT_MODELS = TenantScoped.__subclasses__()
+
+
+def scope_session(session: Session, tenant_id: Optional[int]) -> None:
+    session.info[TENANT_ID] = tenant_id
+
+
+def session_tenant(session: Session) -> Optional[int]:
+    return session.info.get(TENANT_ID)
+
+
+def token_tenant(authorization: Optional[str]) -> int:
+    """Tenant claim of a bearer token, ANONYMOUS_TENANT_ID without a (valid) one"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return ANONYMOUS_TENANT_ID
+    claims = token_claims(token)
+    tenant_id = claims.get("tid") if claims else None
+    return tenant_id if isinstance(tenant_id, int) else ANONYMOUS_TENANT_ID
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _add_tenant_criteria(execute_state: ORMExecuteState) -> None:
+    tenant_id = execute_state.session.info.get(TENANT_ID)
+    if (
+        tenant_id is None
+        or execute_state.is_column_load
+        or not (execute_state.is_select or execute_state.is_update or execute_state.is_delete)
+        or execute_state.execution_options.get("all_tenants", False)
+    ):
+        return
+    execute_state.statement = execute_state.statement.options(
+        *(
+            with_loader_criteria(model, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+            for model in TENANT_MODELS
+        )
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tenant(session: Session, flush_context: Any, instances: Any) -> None:
+    # Unscoped and anonymous sessions write to the default tenant
+    tenant_id = session.info.get(TENANT_ID) or DEFAULT_TENANT_ID
+    for instance in session.new:
+        if isinstance(instance, TenantScoped) and instance.tenant_id is None:
+            instance.tenant_id = tenant_id
+
+
+def create_tenant(session: Session, name: str, admin_email: str, admin_password: str) -> Tenant:
+    tenant = Tenant(name=name)
+    session.add(tenant)
+    session.flush()
+    session.add(
+        User(
+            tenant_id=tenant.id,
+            username=admin_email,
+            email=admin_email,
+            role=Role.admin,
+            password_hash=get_password_hash(admin_password),
+        )
+    )
+    session.commit()
+    session.refresh(tenant)
+    return tenant
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        sys.exit(__doc__)
+    from database import engine
+
+    with Session(engine) as session:
+        tenant = create_tenant(session, *sys.argv[1:])
+    print(f"Created tenant {tenant.id} ({tenant.name})")
@@ -0,0 +1,133 @@
+"""
+Test setup: every test gets a fresh copy of a database migrated to head, and a
+TestClient of the app without its lifespan (no job runner or sweeper threads).
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+TEST_DIR = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+DATABASE_PATH = TEST_DIR / "test.db"
+TEMPLATE_PATH = TEST_DIR / "template.db"
+
+# Read at import time by the app modules
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["RATE_LIMIT_LOGIN"] = "10000/second"
+os.environ["RATE_LIMIT_STATS"] = "10000/second"
+os.environ["RATE_LIMIT_DEFAULT"] = "10000/second"
+os.environ["USER_IMPORT_WORKERS"] = "1"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import pytest  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+from database import engine  # noqa: E402
+from main import app  # noqa: E402
+from activity_lifecycle import refresh_activity_statuses  # noqa: E402
+from models import Activity, Role, TodoItem, TodoStatus, User  # noqa: E402
+from security import create_access_token, get_password_hash  # noqa: E402
+from supervisor_cache import supervisor_directory  # noqa: E402
+
+PASSWORD = "secret"
+PASSWORD_HASH = get_password_hash(PASSWORD)
+
+
+def pytest_sessionstart(session):
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{TEMPLATE_PATH}")
+    command.upgrade(config, "head")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def database():
+    engine.dispose()
+    for suffix in ("-wal", "-shm"):
+        Path(f"{DATABASE_PATH}{suffix}").unlink(missing_ok=True)
+    shutil.copyfile(TEMPLATE_PATH, DATABASE_PATH)
+    # Row ids restart with every copy
+    supervisor_directory.invalidate()
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def session():
+    with Session(engine) as session:
+        yield session
+
+
+def make_user(session: Session, role: Role, name: str, tenant_id: int = 1) -> User:
+    user = User(
+        tenant_id=tenant_id,
+        username=name,
+        email=f"{name}@example.com",
+        role=role,
+        password_hash=PASSWORD_HASH,
+    )
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def make_activity(session: Session, creator: User, assignee: User, **fields) -> Activity:
+    activity = Activity(
+        tenant_id=creator.tenant_id,
+        created_by_id=creator.id,
+        assigned_to_id=assignee.id,
+        **{"name": "Inspection", **fields},
+    )
+    session.add(activity)
+    session.commit()
+    session.refresh(activity)
+    return activity
+
+
+def make_todos(session: Session, activity: Activity, *statuses: TodoStatus) -> list[TodoItem]:
+    todos = [
+        TodoItem(
+            tenant_id=activity.tenant_id,
+            activity_id=activity.id,
+            description=f"Todo {index}",
+            status=status,
+        )
+        for index, status in enumerate(statuses, start=1)
+    ]
+    session.add_all(todos)
+    refresh_activity_statuses(session, [activity])
+    session.commit()
+    for todo in todos:
+        session.refresh(todo)
+    return todos
+
+
+def auth_headers(user: User) -> dict[str, str]:
+    token = create_access_token(data={"sub": user.username, "tid": user.tenant_id})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def preventionist(session: Session) -> User:
+    return make_user(session, Role.preventionist, "preventionist")
+
+
+@pytest.fixture
+def supervisor(session: Session) -> User:
+    return make_user(session, Role.supervisor, "supervisor")
@@ -0,0 +1,50 @@
+from datetime import datetime
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import Role, TodoStatus
+
+
+def test_calendar_groups_the_window_by_day(client, session, preventionist, supervisor):
+    other = make_user(session, Role.supervisor, "other")
+    unlisted = make_user(session, Role.supervisor, "unlisted")
+    first = make_activity(session, preventionist, supervisor, scheduled_date=datetime(2026, 3, 2, 9))
+    second = make_activity(session, preventionist, other, scheduled_date=datetime(2026, 3, 2, 8))
+    third = make_activity(session, preventionist, supervisor, scheduled_date=datetime(2026, 3, 31, 23))
+    make_activity(session, preventionist, supervisor, scheduled_date=datetime(2026, 4, 1))
+    make_activity(session, preventionist, supervisor, scheduled_date=datetime(2026, 2, 28))
+    make_activity(session, preventionist, unlisted, scheduled_date=datetime(2026, 3, 2))
+    make_todos(session, first, TodoStatus.yes, TodoStatus.pending)
+
+    response = client.get(
+        "/activities/calendar",
+        params={
+            "start": "2026-03-01T00:00:00",
+            "end": "2026-03-31T23:59:59",
+            "assignee_ids": [supervisor.id, other.id],
+        },
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 200
+    days = response.json()
+    assert [day["day"] for day in days] == ["2026-03-02", "2026-03-31"]
+    assert [a["id"] for a in days[0]["activities"]] == [second.id, first.id]
+    assert [a["id"] for a in days[1]["activities"]] == [third.id]
+    assert days[0]["activities"][1] == {
+        "id": first.id,
+        "name": "Inspection",
+        "scheduled_date": "2026-03-02T09:00:00",
+        "assigned_to_id": supervisor.id,
+        "in_review": False,
+        "total_todos": 2,
+        "done_todos": 1,
+    }
+
+
+def test_calendar_needs_assignees(client, preventionist):
+    response = client.get(
+        "/activities/calendar",
+        params={"start": "2026-03-01T00:00:00", "end": "2026-03-31T00:00:00"},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 422
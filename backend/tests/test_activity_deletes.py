@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import Activity, Role, TodoItem, TodoStatus, Tombstone
+
+
+def search(client, user, query: str) -> list[str]:
+    response = client.get("/search/", params={"q": query}, headers=auth_headers(user))
+    return [hit["entity"] for hit in response.json()]
+
+
+def test_deleting_an_activity_deletes_its_todos(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor, name="Scaffolding")
+    kept = make_activity(session, preventionist, supervisor)
+    make_todos(session, activity, TodoStatus.pending, TodoStatus.yes)
+    make_todos(session, kept, TodoStatus.pending)
+    assert search(client, preventionist, "todo") == ["todo", "todo", "todo"]
+
+    response = client.delete(f"/activities/{activity.id}", headers=auth_headers(preventionist))
+
+    assert response.status_code == 204
+    assert [t.activity_id for t in session.exec(select(TodoItem)).all()] == [kept.id]
+    assert search(client, preventionist, "todo") == ["todo"]
+    assert search(client, preventionist, "scaffolding") == []
+    [tombstone] = session.exec(select(Tombstone)).all()
+    assert (tombstone.entity_id, tombstone.assigned_to_id) == (activity.id, supervisor.id)
+
+
+def test_bulk_delete_by_date_range(client, session, preventionist, supervisor):
+    march = datetime(2026, 3, 1)
+    in_range = [
+        make_activity(session, preventionist, supervisor, scheduled_date=march + timedelta(days=day))
+        for day in (0, 10, 30)
+    ]
+    later = make_activity(session, preventionist, supervisor, scheduled_date=march + timedelta(days=31))
+    colleague = make_user(session, Role.preventionist, "colleague")
+    not_mine = make_activity(session, colleague, supervisor, scheduled_date=march)
+    for activity in in_range:
+        make_todos(session, activity, TodoStatus.pending)
+    deleted_ids = [activity.id for activity in in_range]
+
+    response = client.delete(
+        "/activities/",
+        params={"start": march.isoformat(), "end": (march + timedelta(days=30)).isoformat()},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.json() == {"deleted": 3}
+    # Another preventionist's activity in the range is not touched
+    assert [a.id for a in session.exec(select(Activity)).all()] == [later.id, not_mine.id]
+    assert session.exec(select(TodoItem)).all() == []
+    assert sorted(t.entity_id for t in session.exec(select(Tombstone)).all()) == deleted_ids
+
+
+def test_bulk_delete_needs_a_filter_and_a_preventionist(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+
+    assert client.delete("/activities/", headers=auth_headers(preventionist)).status_code == 400
+    response = client.delete("/activities/", params={"ids": [activity.id]}, headers=auth_headers(supervisor))
+    assert response.status_code == 403
+    assert session.get(Activity, activity.id) is not None
+
+
+def test_deleting_a_template_keeps_the_todos_of_its_activities(client, session, preventionist, supervisor):
+    headers = auth_headers(preventionist)
+    template = client.post("/activity-templates/", json={"name": "Checklist"}, headers=headers).json()
+    client.post(
+        f"/activity-templates/{template['id']}/items",
+        json={"items": [{"description": "Helmets"}]},
+        headers=headers,
+    )
+    activity = client.post(
+        "/activities/",
+        json={"name": "", "assigned_to_id": supervisor.id, "activity_template_id": template["id"]},
+        headers=headers,
+    ).json()
+
+    assert client.delete(f"/activity-templates/{template['id']}", headers=headers).status_code == 204
+
+    activity = client.get(f"/activities/{activity['id']}", headers=headers).json()
+    assert activity["template_id"] is None
+    [todo] = activity["todos"]
+    assert todo["description"] == "Helmets"
+    # The kept item is no longer listed with the template items
+    response = client.get("/todos-template/", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []
@@ -0,0 +1,138 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from activity_lifecycle import ACTIVITY_TRANSITIONS, lifecycle_status, refresh_activity_statuses
+from conftest import auth_headers, make_activity, make_todos
+from models import Activity, ActivityStatus, ActivityTemplate, TemplateTodoItem, TodoStatus
+
+
+def test_lifecycle_status():
+    assert lifecycle_status(False, None, 0, 0) == ActivityStatus.pending
+    assert lifecycle_status(False, None, 3, 0) == ActivityStatus.pending
+    assert lifecycle_status(False, None, 3, 1) == ActivityStatus.in_progress
+    assert lifecycle_status(False, None, 3, 3) == ActivityStatus.done
+    assert lifecycle_status(True, None, 3, 3) == ActivityStatus.in_review
+    assert lifecycle_status(True, datetime.now(), 3, 3) == ActivityStatus.finished
+
+
+def test_every_status_can_be_left():
+    assert set(ACTIVITY_TRANSITIONS) == set(ActivityStatus)
+    for status, targets in ACTIVITY_TRANSITIONS.items():
+        assert targets and status not in targets
+
+
+def set_todo(client, user, todo, status: str):
+    return client.patch(f"/todos/{todo.id}", json={"status": status}, headers=auth_headers(user))
+
+
+def test_status_follows_the_todos(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    first, second = make_todos(session, activity, TodoStatus.pending, TodoStatus.pending)
+    headers = auth_headers(preventionist)
+
+    assert set_todo(client, preventionist, first, "yes").status_code == 200
+    assert client.get(f"/activities/{activity.id}", headers=headers).json()["status"] == "in_progress"
+
+    assert set_todo(client, preventionist, second, "not_apply").status_code == 200
+    assert client.get(f"/activities/{activity.id}", headers=headers).json()["status"] == "done"
+
+    response = client.patch(f"/activities/{activity.id}", json={"in_review": True}, headers=headers)
+    assert response.json()["status"] == "in_review"
+
+    response = client.patch(
+        f"/activities/{activity.id}",
+        json={"in_review": True, "finished_date": datetime.now().isoformat()},
+        headers=headers,
+    )
+    assert response.json()["status"] == "finished"
+
+
+def test_review_needs_every_todo_answered(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    make_todos(session, activity, TodoStatus.yes, TodoStatus.pending)
+
+    response = client.patch(
+        f"/activities/{activity.id}", json={"in_review": True}, headers=auth_headers(preventionist)
+    )
+
+    assert response.status_code == 400
+    session.refresh(activity)
+    assert activity.status == ActivityStatus.in_progress
+
+
+def test_todos_in_review_cannot_be_reopened(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor, in_review=True)
+    todo = make_todos(session, activity, TodoStatus.yes)[0]
+    session.refresh(activity)
+    assert activity.status == ActivityStatus.in_review
+
+    assert set_todo(client, preventionist, todo, "pending").status_code == 400
+    assert set_todo(client, preventionist, todo, "no").status_code == 200
+
+
+def test_activity_without_todos_can_be_finished(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+
+    response = client.patch(
+        f"/activities/{activity.id}",
+        json={"finished_date": datetime.now().isoformat()},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "finished"
+
+    response = client.patch(
+        f"/activities/{activity.id}", json={"finished_date": None}, headers=auth_headers(preventionist)
+    )
+    assert response.json()["status"] == "pending"
+
+
+def test_create_finished_activity(client, session, preventionist, supervisor):
+    response = client.post(
+        "/activities/",
+        json={
+            "name": "Done on paper",
+            "assigned_to_id": supervisor.id,
+            "finished_date": datetime.now().isoformat(),
+        },
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 201
+    assert response.json()["status"] == "finished"
+
+
+def test_create_finished_activity_with_pending_todos(client, session, preventionist, supervisor):
+    template = ActivityTemplate(tenant_id=1, name="Checklist")
+    session.add(template)
+    session.commit()
+    session.add(TemplateTodoItem(tenant_id=1, template_id=template.id, description="Helmets"))
+    session.commit()
+
+    response = client.post(
+        "/activities/",
+        json={
+            "name": "Checklist",
+            "assigned_to_id": supervisor.id,
+            "activity_template_id": template.id,
+            "finished_date": datetime.now().isoformat(),
+        },
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 400
+
+
+def test_invalid_transition_is_rejected(session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    make_todos(session, activity, TodoStatus.yes, TodoStatus.pending)
+    activity = session.get(Activity, activity.id)
+    # Out of review with a todo left to answer, which no request can lead to
+    activity.status = ActivityStatus.in_review
+
+    with pytest.raises(HTTPException) as error:
+        refresh_activity_statuses(session, [activity])
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Cannot move activity from in_review to in_progress."
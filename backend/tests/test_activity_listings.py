@@ -0,0 +1,65 @@
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import Role, TodoStatus
+from schemas import ActivityRead
+
+
+def test_fields_select_the_columns(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+
+    response = client.get(
+        "/activities/", params={"fields": ["name", "status"]}, headers=auth_headers(preventionist)
+    )
+
+    assert response.json() == {
+        "data": [{"id": activity.id, "name": "Inspection", "status": "pending"}],
+        "included": {},
+    }
+
+
+def test_include_sideloads_users_and_todos(client, session, preventionist, supervisor):
+    other = make_user(session, Role.supervisor, "other")
+    first = make_activity(session, preventionist, supervisor)
+    second = make_activity(session, preventionist, other)
+    todos = make_todos(session, first, TodoStatus.yes)
+
+    response = client.get(
+        f"/activities/by-creator/{preventionist.id}",
+        params={"fields": ["assigned_to_id"], "include": ["users", "todos"]},
+        headers=auth_headers(preventionist),
+    )
+
+    body = response.json()
+    assert [(a["id"], a["assigned_to_id"]) for a in body["data"]] == [
+        (first.id, supervisor.id),
+        (second.id, other.id),
+    ]
+    assert [t["id"] for t in body["data"][0]["todos"]] == [todos[0].id]
+    assert body["data"][1]["todos"] == []
+    # Each user once, however many activities reference them
+    assert sorted(int(user_id) for user_id in body["included"]["users"]) == sorted(
+        [preventionist.id, supervisor.id, other.id]
+    )
+
+
+def test_listings_filter_by_status(client, session, preventionist, supervisor):
+    done = make_activity(session, preventionist, supervisor)
+    make_todos(session, done, TodoStatus.yes)
+    make_activity(session, preventionist, supervisor)
+
+    response = client.get("/activities/", params={"status": "done"}, headers=auth_headers(preventionist))
+
+    assert [a["id"] for a in response.json()] == [done.id]
+
+
+def test_listings_without_fields_keep_the_full_shape(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    make_todos(session, activity, TodoStatus.no)
+
+    for path in ("/activities/", f"/activities/by-assignee/{supervisor.id}"):
+        response = client.get(path, headers=auth_headers(preventionist))
+        assert response.headers["content-type"] == "application/json"
+        [listed] = response.json()
+        # The TypeAdapter path serializes exactly like the response model would
+        single = client.get(f"/activities/{activity.id}", headers=auth_headers(preventionist)).json()
+        assert listed == single
+        assert ActivityRead.model_validate(listed).todos[0].status == TodoStatus.no
@@ -0,0 +1,44 @@
+import json
+from datetime import datetime
+from sqlmodel import select
+from archive import months_before
+from conftest import auth_headers, make_activity, make_todos, make_user
+from jobs import claim_next_job, run_job
+from models import Activity, ActivityStatus, Role, TodoItem, TodoStatus, Tombstone
+
+
+def test_old_finished_activities_move_to_the_archive(client, session, preventionist, supervisor):
+    admin = make_user(session, Role.admin, "admin")
+    scheduled = months_before(datetime.now(), 3)
+    old = make_activity(
+        session, preventionist, supervisor, scheduled_date=scheduled, finished_date=scheduled, in_review=True
+    )
+    todos = make_todos(session, old, TodoStatus.yes, TodoStatus.no)
+    session.refresh(old)
+    assert old.status == ActivityStatus.finished
+    old_id, todo_rows = old.id, [(todo.id, todo.status.value) for todo in todos]
+    open_activity = make_activity(session, preventionist, supervisor, scheduled_date=scheduled)
+    history_before = client.get(
+        f"/activity/statuses_stats/history/{supervisor.id}", params={"months": 6}, headers=auth_headers(admin)
+    ).json()
+
+    assert client.post("/activities/archive", headers=auth_headers(preventionist)).status_code == 403
+    job = client.post("/activities/archive", params={"months": 1}, headers=auth_headers(admin)).json()
+    run_job(claim_next_job())
+
+    assert client.get(f"/jobs/{job['id']}", headers=auth_headers(admin)).json()["result"] == {"archived": 1}
+    assert [a.id for a in session.exec(select(Activity)).all()] == [open_activity.id]
+    assert session.exec(select(TodoItem)).all() == []
+    assert [t.entity_id for t in session.exec(select(Tombstone)).all()] == [old_id]
+
+    # Still in the history and the exports
+    history_after = client.get(
+        f"/activity/statuses_stats/history/{supervisor.id}", params={"months": 6}, headers=auth_headers(admin)
+    ).json()
+    assert history_after == history_before
+    export = client.get(
+        "/exports/activities", params={"include_archived": True}, headers=auth_headers(admin)
+    ).text.splitlines()
+    records = [json.loads(line) for line in export]
+    assert [r["id"] for r in records] == [open_activity.id, old_id]
+    assert [(t["id"], t["status"]) for t in records[1]["todos"]] == todo_rows
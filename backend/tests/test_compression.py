@@ -0,0 +1,73 @@
+import gzip
+import brotli
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+from compression import CompressionMiddleware, accepted_encodings
+
+BODY = "activity " * 200
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)  # type: ignore
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY, BODY]), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: {}\n\n"]), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def get_raw(client: TestClient, path: str, accept_encoding: str):
+    """Response whose body is left encoded, as sent over the wire"""
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_accepted_encodings_skip_q_zero():
+    headers = Headers({"Accept-Encoding": "gzip;q=0.5, br;q=0, deflate;q=bad, identity"})
+    assert accepted_encodings(headers) == {"gzip", "identity"}
+
+
+def test_brotli_is_preferred():
+    response, body = get_raw(make_client(), "/large", "gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(body).decode() == BODY
+
+
+def test_gzip_when_brotli_is_refused():
+    response, body = get_raw(make_client(), "/large", "gzip, br;q=0")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body).decode() == BODY
+
+
+def test_small_responses_are_not_compressed():
+    response, body = get_raw(make_client(), "/small", "br")
+    assert "content-encoding" not in response.headers
+    assert body == b"ok"
+
+
+def test_streams_are_compressed_chunk_by_chunk():
+    response, body = get_raw(make_client(), "/stream", "br")
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(body).decode() == BODY * 2
+
+
+def test_event_streams_pass_through():
+    response, body = get_raw(make_client(), "/events", "gzip, br")
+    assert "content-encoding" not in response.headers
+    assert body == b"data: {}\n\n"
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from sqlmodel import update
+from conftest import auth_headers, make_activity
+from deadline_sweeper import MISSED_AFTER, DeadlineSweeper, deadline_status_at
+from models import Activity, DeadlineStatus
+
+
+def test_deadline_status_at():
+    now = datetime.now()
+    assert deadline_status_at(None, now) == DeadlineStatus.upcoming
+    assert deadline_status_at(now + timedelta(minutes=1), now) == DeadlineStatus.upcoming
+    assert deadline_status_at(now, now) == DeadlineStatus.overdue
+    assert deadline_status_at(now - MISSED_AFTER + timedelta(minutes=1), now) == DeadlineStatus.overdue
+    assert deadline_status_at(now - MISSED_AFTER, now) == DeadlineStatus.missed
+
+
+def reschedule_behind_the_orms_back(session, activity: Activity, scheduled_date: datetime):
+    # Bulk UPDATEs skip the hook that sets the status, as the clock passing would
+    session.exec(
+        update(Activity).where(Activity.id == activity.id).values(scheduled_date=scheduled_date)
+    )
+    session.commit()
+
+
+def test_new_and_rescheduled_activities_get_their_status(client, session, preventionist, supervisor):
+    now = datetime.now()
+    past = make_activity(session, preventionist, supervisor, scheduled_date=now - timedelta(days=2))
+    soon = make_activity(session, preventionist, supervisor, scheduled_date=now + timedelta(hours=1))
+    assert past.deadline_status == DeadlineStatus.missed
+    assert soon.deadline_status == DeadlineStatus.upcoming
+
+    response = client.patch(
+        f"/activities/{past.id}",
+        json={"scheduled_date": (now + timedelta(days=1)).isoformat()},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.json()["deadline_status"] == "upcoming"
+
+
+def test_sweep_moves_activities_past_their_thresholds(session, preventionist, supervisor):
+    now = datetime.now()
+    overdue, missed, upcoming = (
+        make_activity(session, preventionist, supervisor, scheduled_date=now + timedelta(hours=1))
+        for _ in range(3)
+    )
+    reschedule_behind_the_orms_back(session, overdue, now - timedelta(hours=1))
+    reschedule_behind_the_orms_back(session, missed, now - timedelta(days=3))
+    sweeper = DeadlineSweeper()
+
+    assert sweeper.sweep() == 2
+    assert sweeper.sweep() == 0
+
+    for activity, status in (
+        (overdue, DeadlineStatus.overdue),
+        (missed, DeadlineStatus.missed),
+        (upcoming, DeadlineStatus.upcoming),
+    ):
+        session.refresh(activity)
+        assert activity.deadline_status == status
+
+
+def test_later_sweeps_only_scan_what_crossed_a_threshold(session, preventionist, supervisor):
+    now = datetime.now()
+    recent, old = (
+        make_activity(session, preventionist, supervisor, scheduled_date=now + timedelta(hours=1))
+        for _ in range(2)
+    )
+    sweeper = DeadlineSweeper()
+    sweeper.sweep()
+    sweeper._last_run = now - timedelta(hours=2)
+    # Crossed the overdue threshold since the last sweep
+    reschedule_behind_the_orms_back(session, recent, now - timedelta(hours=1))
+    # Was already overdue at the last sweep, so that sweep handled it
+    reschedule_behind_the_orms_back(session, old, now - timedelta(hours=3))
+
+    assert sweeper.sweep() == 1
+
+    session.refresh(recent)
+    session.refresh(old)
+    assert recent.deadline_status == DeadlineStatus.overdue
+    assert old.deadline_status == DeadlineStatus.upcoming
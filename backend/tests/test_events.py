@@ -0,0 +1,103 @@
+import asyncio
+import pubsub
+from conftest import auth_headers, make_activity, make_user
+from database import engine
+from models import Role, SupervisorAssignment
+from pubsub import DatabaseBroker, InProcessBroker, preventionist_topic, supervisor_topic
+from routers.events import topics_for_user
+from schemas import ChangeEvent, ChangeEventType
+
+
+class RecordingBroker:
+    def __init__(self) -> None:
+        self.published: list[tuple[set[str], ChangeEvent]] = []
+
+    def publish(self, topics, event):
+        self.published.append((set(topics), event))
+
+
+def test_topics_follow_the_assignments(session, preventionist, supervisor):
+    other = make_user(session, Role.supervisor, "other")
+    session.add(SupervisorAssignment(supervisor_id=supervisor.id, preventionist_id=preventionist.id))
+    session.commit()
+
+    assert topics_for_user(session, supervisor) == [supervisor_topic(supervisor.id)]
+    assert topics_for_user(session, preventionist) == [
+        preventionist_topic(preventionist.id),
+        supervisor_topic(supervisor.id),
+    ]
+    assert topics_for_user(session, other) == [supervisor_topic(other.id)]
+
+
+def test_reassignment_notifies_both_supervisors(
+    client, session, preventionist, supervisor, monkeypatch
+):
+    other = make_user(session, Role.supervisor, "other")
+    activity = make_activity(session, preventionist, supervisor)
+    recorder = RecordingBroker()
+    monkeypatch.setattr(pubsub, "broker", recorder)
+
+    response = client.patch(
+        f"/activities/{activity.id}",
+        json={"assigned_to_id": other.id},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 200
+    [(topics, event)] = recorder.published
+    assert event.type == ChangeEventType.activity_assigned
+    assert event.activity_id == activity.id
+    assert topics == {
+        supervisor_topic(supervisor.id),
+        supervisor_topic(other.id),
+        preventionist_topic(preventionist.id),
+    }
+
+
+def test_slow_subscribers_get_a_resync(monkeypatch):
+    monkeypatch.setattr(pubsub, "SUBSCRIBER_QUEUE_SIZE", 2)
+    broker = InProcessBroker()
+
+    async def receive() -> list[ChangeEventType]:
+        events = broker.subscribe(["supervisor:1"])
+        first = asyncio.ensure_future(anext(events))
+        # Let the subscription register before publishing
+        await asyncio.sleep(0)
+        for activity_id in range(4):
+            broker.publish(
+                ["supervisor:1", "supervisor:2"],
+                ChangeEvent(type=ChangeEventType.activity_updated, activity_id=activity_id),
+            )
+        received = [(await first).type, (await anext(events)).type, (await anext(events)).type]
+        await events.aclose()
+        return received
+
+    assert asyncio.run(receive()) == [
+        ChangeEventType.activity_updated,
+        ChangeEventType.activity_updated,
+        ChangeEventType.resync,
+    ]
+
+
+def test_database_broker_relays_events_between_processes():
+    # One broker per worker process, sharing the event log
+    publisher, relay = DatabaseBroker(engine), DatabaseBroker(engine, poll_interval=0.01)
+
+    async def receive() -> list[int | None]:
+        events = relay.subscribe(["supervisor:1"])
+        first = asyncio.ensure_future(anext(events))
+        # Let the poller find where the log ends before publishing
+        await asyncio.sleep(0.05)
+        for activity_id, topic in enumerate(["supervisor:1", "supervisor:2", "supervisor:1"]):
+            publisher.publish(
+                [topic], ChangeEvent(type=ChangeEventType.activity_updated, activity_id=activity_id)
+            )
+        received = [(await first).activity_id, (await anext(events)).activity_id]
+        await events.aclose()
+        return received
+
+    assert asyncio.run(asyncio.wait_for(receive(), timeout=5)) == [0, 2]
+
+
+def test_stream_requires_a_token(client):
+    assert client.get("/events/stream").status_code == 401
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import Role, TodoStatus
+
+
+def exported_ids(client, user, **params) -> list[int]:
+    response = client.get("/exports/activities", params=params, headers=auth_headers(user))
+    assert response.status_code == 200
+    return [json.loads(line)["id"] for line in response.text.splitlines()]
+
+
+def test_export_is_limited_to_the_users_activities(client, session, preventionist, supervisor):
+    colleague = make_user(session, Role.preventionist, "colleague")
+    other_supervisor = make_user(session, Role.supervisor, "other_supervisor")
+    admin = make_user(session, Role.admin, "admin")
+    mine = make_activity(session, preventionist, supervisor)
+    theirs = make_activity(session, colleague, other_supervisor)
+    assigned = make_activity(session, colleague, supervisor)
+
+    assert exported_ids(client, preventionist) == [mine.id]
+    # Filters cannot widen the export to someone else's activities
+    assert exported_ids(client, preventionist, preventionist_id=colleague.id) == [mine.id]
+    assert exported_ids(client, supervisor) == [mine.id, assigned.id]
+    assert exported_ids(client, supervisor, supervisor_id=other_supervisor.id) == [mine.id, assigned.id]
+    assert exported_ids(client, admin) == [mine.id, theirs.id, assigned.id]
+    assert exported_ids(client, admin, preventionist_id=colleague.id) == [theirs.id, assigned.id]
+
+
+def test_export_formats(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    empty = make_activity(session, preventionist, supervisor)
+    first, second = make_todos(session, activity, TodoStatus.yes, TodoStatus.pending)
+    headers = auth_headers(preventionist)
+
+    lines = client.get("/exports/activities", headers=headers).text.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [t["id"] for t in records[0]["todos"]] == [first.id, second.id]
+    assert records[1] == records[1] | {"id": empty.id, "todos": []}
+
+    response = client.get("/exports/activities", params={"format": "csv"}, headers=headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["activity_id"], r["todo_id"], r["todo_status"]) for r in rows] == [
+        (str(activity.id), str(first.id), "yes"),
+        (str(activity.id), str(second.id), "pending"),
+        (str(empty.id), "", ""),
+    ]
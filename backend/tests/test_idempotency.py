@@ -0,0 +1,116 @@
+import json
+from datetime import datetime, timedelta
+from sqlmodel import func, select
+from conftest import auth_headers, make_user
+from idempotency import IDEMPOTENCY_LOCK_TIMEOUT, IDEMPOTENCY_TTL, request_fingerprint
+from models import Activity, IdempotencyKey, Role
+
+
+def create_activity(client, user, assignee, key: str, name: str = "Inspection"):
+    return client.post(
+        "/activities/",
+        json={"name": name, "assigned_to_id": assignee.id},
+        headers=auth_headers(user) | {"Idempotency-Key": key},
+    )
+
+
+def activity_count(session) -> int:
+    return session.exec(select(func.count()).select_from(Activity)).one()
+
+
+def test_retries_replay_the_first_response(client, session, preventionist, supervisor):
+    first = create_activity(client, preventionist, supervisor, "key-1")
+    replayed = create_activity(client, preventionist, supervisor, "key-1")
+
+    assert first.status_code == replayed.status_code == 201
+    assert replayed.json() == first.json()
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert activity_count(session) == 1
+
+
+def test_keys_are_per_user(client, session, preventionist, supervisor):
+    colleague = make_user(session, Role.preventionist, "colleague")
+
+    create_activity(client, preventionist, supervisor, "key-1")
+    response = create_activity(client, colleague, supervisor, "key-1")
+
+    assert "Idempotent-Replayed" not in response.headers
+    assert activity_count(session) == 2
+
+
+def test_reusing_a_key_for_another_request_is_refused(client, session, preventionist, supervisor):
+    create_activity(client, preventionist, supervisor, "key-1")
+
+    response = create_activity(client, preventionist, supervisor, "key-1", name="Something else")
+
+    assert response.status_code == 422
+    assert activity_count(session) == 1
+
+
+def claim(session, user, assignee, key: str, created_at: datetime) -> bytes:
+    """Record a first request for the key that has not finished, and return its body"""
+    body = json.dumps({"name": "Inspection", "assigned_to_id": assignee.id}).encode()
+    scope = {"method": "POST", "path": "/activities/", "query_string": b""}
+    session.add(
+        IdempotencyKey(
+            owner=f"user:{user.username}",
+            key=key,
+            request_hash=request_fingerprint(scope, body),
+            created_at=created_at,
+            expires_at=created_at + IDEMPOTENCY_TTL,
+        )
+    )
+    session.commit()
+    return body
+
+
+def retry(client, user, key: str, body: bytes):
+    return client.post(
+        "/activities/",
+        content=body,
+        headers=auth_headers(user) | {"Idempotency-Key": key, "Content-Type": "application/json"},
+    )
+
+
+def test_keys_in_progress_are_refused(client, session, preventionist, supervisor):
+    body = claim(session, preventionist, supervisor, "key-1", datetime.now())
+
+    response = retry(client, preventionist, "key-1", body)
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert activity_count(session) == 0
+
+
+def test_abandoned_keys_are_taken_over(client, session, preventionist, supervisor):
+    abandoned_at = datetime.now() - IDEMPOTENCY_LOCK_TIMEOUT - timedelta(seconds=1)
+    body = claim(session, preventionist, supervisor, "key-1", abandoned_at)
+
+    response = retry(client, preventionist, "key-1", body)
+
+    assert response.status_code == 201
+    assert activity_count(session) == 1
+
+
+def test_client_errors_are_replayed_too(client, session, preventionist):
+    missing = make_user(session, Role.supervisor, "gone")
+    session.delete(missing)
+    session.commit()
+
+    first = create_activity(client, preventionist, missing, "key-1")
+    replayed = create_activity(client, preventionist, missing, "key-1")
+
+    assert first.status_code == replayed.status_code == 404
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+
+
+def test_invalid_keys_and_reads(client, session, preventionist, supervisor):
+    assert create_activity(client, preventionist, supervisor, "").status_code == 400
+    assert create_activity(client, preventionist, supervisor, "k" * 256).status_code == 400
+
+    response = client.get(
+        "/activities/", headers=auth_headers(preventionist) | {"Idempotency-Key": "key-1"}
+    )
+    assert "Idempotent-Replayed" not in response.headers
+    assert session.exec(select(IdempotencyKey)).all() == []
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlmodel import update
+from conftest import auth_headers, make_user
+from jobs import JOB_LEASE_SECONDS, JOB_MAX_ACTIVE_PER_USER, claim_next_job, enqueue_job, job_handler, run_job
+from models import Job, JobStatus, Role
+
+
+@job_handler("tests.echo")
+def echo(session, payload, user_id):
+    if payload.get("fail"):
+        raise ValueError("Asked to fail")
+    return {"payload": payload, "user_id": user_id}
+
+
+@pytest.fixture
+def admin(session):
+    return make_user(session, Role.admin, "admin")
+
+
+def test_jobs_run_once_and_report_their_result(client, session, admin):
+    job = enqueue_job(session, "tests.echo", {"value": 1}, admin)
+
+    assert claim_next_job() == job.id
+    assert claim_next_job() is None
+    run_job(job.id)
+
+    response = client.get(f"/jobs/{job.id}", headers=auth_headers(admin))
+    assert response.json()["status"] == "succeeded"
+    assert response.json()["result"] == {"payload": {"value": 1}, "user_id": admin.id}
+    assert response.json()["attempts"] == 1
+    # Payloads (e.g. imported passwords) are never returned and go once the job ends
+    assert "payload" not in response.json()
+    session.refresh(job)
+    assert job.payload is None
+
+
+def test_failed_jobs_keep_the_error(client, session, admin):
+    job = enqueue_job(session, "tests.echo", {"fail": True}, admin)
+
+    run_job(claim_next_job())
+
+    body = client.get(f"/jobs/{job.id}", headers=auth_headers(admin)).json()
+    assert (body["status"], body["error"]) == ("failed", "Asked to fail")
+
+
+def test_jobs_whose_lease_expired_are_claimed_again(session, admin):
+    job = enqueue_job(session, "tests.echo", {}, admin)
+    claim_next_job()
+    session.exec(
+        update(Job)
+        .where(Job.id == job.id)
+        .values(started_at=datetime.now() - timedelta(seconds=JOB_LEASE_SECONDS + 1))
+    )
+    session.commit()
+
+    assert claim_next_job() == job.id
+    session.refresh(job)
+    assert (job.status, job.attempts) == (JobStatus.running, 2)
+
+
+def test_active_jobs_per_user_are_capped(session, admin):
+    for _ in range(JOB_MAX_ACTIVE_PER_USER):
+        enqueue_job(session, "tests.echo", {}, admin)
+
+    with pytest.raises(HTTPException) as error:
+        enqueue_job(session, "tests.echo", {}, admin)
+
+    assert error.value.status_code == 429
+
+
+def test_jobs_are_private_to_their_creator(client, session, admin, preventionist):
+    job = enqueue_job(session, "tests.echo", {}, preventionist)
+    colleague = make_user(session, Role.preventionist, "colleague")
+
+    assert client.get(f"/jobs/{job.id}", headers=auth_headers(colleague)).status_code == 404
+    assert client.get(f"/jobs/{job.id}", headers=auth_headers(admin)).status_code == 200
+    assert [j["id"] for j in client.get("/jobs/", headers=auth_headers(preventionist)).json()] == [job.id]
+    assert client.get("/jobs/", headers=auth_headers(colleague)).json() == []
@@ -0,0 +1,94 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import ratelimit
+from conftest import auth_headers
+from database import engine
+from ratelimit import DatabaseBackend, InMemoryBackend, Limit, RateLimitMiddleware
+
+
+def test_limit_parse():
+    assert Limit.parse("30/minute burst 10") == Limit(rate=0.5, burst=10)
+    assert Limit.parse("5/second") == Limit(rate=5, burst=5)
+
+
+def test_bucket_refills_at_the_rate(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: clock[0])
+    backend = InMemoryBackend()
+    limit = Limit(rate=0.5, burst=2)
+
+    assert backend.take("a", limit) == 0
+    assert backend.take("a", limit) == 0
+    assert backend.take("a", limit) == pytest.approx(2)
+    # Other clients have their own bucket
+    assert backend.take("b", limit) == 0
+
+    clock[0] += 2
+    assert backend.take("a", limit) == 0
+    assert backend.take("a", limit) > 0
+
+
+def test_database_buckets_are_shared(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "time", lambda: clock[0])
+    # One backend per worker process, sharing the table
+    first, second = DatabaseBackend(engine), DatabaseBackend(engine)
+    limit = Limit(rate=0.5, burst=2)
+
+    assert first.take("a", limit) == 0
+    assert second.take("a", limit) == 0
+    assert first.take("a", limit) == pytest.approx(2)
+    assert second.take("b", limit) == 0
+
+    clock[0] += 2
+    assert second.take("a", limit) == 0
+    assert first.take("a", limit) == pytest.approx(2)
+
+
+def limited_client(monkeypatch, max_in_flight: int = 64) -> TestClient:
+    monkeypatch.setattr(ratelimit, "LOGIN_LIMIT", Limit.parse("1/minute burst 2"))
+    monkeypatch.setattr(ratelimit, "DEFAULT_LIMIT", Limit.parse("1/minute burst 3"))
+    app = FastAPI()
+
+    @app.post("/auth/token")
+    def login():
+        return {}
+
+    @app.get("/items")
+    def items():
+        return []
+
+    return TestClient(RateLimitMiddleware(app, InMemoryBackend(), max_in_flight=max_in_flight))
+
+
+def test_login_has_its_own_budget(monkeypatch):
+    client = limited_client(monkeypatch)
+
+    assert [client.post("/auth/token").status_code for _ in range(3)] == [200, 200, 429]
+    response = client.post("/auth/token")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert client.get("/items").status_code == 200
+
+
+def test_signed_in_users_are_limited_separately(monkeypatch, preventionist, supervisor):
+    client = limited_client(monkeypatch)
+
+    assert [client.get("/items", headers=auth_headers(preventionist)).status_code for _ in range(4)] == [
+        200,
+        200,
+        200,
+        429,
+    ]
+    assert client.get("/items", headers=auth_headers(supervisor)).status_code == 200
+    assert client.get("/items").status_code == 200
+
+
+def test_requests_are_shed_when_too_many_are_in_flight(monkeypatch):
+    client = limited_client(monkeypatch, max_in_flight=0)
+
+    response = client.get("/items")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(ratelimit.LOAD_SHED_RETRY_AFTER)
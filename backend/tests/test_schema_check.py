@@ -0,0 +1,48 @@
+import logging
+import pytest
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+import schema_check
+from conftest import BACKEND_DIR
+from database import engine
+from schema_check import check_schema, database_revisions, migration_heads
+
+
+def test_heads_match_alembic():
+    scripts = ScriptDirectory.from_config(Config(str(BACKEND_DIR / "alembic.ini")))
+    assert migration_heads() == set(scripts.get_heads())
+
+
+def test_migrated_database_passes(monkeypatch):
+    monkeypatch.setattr(schema_check, "SCHEMA_CHECK", "error")
+    assert database_revisions(engine) == migration_heads()
+    check_schema(engine)
+
+
+def test_outdated_database(monkeypatch, caplog):
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE alembic_version SET version_num = '35e131c3fb24'"))
+
+    monkeypatch.setattr(schema_check, "SCHEMA_CHECK", "error")
+    with pytest.raises(RuntimeError, match="schema is at 35e131c3fb24"):
+        check_schema(engine)
+
+    monkeypatch.setattr(schema_check, "SCHEMA_CHECK", "warn")
+    # Migrating the template database ran Alembic's fileConfig, which disables it
+    monkeypatch.setattr(schema_check.logger, "disabled", False)
+    with caplog.at_level(logging.WARNING, logger="schema_check"):
+        check_schema(engine)
+    assert "run `alembic upgrade head`" in caplog.text
+
+
+def test_unmigrated_database(monkeypatch, tmp_path):
+    empty = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    monkeypatch.setattr(schema_check, "SCHEMA_CHECK", "error")
+
+    with pytest.raises(RuntimeError, match="no revision"):
+        check_schema(empty)
+
+    monkeypatch.setattr(schema_check, "SCHEMA_CHECK", "off")
+    check_schema(empty)
+    empty.dispose()
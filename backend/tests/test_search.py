@@ -0,0 +1,66 @@
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import ActivityTemplate, Role, TemplateTodoItem, Tenant, TodoItem, TodoStatus
+
+
+def search(client, user, query: str, **params) -> list[tuple[str, str]]:
+    response = client.get("/search/", params={"q": query, **params}, headers=auth_headers(user))
+    assert response.status_code == 200
+    return [(hit["entity"], hit["text"]) for hit in response.json()]
+
+
+def test_search_folds_case_and_accents_and_matches_prefixes(client, session, preventionist, supervisor):
+    make_activity(session, preventionist, supervisor, name="Revisión de andamios")
+
+    assert search(client, preventionist, "REVISION") == [("activity", "Revisión de andamios")]
+    assert search(client, preventionist, "andamio") == [("activity", "Revisión de andamios")]
+    assert search(client, preventionist, "grúa") == []
+
+
+def test_search_covers_every_entity(client, session, preventionist, supervisor):
+    template = ActivityTemplate(tenant_id=1, name="Excavación", description="Zanjas")
+    session.add(template)
+    session.commit()
+    item = TemplateTodoItem(tenant_id=1, template_id=template.id, description="Entibación de la excavación")
+    session.add(item)
+    session.commit()
+    activity = make_activity(session, preventionist, supervisor, name="Excavación norte")
+    session.add(TodoItem(tenant_id=1, activity_id=activity.id, template_todo_id=item.id))
+    session.commit()
+
+    assert sorted(entity for entity, _ in search(client, preventionist, "excavacion")) == [
+        "activity",
+        "template",
+        "template_todo",
+        "todo",
+    ]
+    # Todos from a template are found by their template's text
+    assert search(client, preventionist, "entibacion", entity="todo") == [
+        ("todo", "Entibación de la excavación")
+    ]
+
+
+def test_search_follows_edits_and_deletes(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    [todo] = make_todos(session, activity, TodoStatus.pending)
+    headers = auth_headers(preventionist)
+
+    client.patch(f"/todos/{todo.id}", json={"description": "Arnés de seguridad"}, headers=headers)
+    assert search(client, preventionist, "arnes") == [("todo", "Arnés de seguridad")]
+
+    client.delete(f"/todos/{todo.id}", headers=headers)
+    assert search(client, preventionist, "arnes") == []
+
+
+def test_search_stays_within_the_tenant(client, session, preventionist, supervisor):
+    tenant = Tenant(name="Other company")
+    session.add(tenant)
+    session.commit()
+    outsider = make_user(session, Role.preventionist, "outsider", tenant_id=tenant.id)
+    make_activity(session, preventionist, supervisor, name="Andamios")
+
+    assert search(client, outsider, "andamios") == []
+
+
+def test_search_ignores_query_syntax(client, session, preventionist):
+    assert search(client, preventionist, '" OR NEAR(') == []
+    assert search(client, preventionist, "*") == []
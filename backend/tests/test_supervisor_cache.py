@@ -0,0 +1,71 @@
+from sqlmodel import Session
+from conftest import make_user
+from database import engine
+from models import Role, SupervisorAssignment
+import supervisor_cache
+from supervisor_cache import SupervisorDirectory, supervisor_directory
+
+
+def assign(session: Session, supervisor_id, preventionist_id) -> SupervisorAssignment:
+    assignment = SupervisorAssignment(supervisor_id=supervisor_id, preventionist_id=preventionist_id)
+    session.add(assignment)
+    session.commit()
+    return assignment
+
+
+def test_commits_touching_assignments_invalidate(session, preventionist, supervisor):
+    assert supervisor_directory.get_supervisor_ids(session, preventionist.id) == []
+
+    assign(session, supervisor.id, preventionist.id)
+
+    assert supervisor_directory.get_supervisor_ids(session, preventionist.id) == [supervisor.id]
+
+
+def test_rolled_back_changes_keep_the_cache(session, preventionist, supervisor):
+    other = make_user(session, Role.supervisor, "other")
+    assign(session, supervisor.id, preventionist.id)
+    assert supervisor_directory.get_supervisor_ids(session, preventionist.id) == [supervisor.id]
+    generation = supervisor_directory._generation
+
+    with Session(engine) as rolled_back:
+        rolled_back.add(SupervisorAssignment(supervisor_id=other.id, preventionist_id=preventionist.id))
+        rolled_back.flush()
+        rolled_back.rollback()
+
+    assert supervisor_directory._generation == generation
+    assert supervisor_directory.get_supervisor_ids(session, preventionist.id) == [supervisor.id]
+
+
+def test_renamed_supervisors_are_reloaded(session, preventionist, supervisor):
+    assign(session, supervisor.id, preventionist.id)
+    assert supervisor_directory.get_supervisors(session, preventionist.id)[0].username == "supervisor"
+
+    supervisor.username = "renamed"
+    session.add(supervisor)
+    session.commit()
+
+    assert supervisor_directory.get_supervisors(session, preventionist.id)[0].username == "renamed"
+
+
+def test_entries_expire_after_the_ttl(session, preventionist, supervisor, monkeypatch):
+    monkeypatch.setattr(supervisor_directory, "ttl", 0)
+    assert supervisor_directory.get_supervisor_ids(session, preventionist.id) == []
+
+    # Written without the ORM, so nothing invalidates the entry
+    session.connection().exec_driver_sql(
+        "INSERT INTO supervisorassignment (supervisor_id, preventionist_id) "
+        f"VALUES ({supervisor.id}, {preventionist.id})"
+    )
+
+    assert supervisor_directory.get_supervisor_ids(session, preventionist.id) == [supervisor.id]
+
+
+def test_shared_directories_see_other_processes_changes(session, preventionist, supervisor, monkeypatch):
+    monkeypatch.setattr(supervisor_cache, "supervisor_directory", SupervisorDirectory(shared=True))
+    # The directory of another worker process, which the commit below does not invalidate
+    other = SupervisorDirectory(shared=True)
+    assert other.get_supervisor_ids(session, preventionist.id) == []
+
+    assign(session, supervisor.id, preventionist.id)
+
+    assert other.get_supervisor_ids(session, preventionist.id) == [supervisor.id]
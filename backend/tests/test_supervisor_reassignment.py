@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import Role, SupervisorAssignment, TodoStatus
+from test_sync import backdate
+
+
+def test_moved_activities_sync_with_their_todos(client, session, preventionist, supervisor):
+    successor = make_user(session, Role.preventionist, "successor")
+    session.add(SupervisorAssignment(supervisor_id=supervisor.id, preventionist_id=preventionist.id))
+    session.commit()
+    moved = make_activity(session, preventionist, supervisor)
+    todos = make_todos(session, moved, TodoStatus.yes, TodoStatus.pending)
+    finished = make_activity(session, preventionist, supervisor, finished_date=datetime.now())
+    backdate(session, moved, finished)
+    since = (datetime.now() - timedelta(hours=1)).isoformat()
+
+    response = client.post(
+        "/users/reassign-supervisors",
+        json={
+            "preventionist_id": successor.id,
+            "supervisor_ids": [supervisor.id],
+            "move_open_activities": True,
+        },
+        headers=auth_headers(successor),
+    )
+
+    assert response.status_code == 200
+    assert response.json()["activities_moved"] == 1
+    assert response.json()["assignments_removed"] == 1
+    session.refresh(finished)
+    assert finished.created_by_id == preventionist.id
+
+    changes = client.get("/sync/changes", params={"since": since}, headers=auth_headers(successor)).json()
+    assert [a["id"] for a in changes["activities"]] == [moved.id]
+    assert [t["id"] for t in changes["todos"]] == [t.id for t in todos]
+
+    changes = client.get("/sync/changes", params={"since": since}, headers=auth_headers(preventionist)).json()
+    assert changes["activities"] == []
+    assert [(t["entity"], t["entity_id"]) for t in changes["tombstones"]] == [("activity", moved.id)]
+
+
+def test_reassignment_validates_roles(client, session, preventionist, supervisor):
+    response = client.post(
+        "/users/reassign-supervisors",
+        json={"preventionist_id": supervisor.id, "supervisor_ids": [preventionist.id]},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 400
+    assert session.exec(select(SupervisorAssignment)).all() == []
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+from sqlmodel import update
+from conftest import auth_headers, make_activity, make_todos, make_user
+from models import Activity, ActivityStatus, Role, TodoItem, TodoStatus
+
+
+def backdate(session, *activities: Activity, days: int = 1):
+    """Make the rows look as if they were last changed days ago"""
+    then = datetime.now() - timedelta(days=days)
+    ids = [activity.id for activity in activities]
+    session.exec(update(Activity).where(Activity.id.in_(ids)).values(updated_at=then))
+    session.exec(update(TodoItem).where(TodoItem.activity_id.in_(ids)).values(updated_at=then))
+    session.commit()
+
+
+def test_full_sync_returns_the_users_activities_and_todos(client, session, preventionist, supervisor):
+    other = make_user(session, Role.supervisor, "other")
+    mine = make_activity(session, preventionist, supervisor)
+    make_activity(session, preventionist, other)
+    todos = make_todos(session, mine, TodoStatus.pending, TodoStatus.yes)
+
+    response = client.get("/sync/changes", headers=auth_headers(supervisor))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [a["id"] for a in body["activities"]] == [mine.id]
+    assert [t["id"] for t in body["todos"]] == [t.id for t in todos]
+    assert body["tombstones"] == []
+    assert datetime.fromisoformat(body["next_token"]) < datetime.now()
+
+
+def test_delta_sync_skips_unchanged_rows(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    make_todos(session, activity, TodoStatus.pending)
+    backdate(session, activity)
+    since = (datetime.now() - timedelta(hours=1)).isoformat()
+
+    response = client.get("/sync/changes", params={"since": since}, headers=auth_headers(supervisor))
+
+    assert response.json()["activities"] == []
+    assert response.json()["todos"] == []
+
+
+def test_delta_sync_returns_todos_of_activities_reassigned_to_the_user(
+    client, session, preventionist, supervisor
+):
+    other = make_user(session, Role.supervisor, "other")
+    activity = make_activity(session, preventionist, other)
+    todos = make_todos(session, activity, TodoStatus.pending, TodoStatus.no)
+    backdate(session, activity)
+    since = (datetime.now() - timedelta(hours=1)).isoformat()
+
+    activity = session.get(Activity, activity.id)
+    activity.assigned_to_id = supervisor.id
+    session.add(activity)
+    session.commit()
+
+    response = client.get("/sync/changes", params={"since": since}, headers=auth_headers(supervisor))
+
+    body = response.json()
+    assert [a["id"] for a in body["activities"]] == [activity.id]
+    assert [t["id"] for t in body["todos"]] == [t.id for t in todos]
+
+
+def test_sync_token_with_offset(client, session, supervisor):
+    response = client.get(
+        "/sync/changes", params={"since": "2026-01-01T00:00:00+00:00"}, headers=auth_headers(supervisor)
+    )
+    assert response.status_code == 200
+
+    response = client.get("/sync/changes", params={"since": "yesterday"}, headers=auth_headers(supervisor))
+    assert response.status_code == 400
+
+
+def test_apply_changes_reports_each_outcome(client, session, preventionist, supervisor):
+    other = make_user(session, Role.supervisor, "other")
+    activity = make_activity(session, preventionist, supervisor)
+    todo, stale = make_todos(session, activity, TodoStatus.pending, TodoStatus.pending)
+    foreign = make_todos(session, make_activity(session, preventionist, other), TodoStatus.pending)[0]
+
+    response = client.post(
+        "/sync/todos",
+        json={
+            "changes": [
+                {"id": todo.id, "status": "yes"},
+                # Seen before the server row was last written
+                {"id": stale.id, "status": "no", "updated_at": "2000-01-01T00:00:00"},
+                {"id": foreign.id, "status": "yes"},
+                {"id": 999_999, "status": "yes"},
+            ]
+        },
+        headers=auth_headers(supervisor),
+    )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["outcome"] for r in results] == ["applied", "conflict", "forbidden", "not_found"]
+    assert results[0]["todo"]["status"] == "yes"
+    assert results[1]["todo"]["status"] == "pending"
+    session.refresh(stale)
+    assert stale.status == TodoStatus.pending
+
+
+def test_apply_changes_accepts_utc_timestamps(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    old, current = make_todos(session, activity, TodoStatus.pending, TodoStatus.pending)
+    seen_at = (datetime.now() + timedelta(minutes=5)).astimezone().isoformat()
+
+    response = client.post(
+        "/sync/todos",
+        json={
+            "changes": [
+                {"id": old.id, "status": "yes", "updated_at": "2026-01-01T00:00:00Z"},
+                {"id": current.id, "status": "yes", "updated_at": seen_at},
+            ]
+        },
+        headers=auth_headers(supervisor),
+    )
+
+    assert response.status_code == 200
+    assert [r["outcome"] for r in response.json()] == ["conflict", "applied"]
+
+
+def test_apply_changes_cannot_reopen_todos_of_activities_in_review(
+    client, session, preventionist, supervisor
+):
+    activity = make_activity(session, preventionist, supervisor)
+    todo = make_todos(session, activity, TodoStatus.yes)[0]
+    activity = session.get(Activity, activity.id)
+    activity.status = ActivityStatus.in_review
+    session.add(activity)
+    session.commit()
+
+    response = client.post(
+        "/sync/todos", json={"changes": [{"id": todo.id, "status": "pending"}]}, headers=auth_headers(supervisor)
+    )
+
+    assert response.json()[0]["outcome"] == "conflict"
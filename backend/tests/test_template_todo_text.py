@@ -0,0 +1,35 @@
+from sqlmodel import select
+from conftest import auth_headers
+from models import TodoItem
+
+
+def test_todos_read_their_text_from_the_template(client, session, preventionist, supervisor):
+    headers = auth_headers(preventionist)
+    template = client.post("/activity-templates/", json={"name": "Checklist"}, headers=headers).json()
+    [item] = client.post(
+        f"/activity-templates/{template['id']}/items",
+        json={"items": [{"description": "Helmets"}]},
+        headers=headers,
+    ).json()
+    activity = client.post(
+        "/activities/",
+        json={"name": "", "assigned_to_id": supervisor.id, "activity_template_id": template["id"]},
+        headers=headers,
+    ).json()
+
+    [todo] = session.exec(select(TodoItem)).all()
+    assert (todo.description, todo.template_todo_id) == (None, item["id"])
+    assert client.get(f"/todos/{todo.id}", headers=headers).json()["description"] == "Helmets"
+    assert [t["description"] for t in client.get("/todos/", headers=headers).json()] == ["Helmets"]
+    sync = client.get("/sync/changes", headers=auth_headers(supervisor)).json()
+    assert [t["description"] for t in sync["todos"]] == ["Helmets"]
+
+    # An edit stores the todo's own text, and leaves the template alone
+    client.patch(f"/todos/{todo.id}", json={"description": "Helmets and visors"}, headers=headers)
+    session.refresh(todo)
+    assert todo.description == "Helmets and visors"
+    assert client.get(f"/activities/{activity['id']}", headers=headers).json()["todos"][0]["description"] == (
+        "Helmets and visors"
+    )
+    items = client.get(f"/activity-templates/{template['id']}/items", headers=headers).json()
+    assert [i["description"] for i in items] == ["Helmets"]
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import event
+from conftest import auth_headers
+from database import engine
+
+
+@pytest.fixture
+def headers(preventionist) -> dict[str, str]:
+    return auth_headers(preventionist)
+
+
+@pytest.fixture
+def template(client, headers) -> dict:
+    template = client.post("/activity-templates/", json={"name": "Checklist"}, headers=headers).json()
+    client.post(
+        f"/activity-templates/{template['id']}/items",
+        json={"items": [{"description": "Helmets"}, {"description": "Gloves"}]},
+        headers=headers,
+    )
+    return template
+
+
+def items(client, headers, template: dict, **params) -> list[str]:
+    response = client.get(f"/activity-templates/{template['id']}/items", params=params, headers=headers)
+    return [item["description"] for item in response.json()]
+
+
+def create_activity(client, headers, template: dict, supervisor) -> dict:
+    response = client.post(
+        "/activities/",
+        json={"name": "", "assigned_to_id": supervisor.id, "activity_template_id": template["id"]},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def edit(client, headers, item_id: int, description: str) -> dict:
+    return client.patch(f"/todos-template/{item_id}", json={"description": description}, headers=headers).json()
+
+
+def version(client, headers, template: dict) -> int:
+    return client.get(f"/activity-templates/{template['id']}", headers=headers).json()["version"]
+
+
+def test_unused_versions_are_edited_in_place(client, headers, template):
+    helmets = client.get(f"/activity-templates/{template['id']}/items", headers=headers).json()[0]
+
+    edited = edit(client, headers, helmets["id"], "Hard hats")
+
+    assert edited["id"] == helmets["id"]
+    assert version(client, headers, template) == 1
+    assert items(client, headers, template) == ["Hard hats", "Gloves"]
+
+
+def test_activities_keep_the_version_they_were_created_from(client, headers, template, supervisor):
+    helmets, gloves = client.get(f"/activity-templates/{template['id']}/items", headers=headers).json()
+    first = create_activity(client, headers, template, supervisor)
+    assert first["template_version"] == 1
+    assert [todo["description"] for todo in first["todos"]] == ["Helmets", "Gloves"]
+
+    replacement = edit(client, headers, gloves["id"], "Safety gloves")
+    assert client.delete(f"/todos-template/{helmets['id']}", headers=headers).status_code == 204
+    client.post(
+        f"/activity-templates/{template['id']}/items",
+        json={"items": [{"description": "Boots"}]},
+        headers=headers,
+    )
+
+    # One new version for all the edits made before it is used
+    assert replacement["id"] != gloves["id"]
+    assert version(client, headers, template) == 2
+    assert items(client, headers, template) == ["Safety gloves", "Boots"]
+    assert items(client, headers, template, version=1) == ["Helmets", "Gloves"]
+    assert client.get(
+        f"/activity-templates/{template['id']}/items", params={"version": 3}, headers=headers
+    ).status_code == 404
+
+    first = client.get(f"/activities/{first['id']}", headers=headers).json()
+    assert [todo["description"] for todo in first["todos"]] == ["Helmets", "Gloves"]
+    second = create_activity(client, headers, template, supervisor)
+    assert second["template_version"] == 2
+    assert [todo["description"] for todo in second["todos"]] == ["Safety gloves", "Boots"]
+
+
+def test_retired_items_cannot_be_edited(client, headers, template, supervisor):
+    gloves = client.get(f"/activity-templates/{template['id']}/items", headers=headers).json()[1]
+    create_activity(client, headers, template, supervisor)
+    edit(client, headers, gloves["id"], "Safety gloves")
+
+    response = client.patch(f"/todos-template/{gloves['id']}", json={"description": "x"}, headers=headers)
+
+    assert response.status_code == 404
+
+
+def test_todos_are_created_with_one_insert(client, headers, template, supervisor):
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO TODOITEM"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        activity = create_activity(client, headers, template, supervisor)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+
+    assert len(activity["todos"]) == 2
+    assert len(inserts) == 1
+
@@ -0,0 +1,149 @@
+import pytest
+from sqlmodel import Session, select
+from conftest import PASSWORD, auth_headers, make_activity, make_todos, make_user
+from database import engine
+from jobs import enqueue_job
+from models import Activity, Role, Tenant, TodoItem, TodoStatus
+from security import create_access_token
+from tenancy import ANONYMOUS_TENANT_ID, scope_session
+
+
+@pytest.fixture
+def other_tenant(session) -> Tenant:
+    tenant = Tenant(name="Other company")
+    session.add(tenant)
+    session.commit()
+    session.refresh(tenant)
+    return tenant
+
+
+def test_users_only_see_their_tenants_activities(client, session, preventionist, supervisor, other_tenant):
+    activity = make_activity(session, preventionist, supervisor)
+    outsider = make_user(session, Role.preventionist, "outsider", tenant_id=other_tenant.id)
+    headers = auth_headers(outsider)
+
+    assert client.get(f"/activities/{activity.id}", headers=headers).status_code == 404
+    assert client.get("/activities/", headers=headers).json() == []
+    assert client.patch(f"/activities/{activity.id}", json={"name": "x"}, headers=headers).status_code == 404
+    assert client.delete(f"/activities/{activity.id}", headers=headers).status_code == 404
+    assert client.get(f"/activities/{activity.id}", headers=auth_headers(preventionist)).status_code == 200
+
+
+def test_todos_cannot_be_attached_to_other_tenants_activities(
+    client, session, preventionist, supervisor, other_tenant
+):
+    activity = make_activity(session, preventionist, supervisor)
+    outsider = make_user(session, Role.preventionist, "outsider", tenant_id=other_tenant.id)
+    own = make_activity(session, outsider, outsider)
+    [todo] = make_todos(session, own, TodoStatus.pending)
+    headers = auth_headers(outsider)
+    item = {"description": "Helmets", "activity_id": activity.id}
+
+    assert client.post("/todos/", json=item, headers=headers).status_code == 404
+    assert client.post("/todos/batch", json={"items": [item]}, headers=headers).status_code == 404
+    response = client.patch(f"/todos/{todo.id}", json={"activity_id": activity.id}, headers=headers)
+    assert response.status_code == 404
+    assert session.exec(select(TodoItem).where(TodoItem.activity_id == activity.id)).all() == []
+
+
+def test_jobs_are_private_to_their_tenant(client, session, preventionist, other_tenant):
+    outsider = make_user(session, Role.admin, "outsider", tenant_id=other_tenant.id)
+    job = enqueue_job(session, "stats.general", None, preventionist)
+
+    assert job.tenant_id == preventionist.tenant_id
+    assert client.get(f"/jobs/{job.id}", headers=auth_headers(outsider)).status_code == 404
+    assert client.get(f"/jobs/{job.id}", headers=auth_headers(preventionist)).status_code == 200
+
+
+def test_activities_cannot_be_assigned_across_tenants(client, session, preventionist, other_tenant):
+    outsider = make_user(session, Role.supervisor, "outsider", tenant_id=other_tenant.id)
+
+    response = client.post(
+        "/activities/",
+        json={"name": "Inspection", "assigned_to_id": outsider.id},
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize(
+    "path", ["/activities/", "/activities/1", "/todos/", "/activity/statuses_stats/1", "/sync/changes"]
+)
+def test_tenant_routes_need_a_token(client, session, preventionist, supervisor, path):
+    make_activity(session, preventionist, supervisor)
+
+    assert client.get(path).status_code == 401
+
+
+def test_tokens_without_a_tenant_are_refused(client, session, preventionist):
+    token = create_access_token(data={"sub": preventionist.username})
+
+    response = client.get("/activities/", headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 401
+
+
+def test_anonymous_sessions_see_no_rows(session, preventionist, supervisor):
+    make_activity(session, preventionist, supervisor)
+
+    with Session(engine) as anonymous:
+        scope_session(anonymous, ANONYMOUS_TENANT_ID)
+        assert anonymous.exec(select(Activity)).all() == []
+
+
+def test_scoped_sessions_stamp_their_tenant(preventionist, other_tenant):
+    with Session(engine) as scoped:
+        scope_session(scoped, other_tenant.id)
+        activity = Activity(name="Audit", created_by_id=preventionist.id, assigned_to_id=preventionist.id)
+        scoped.add(activity)
+        scoped.commit()
+        assert activity.tenant_id == other_tenant.id
+
+
+@pytest.mark.parametrize("login", ["preventionist", "preventionist@example.com"])
+def test_login_by_username_or_email(client, session, other_tenant, login):
+    user = make_user(session, Role.preventionist, "preventionist", tenant_id=other_tenant.id)
+
+    response = client.post("/auth/token", data={"username": login, "password": PASSWORD})
+
+    assert response.status_code == 200
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+    assert me.json()["id"] == user.id
+
+
+def sign_up(client, username: str, email: str):
+    return client.post(
+        "/users/", json={"username": username, "email": email, "password": PASSWORD, "role": "supervisor"}
+    )
+
+
+def test_logins_are_unique_across_tenants_and_fields(client, session, other_tenant):
+    make_user(session, Role.preventionist, "taken", tenant_id=other_tenant.id)
+
+    assert sign_up(client, "taken", "new@example.com").json()["detail"] == "Username already registered"
+    assert sign_up(client, "new", "taken@example.com").json()["detail"] == "Email already registered"
+    # Would match the existing user's email at login
+    assert sign_up(client, "taken@example.com", "new@example.com").status_code == 400
+    assert sign_up(client, "new", "taken").status_code == 400
+    assert sign_up(client, "new", "new@example.com").status_code == 200
+
+
+def test_import_reports_logins_taken_across_fields(client, session, other_tenant):
+    make_user(session, Role.preventionist, "taken", tenant_id=other_tenant.id)
+    admin = make_user(session, Role.admin, "admin")
+    users = [
+        {"username": "taken@example.com", "email": "a@example.com", "password": PASSWORD},
+        {"username": "b", "email": "taken", "password": PASSWORD},
+        {"username": "c", "email": "c@example.com", "password": PASSWORD},
+        {"username": "c@example.com", "email": "d@example.com", "password": PASSWORD},
+    ]
+
+    response = client.post("/users/import", json=users, headers=auth_headers(admin))
+
+    assert [r["status"] for r in response.json()["results"]] == [
+        "duplicate",
+        "duplicate",
+        "created",
+        "duplicate",
+    ]
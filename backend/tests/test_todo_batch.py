@@ -0,0 +1,50 @@
+from sqlmodel import select
+from conftest import auth_headers, make_activity
+from models import ActivityStatus, TodoItem
+
+
+def test_batch_creates_todos_of_several_activities(client, session, preventionist, supervisor):
+    first = make_activity(session, preventionist, supervisor)
+    second = make_activity(session, preventionist, supervisor)
+
+    response = client.post(
+        "/todos/batch",
+        json={
+            "items": [
+                {"description": "Helmets", "activity_id": first.id, "status": "yes"},
+                {"description": "Gloves", "activity_id": second.id},
+                {"description": "Boots", "activity_id": first.id, "status": "no"},
+            ]
+        },
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 201
+    assert [(t["description"], t["activity_id"]) for t in response.json()] == [
+        ("Helmets", first.id),
+        ("Gloves", second.id),
+        ("Boots", first.id),
+    ]
+    session.refresh(first)
+    session.refresh(second)
+    assert (first.status, first.todo_count) == (ActivityStatus.done, 2)
+    assert (second.status, second.todo_count) == (ActivityStatus.pending, 1)
+
+
+def test_batch_with_unknown_activity_creates_nothing(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+
+    response = client.post(
+        "/todos/batch",
+        json={
+            "items": [
+                {"description": "Helmets", "activity_id": activity.id},
+                {"description": "Gloves", "activity_id": 999},
+            ]
+        },
+        headers=auth_headers(preventionist),
+    )
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Activities not found: [999]"
+    assert session.exec(select(TodoItem)).all() == []
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import auth_headers, make_activity, make_todos
+from models import TodoStatus
+from todo_bitmap import answered_count, pack_statuses
+
+PENDING, YES, NO, NOT_APPLY = TodoStatus.pending, TodoStatus.yes, TodoStatus.no, TodoStatus.not_apply
+
+
+def test_pack_statuses():
+    assert pack_statuses([]) == b""
+    # Todo k in bits 2k and 2k + 1, little-endian
+    assert pack_statuses([YES, NO, NOT_APPLY, PENDING]) == bytes([0b00_11_10_01])
+    assert pack_statuses([PENDING, PENDING, PENDING, PENDING, YES]) == b"\x00\x01"
+    assert pack_statuses([None, YES]) == pack_statuses([PENDING, YES])
+
+
+@pytest.mark.parametrize(
+    "statuses",
+    [
+        [],
+        [PENDING],
+        [NOT_APPLY],
+        [YES, NO, NOT_APPLY, PENDING],
+        [PENDING] * 7 + [NO],
+        [YES, PENDING, NO] * 300,
+    ],
+)
+def test_answered_count(statuses):
+    assert answered_count(pack_statuses(statuses)) == sum(s != PENDING for s in statuses)
+
+
+def test_answered_count_of_missing_column():
+    assert answered_count(None) == 0
+
+
+def test_todo_writes_repack_the_activity(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    first, second, third = make_todos(session, activity, PENDING, YES, PENDING)
+    session.refresh(activity)
+    assert (activity.todo_count, activity.todo_statuses) == (3, pack_statuses([PENDING, YES, PENDING]))
+    headers = auth_headers(preventionist)
+
+    client.patch(f"/todos/{first.id}", json={"status": "not_apply"}, headers=headers)
+    client.delete(f"/todos/{second.id}", headers=headers)
+    client.post(
+        "/todos/", json={"description": "Extra", "status": "no", "activity_id": activity.id}, headers=headers
+    )
+
+    session.refresh(activity)
+    assert activity.todo_count == 3
+    assert activity.todo_statuses == pack_statuses([NOT_APPLY, PENDING, NO])
+
+
+def test_updated_at_only_moves_with_the_status(client, session, preventionist, supervisor):
+    activity = make_activity(session, preventionist, supervisor)
+    first, second, third = make_todos(session, activity, PENDING, PENDING, PENDING)
+    session.refresh(activity)
+    headers = auth_headers(preventionist)
+
+    client.patch(f"/todos/{first.id}", json={"status": "yes"}, headers=headers)
+    session.refresh(activity)
+    in_progress_at = activity.updated_at
+
+    # Still in progress: the activity itself did not change for clients
+    client.patch(f"/todos/{second.id}", json={"status": "no"}, headers=headers)
+    session.refresh(activity)
+    assert activity.updated_at == in_progress_at
+    assert answered_count(activity.todo_statuses) == 2
+
+    client.patch(f"/todos/{third.id}", json={"status": "yes"}, headers=headers)
+    session.refresh(activity)
+    assert activity.updated_at > in_progress_at
+
+
+def test_calendar_counts_from_the_bitmap(client, session, preventionist, supervisor):
+    scheduled = datetime(2026, 3, 2, 9)
+    activity = make_activity(session, preventionist, supervisor, scheduled_date=scheduled)
+    make_todos(session, activity, YES, PENDING, NOT_APPLY)
+
+    response = client.get(
+        "/activities/calendar",
+        params={
+            "start": (scheduled - timedelta(days=1)).isoformat(),
+            "end": (scheduled + timedelta(days=1)).isoformat(),
+            "assignee_ids": [supervisor.id],
+        },
+        headers=auth_headers(preventionist),
+    )
+
+    [day] = response.json()
+    assert day["day"] == "2026-03-02"
+    assert [(a["id"], a["total_todos"], a["done_todos"]) for a in day["activities"]] == [(activity.id, 3, 2)]
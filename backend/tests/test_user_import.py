@@ -0,0 +1,66 @@
+import json
+from sqlmodel import select
+from conftest import auth_headers
+from models import Role, User
+from security import verify_password
+
+# Spreadsheet exports start with a byte order mark
+CSV = """\ufeffusername,email,password,role
+ana,ana@example.com,secret,supervisor
+luis,luis@example.com,secret,
+ana,other@example.com,secret,
+bad,bad@example.com,,
+"""
+
+
+def upload(client, user, name: str, content: str, content_type: str):
+    return client.post(
+        "/users/import/file",
+        files={"file": (name, content.encode(), content_type)},
+        headers=auth_headers(user),
+    )
+
+
+def test_csv_import_reports_every_row(client, session, preventionist):
+    response = upload(client, preventionist, "users.csv", CSV, "text/csv")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["created"], report["skipped"]) == (2, 2)
+    assert [result["status"] for result in report["results"]] == [
+        "created",
+        "created",
+        "duplicate",
+        "invalid",
+    ]
+    assert report["results"][2]["detail"] == "Username already registered"
+    assert report["results"][3]["detail"].startswith("password:")
+
+    ana = session.exec(select(User).where(User.username == "ana")).one()
+    luis = session.exec(select(User).where(User.username == "luis")).one()
+    assert (ana.id, ana.role, ana.tenant_id) == (report["results"][0]["id"], Role.supervisor, 1)
+    # Empty cells take the default
+    assert luis.role == Role.preventionist
+    assert verify_password("secret", luis.password_hash)
+
+
+def test_json_file_import(client, session, preventionist):
+    users = [{"username": "ana", "email": "ana@example.com", "password": "secret"}]
+
+    response = upload(client, preventionist, "users.json", json.dumps(users), "application/json")
+
+    assert response.json()["created"] == 1
+    assert session.exec(select(User).where(User.email == "ana@example.com")).one()
+
+
+def test_unreadable_files_are_rejected(client, preventionist):
+    response = upload(client, preventionist, "users.json", '{"username": "ana"}', "application/json")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Could not read file: Expected a JSON list of users"
+
+
+def test_supervisors_cannot_import(client, supervisor):
+    response = upload(client, supervisor, "users.csv", CSV, "text/csv")
+
+    assert response.status_code == 403
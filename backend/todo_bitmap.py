@@ -0,0 +1,39 @@
+"""
+Todo statuses of an activity packed into one column.
+
+Activity.todo_statuses holds two bits per todo, in todo id order: todo k is
+bits 2k and 2k+1 of the column read as a little-endian integer, and
+Activity.todo_count says how many there are. Both are kept by
+activity_lifecycle.refresh_activity_statuses, which runs after every write
+to todos, so progress reads (lifecycle, calendar, stats, archive rollups)
+take one row per activity instead of one per todo and count with bit
+operations. The todo rows stay the source of truth and what the API
+returns.
+"""
+from typing import Optional, Sequence
+from models import TodoStatus
+
+STATUS_BITS = 2
+STATUS_CODES = {
+    TodoStatus.pending: 0,
+    TodoStatus.yes: 1,
+    TodoStatus.no: 2,
+    TodoStatus.not_apply: 3,
+}
+
+
+def pack_statuses(statuses: Sequence[Optional[TodoStatus]]) -> bytes:
+    value = 0
+    for index, status in enumerate(statuses):
+        # A NULL status counts as pending
+        value |= STATUS_CODES[status or TodoStatus.pending] << (index * STATUS_BITS)
+    return value.to_bytes((len(statuses) * STATUS_BITS + 7) // 8, "little")
+
+
+def answered_count(packed: Optional[bytes]) -> int:
+    """Todos that are not pending: the 2-bit groups with any bit set"""
+    if not packed:
+        return 0
+    value = int.from_bytes(packed, "little")
+    low_bits = int.from_bytes(b"\x55" * len(packed), "little")
+    return ((value | value >> 1) & low_bits).bit_count()
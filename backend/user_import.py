@@ -0,0 +1,184 @@
+"""
+Bulk user import.
+
+Usage: uv run python user_import.py users.csv|users.json
+
+CSV files need a header with username, email, password and optionally role
+(defaults to preventionist); JSON files hold a list of objects with the
+same keys.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Optional, Sequence, Union
+from pydantic import ValidationError
+from sqlalchemy import insert, or_
+from sqlmodel import Session, col, select
+from jobs import job_handler
+from models import User
+from schemas import UserCreate, UserImportReport, UserImportRowResult, UserImportStatus
+from security import get_password_hash
+from tenancy import DEFAULT_TENANT_ID, session_tenant
+
+# bcrypt is deliberately slow (~250 ms per hash), so large imports hash in
+# a pool of processes. With a single core the pool is skipped.
+USER_IMPORT_WORKERS = int(os.getenv("USER_IMPORT_WORKERS") or os.cpu_count() or 1)
+USER_IMPORT_BATCH_SIZE = int(os.getenv("USER_IMPORT_BATCH_SIZE", "500"))
+
+ImportRow = Union[UserCreate, str]
+
+
+def hash_passwords(passwords: Sequence[str]) -> list[str]:
+    workers = min(USER_IMPORT_WORKERS, len(passwords))
+    if workers <= 1:
+        return [get_password_hash(password) for password in passwords]
+    # forkserver: forking the threaded server process directly is unsafe
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+    ) as executor:
+        return list(executor.map(get_password_hash, passwords, chunksize=4))
+
+
+def parse_rows(records: Iterable[dict[str, Any]]) -> list[ImportRow]:
+    """Validate raw records; invalid ones are kept as their error message."""
+    rows: list[ImportRow] = []
+    for record in records:
+        # Empty CSV cells mean "use the default"
+        data = {key: value for key, value in record.items() if value not in (None, "")}
+        try:
+            rows.append(UserCreate.model_validate(data))
+        except ValidationError as e:
+            rows.append(
+                "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            )
+    return rows
+
+
+def csv_records(content: str) -> list[dict[str, Any]]:
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def json_records(content: str) -> list[dict[str, Any]]:
+    records = json.loads(content)
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON list of users")
+    return [record if isinstance(record, dict) else {} for record in records]
+
+
+def taken_logins(session: Session, logins: Iterable[str]) -> set[str]:
+    """
+    The given usernames and emails that some user, in any company, already
+    has as username or email. Logins accept either, so both are unique across
+    companies and across the two columns: a login then matches one user.
+    """
+    logins = set(logins)
+    if not logins:
+        return set()
+    taken: set[str] = set()
+    for username, email in session.exec(
+        select(User.username, User.email)
+        .where(or_(col(User.username).in_(logins), col(User.email).in_(logins)))
+        .execution_options(all_tenants=True)
+    ).all():
+        taken.update({username, email} & logins)
+    return taken
+
+
+def import_users(session: Session, rows: Sequence[ImportRow]) -> UserImportReport:
+    """
+    Create the valid rows whose username and email are not taken (see
+    taken_logins), either in the database (checked with one query) or by an
+    earlier row. Passwords are hashed in parallel and users inserted in
+    batches in a single transaction. Results are reported per row, in input
+    order.
+    """
+    results: list[UserImportRowResult] = []
+    for index, row in enumerate(rows, start=1):
+        if isinstance(row, str):
+            results.append(
+                UserImportRowResult(row=index, status=UserImportStatus.invalid, detail=row)
+            )
+        else:
+            results.append(
+                UserImportRowResult(
+                    row=index,
+                    username=row.username,
+                    email=row.email,
+                    status=UserImportStatus.created,
+                )
+            )
+
+    candidates = [
+        (result, row) for result, row in zip(results, rows) if isinstance(row, UserCreate)
+    ]
+    taken = taken_logins(
+        session, [login for _, row in candidates for login in (row.username, row.email)]
+    )
+
+    to_create: list[tuple[UserImportRowResult, UserCreate]] = []
+    for result, row in candidates:
+        if row.username in taken:
+            result.status = UserImportStatus.duplicate
+            result.detail = "Username already registered"
+        elif row.email in taken:
+            result.status = UserImportStatus.duplicate
+            result.detail = "Email already registered"
+        else:
+            taken.update((row.username, row.email))
+            to_create.append((result, row))
+
+    hashes = hash_passwords([row.password for _, row in to_create])
+    # Core INSERTs skip the before_flush hook that stamps the tenant
+    tenant_id = session_tenant(session) or DEFAULT_TENANT_ID
+
+    for start in range(0, len(to_create), USER_IMPORT_BATCH_SIZE):
+        batch = to_create[start:start + USER_IMPORT_BATCH_SIZE]
+        inserted = session.exec(
+            insert(User).returning(User.id, User.email),
+            params=[
+                {
+                    "username": row.username,
+                    "email": row.email,
+                    "role": row.role,
+                    "password_hash": password_hash,
+                    "tenant_id": tenant_id,
+                }
+                for (_, row), password_hash in zip(batch, hashes[start:start + USER_IMPORT_BATCH_SIZE])
+            ],
+        ).all()
+        ids = {email: user_id for user_id, email in inserted}
+        for result, row in batch:
+            result.id = ids[row.email]
+    session.commit()
+
+    return UserImportReport(
+        created=len(to_create),
+        skipped=len(results) - len(to_create),
+        results=results,
+    )
+
+
+@job_handler("users.import")
+def run_user_import(session: Session, records: list[dict[str, Any]], user_id: Optional[int]) -> Any:
+    return import_users(session, parse_rows(records)).model_dump(mode="json")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    from database import engine
+
+    path = sys.argv[1]
+    with open(path, encoding="utf-8-sig") as f:
+        content = f.read()
+    records = json_records(content) if path.endswith(".json") else csv_records(content)
+    with Session(engine) as session:
+        report = import_users(session, parse_rows(records))
+    for result in report.results:
+        if result.status != UserImportStatus.created:
+            print(f"row {result.row}: {result.status.value} ({result.detail})")
+    print(f"Created {report.created} users, skipped {report.skipped}")